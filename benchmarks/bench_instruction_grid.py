@@ -0,0 +1,145 @@
+#bench_instruction_grid.py
+"""
+Update and draw time per tick of many instructions (5 steps each) as Instruction objects
+and as one InstructionGrid, after checking that both draw the same pixels.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_instruction_grid [--steps N] [--ticks N]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+from objects.instruction import Instruction
+from objects.instruction_grid import InstructionGrid
+
+WIDTH, HEIGHT = 1920, 1080
+INSTRUCTION_WIDTH = 40
+EXECUTION_SPEED = 20
+LAUNCH_INTERVAL = 1  # Ticks between the start of two consecutive instructions
+SPACING = 20  # Gap between instructions, enough for the border and the executed animation
+RESET_TICK, RELAUNCH_TICK = 45, 60  # Some instructions are reset (stopping their executed animations), then executed again
+
+def get_layout(num_instructions):
+    """Return the positions of the instructions, row by row across the screen."""
+    per_row = WIDTH // (INSTRUCTION_WIDTH + SPACING)
+    indices = np.arange(num_instructions)
+    positionsX = 10 + (indices % per_row) * (INSTRUCTION_WIDTH + SPACING)
+    positionsY = 10 + (indices // per_row) * (INSTRUCTION_WIDTH // Instruction.NUM_STEPS + SPACING)
+    return positionsX.tolist(), positionsY.tolist()
+
+class ObjectsPipeline:
+    """The instructions as a list of Instruction objects."""
+
+    def __init__(self, num_instructions):
+        positionsX, positionsY = get_layout(num_instructions)
+        self.instructions = [Instruction(x, y, INSTRUCTION_WIDTH, EXECUTION_SPEED) for x, y in zip(positionsX, positionsY)]
+
+    def update(self, tick):
+        if tick % LAUNCH_INTERVAL == 0 and tick // LAUNCH_INTERVAL < len(self.instructions):
+            self.instructions[tick // LAUNCH_INTERVAL].start_execution()
+        if tick == 40:
+            for instruction in self.instructions[::7]:
+                instruction.execution_error()
+        if tick == RESET_TICK:
+            for instruction in self.instructions[::3]:
+                instruction.reset()
+        if tick == RELAUNCH_TICK:
+            for instruction in self.instructions[::3]:
+                instruction.start_execution()
+        for index, instruction in enumerate(self.instructions[::5]):
+            instruction.go_to(1, 1, instruction.posX + (index % 3), instruction.posY, tick)
+        for instruction in self.instructions:
+            instruction.update(tick)
+
+    def draw(self, screen):
+        for instruction in self.instructions:
+            instruction.draw(screen)
+
+class GridPipeline:
+    """The same instructions as one InstructionGrid."""
+
+    def __init__(self, num_instructions):
+        positionsX, positionsY = get_layout(num_instructions)
+        self.grid = InstructionGrid(positionsX, positionsY, INSTRUCTION_WIDTH, EXECUTION_SPEED)
+        self.moving = np.arange(num_instructions)[::5]
+
+    def update(self, tick):
+        if tick % LAUNCH_INTERVAL == 0 and tick // LAUNCH_INTERVAL < self.grid.get_num_instructions():
+            self.grid.start_execution(tick // LAUNCH_INTERVAL)
+        if tick == 40:
+            self.grid.execution_error(slice(None, None, 7))
+        if tick == RESET_TICK:
+            self.grid.reset(slice(None, None, 3))
+        if tick == RELAUNCH_TICK:
+            self.grid.start_execution(slice(None, None, 3))
+        finalX = self.grid.inst_posX[self.moving] + np.arange(len(self.moving)) % 3
+        self.grid.go_to(1, 1, finalX, self.grid.inst_posY[self.moving], tick, self.moving)
+        self.grid.update(tick)
+
+    def draw(self, screen):
+        self.grid.draw(screen)
+
+def find_first_difference(num_instructions, ticks):
+    """Run both pipelines and return the first tick they draw differently (None if they never do)."""
+    pipelines = [ObjectsPipeline(num_instructions), GridPipeline(num_instructions)]
+    screens = [pygame.Surface((WIDTH, HEIGHT)) for _ in pipelines]
+    for tick in range(ticks):
+        for pipeline, screen in zip(pipelines, screens):
+            pipeline.update(tick)
+            screen.fill((0, 0, 0))
+            pipeline.draw(screen)
+        if pygame.image.tobytes(screens[0], "RGB") != pygame.image.tobytes(screens[1], "RGB"):
+            return tick
+    return None
+
+def check_same_pixels(num_instructions, ticks):
+    """Run both pipelines and exit with an error at the first tick they draw differently."""
+    tick = find_first_difference(num_instructions, ticks)
+    if tick is not None:
+        sys.exit(f"InstructionGrid draws differently from the Instruction objects at tick {tick}")
+
+def measure(pipeline, screen, ticks):
+    """Return the (update, draw) milliseconds per tick of a pipeline."""
+    update_seconds = draw_seconds = 0
+    for tick in range(ticks):
+        start = time.perf_counter()
+        pipeline.update(tick)
+        update_seconds += time.perf_counter() - start
+
+        screen.fill((0, 0, 0))
+        start = time.perf_counter()
+        pipeline.draw(screen)
+        draw_seconds += time.perf_counter() - start
+    return update_seconds * 1000 / ticks, draw_seconds * 1000 / ticks
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=10000, help="number of instruction steps")
+    parser.add_argument("--ticks", type=int, default=200, help="number of ticks to run")
+    parser.add_argument("--check-ticks", type=int, default=150, help="ticks compared pixel by pixel (0 to skip)")
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.Surface((WIDTH, HEIGHT))
+    num_instructions = args.steps // Instruction.NUM_STEPS
+
+    if args.check_ticks:
+        check_same_pixels(min(num_instructions, 500), args.check_ticks)
+
+    objects_update, objects_draw = measure(ObjectsPipeline(num_instructions), screen, args.ticks)
+    grid_update, grid_draw = measure(GridPipeline(num_instructions), screen, args.ticks)
+
+    print(f"{num_instructions} instructions, {num_instructions * Instruction.NUM_STEPS} steps, {args.ticks} ticks")
+    print(f"Instruction objects: update {objects_update:8.2f} ms/tick  draw {objects_draw:8.2f} ms/tick")
+    print(f"InstructionGrid:     update {grid_update:8.2f} ms/tick  draw {grid_draw:8.2f} ms/tick")
+    print(f"speedup:             update {objects_update / grid_update:8.1f}x       draw {objects_draw / grid_draw:8.1f}x")
+
+if __name__ == "__main__":
+    main()
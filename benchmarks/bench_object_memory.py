@@ -0,0 +1,84 @@
+#bench_object_memory.py
+"""
+Memory per object and update time per tick of large numbers of Instruction objects
+(each one an Instruction and its 5 Instruction_steps).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_object_memory [--objects N] [--ticks N]
+"""
+
+import os
+import gc
+import time
+import argparse
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from objects.instruction import Instruction
+from benchmarks.bench_instruction_grid import INSTRUCTION_WIDTH, EXECUTION_SPEED
+
+OBJECTS_PER_INSTRUCTION = Instruction.NUM_STEPS + 1
+MOVE_STRIDE = 5  # Every MOVE_STRIDE-th instruction moves every tick
+
+def create_instructions(num_instructions):
+    """Return num_instructions instructions laid out on a grid."""
+    return [Instruction(10 + (index % 32) * 60, 10 + (index // 32) * 30, INSTRUCTION_WIDTH, EXECUTION_SPEED) for index in range(num_instructions)]
+
+def measure_memory(num_instructions):
+    """
+    Return the bytes allocated per object when creating the instructions (fields, tables and
+    the objects themselves), and the peak during their creation.
+
+    Returns:
+        tuple: (bytes per object, peak MiB).
+    """
+    gc.collect()
+    tracemalloc.start()
+    instructions = create_instructions(num_instructions)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del instructions
+    return current / (num_instructions * OBJECTS_PER_INSTRUCTION), peak / 2**20
+
+def measure_update(num_instructions, ticks):
+    """
+    Return the update time per tick of the instructions: they execute one after another
+    (so the executed animations play) while a fraction of them move.
+
+    Returns:
+        float: Milliseconds per tick.
+    """
+    instructions = create_instructions(num_instructions)
+    homes = [(instruction.posX, instruction.posY) for instruction in instructions]
+    update_seconds = 0
+    for tick in range(ticks):
+        start = time.perf_counter()
+        for index in range(tick * 50, min((tick + 1) * 50, num_instructions)):
+            instructions[index].start_execution()
+        for index in range(tick % MOVE_STRIDE, num_instructions, MOVE_STRIDE):
+            homeX, homeY = homes[index]
+            instructions[index].go_to(1, 1, homeX + tick % 3, homeY, tick)
+        for instruction in instructions:
+            instruction.update(tick)
+        update_seconds += time.perf_counter() - start
+    return update_seconds * 1000 / ticks
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--objects", type=int, default=100000, help="number of objects (instructions and steps)")
+    parser.add_argument("--ticks", type=int, default=30, help="number of ticks to update")
+    args = parser.parse_args()
+
+    num_instructions = max(1, args.objects // OBJECTS_PER_INSTRUCTION)
+    num_objects = num_instructions * OBJECTS_PER_INSTRUCTION
+
+    bytes_per_object, peak = measure_memory(num_instructions)
+    update_ms = measure_update(num_instructions, args.ticks)
+
+    print(f"{num_instructions} instructions, {num_objects} objects")
+    print(f"memory: {bytes_per_object:8.1f} bytes/object  {bytes_per_object * num_objects / 2**20:8.1f} MiB  (peak {peak:.1f} MiB)")
+    print(f"update: {update_ms:8.2f} ms/tick  {update_ms * 1000 / num_objects:8.3f} us/object")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#bench_tokenizer.py
+"""
+Throughput of CodeString.tokenize_line on large C/C++ listings, compared with the
+previous lexer (one re.match per category on line[pos:]).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_tokenizer [file.cpp ...] [--lines N]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from objects.code_string import CodeString
+
+SYNTHETIC_CODE = """
+#include <vector>
+// Branchless maximum of two numbers
+int calculate_max (int a, int b) {
+    int max_number = a * (a > b) + b * (a <= b);
+    const char* name = "max";
+    std::vector<float> values = {1.5, 2.25, 3};
+    for (int i = 0; i < 10; i++) { values[i] += 0.5; }
+    /* multiply */ return max_number;
+}
+"""
+
+def legacy_tokenize_line(code, line):
+    """The lexer CodeString used before: every category tried with re.match on a slice of the line."""
+    tokens = []
+    pos = 0
+
+    while pos < len(line):
+        match = None
+        color = code.syntax_colors["default"]
+
+        if line[pos].isspace():
+            space_match = re.match(r"\s+", line[pos:])
+            if space_match:
+                tokens.append((space_match.group(0), code.syntax_colors["default"]))
+                pos += len(space_match.group(0))
+            continue
+
+        for category, pattern in code.language_patterns.items():
+            match = re.match(pattern, line[pos:])
+            if match:
+                color = code.syntax_colors.get(category, code.syntax_colors["default"])
+                tokens.append((match.group(0), color))
+                pos += len(match.group(0))
+                break
+
+        if not match:
+            tokens.append((line[pos], code.syntax_colors["default"]))
+            pos += 1
+
+    return tokens
+
+def load_lines(files, num_lines):
+    """Return num_lines lines of code, repeating the given files (or a synthetic listing)."""
+    text = ""
+    for file_name in files:
+        with open(file_name, encoding="utf-8", errors="replace") as code_file:
+            text += code_file.read() + "\n"
+    source_lines = (text or SYNTHETIC_CODE).split("\n")
+    return [source_lines[i % len(source_lines)] for i in range(num_lines)]
+
+def measure(tokenize, lines):
+    """Tokenize every line once and return (tokens, seconds)."""
+    start = time.perf_counter()
+    num_tokens = 0
+    for line in lines:
+        num_tokens += len(tokenize(line))
+    return num_tokens, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("files", nargs="*", help="C/C++ files to tokenize (default: a synthetic listing)")
+    parser.add_argument("--lines", type=int, default=20000, help="number of lines to tokenize")
+    args = parser.parse_args()
+
+    pygame.init()
+    code = CodeString(0, 0, 100, variables=["a", "b", "max_number", "values"], functions=["calculate_max"], custom_types=["vector"])
+    lines = load_lines(args.files, args.lines)
+
+    for line in lines:
+        if code.tokenize_line(line) != legacy_tokenize_line(code, line):
+            sys.exit(f"Token mismatch with the legacy lexer on line: {line!r}")
+
+    num_tokens, seconds = measure(code.tokenize_line, lines)
+    _, legacy_seconds = measure(lambda line: legacy_tokenize_line(code, line), lines)
+
+    print(f"{len(lines)} lines, {num_tokens} tokens")
+    print(f"compiled lexer: {num_tokens / seconds:12,.0f} tokens/s ({seconds * 1000:.1f} ms)")
+    print(f"legacy lexer:   {num_tokens / legacy_seconds:12,.0f} tokens/s ({legacy_seconds * 1000:.1f} ms)")
+    print(f"speedup:        {legacy_seconds / seconds:.1f}x")
+
+if __name__ == "__main__":
+    main()
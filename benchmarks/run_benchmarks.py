@@ -0,0 +1,219 @@
+#run_benchmarks.py
+"""
+Headless benchmark of the synthetic scenes (see benchmarks/synthetic_scenes.py): update, draw
+and capture milliseconds per frame (p50/p99), encode frames/s and peak memory, measured
+separately for every scene, each in its own process. The results can be saved as a baseline
+and later runs compared against it, failing when a metric regresses by more than the threshold.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmarks [scene ...] [--ticks N] [--save-baseline] [--baseline FILE] [--threshold 0.1]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+
+WIDTH, HEIGHT = 1920, 1080
+FRAMERATE = 60
+BACKGROUND_COLOR = (0, 0, 0)
+BASELINE_FILE = "benchmarks/baseline.json"
+
+# Metrics compared with the baseline: name -> True if higher is better
+COMPARED_METRICS = {
+    "update_p50_ms": False,
+    "draw_p50_ms": False,
+    "capture_p50_ms": False,
+    "encode_fps": True,
+    "peak_rss_mib": False,
+}
+MIN_REGRESSION_MS = 0.05  # Smaller slowdowns of millisecond metrics are timer noise, whatever their percentage
+
+def frame_stats(prefix, seconds):
+    """Return fps, mean, p50 and p99 milliseconds per frame of per-frame timings."""
+    milliseconds = np.array(seconds) * 1000
+    return {
+        f"{prefix}_fps": float(1000 / max(milliseconds.mean(), 1e-9)),
+        f"{prefix}_mean_ms": float(milliseconds.mean()),
+        f"{prefix}_p50_ms": float(np.percentile(milliseconds, 50)),
+        f"{prefix}_p99_ms": float(np.percentile(milliseconds, 99)),
+    }
+
+def measure_encode(frames, screen):
+    """Return the frames/s of VideoRenderer encoding already captured frames (None without FFmpeg)."""
+    if shutil.which("ffmpeg") is None or not frames:
+        return None
+
+    from sceneRenderer import create_video_renderer
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings = {"framerate": FRAMERATE, "preset": "ultrafast", "crf": 23}
+        videoRenderer = create_video_renderer(os.path.join(directory, "benchmark.mp4"), screen, settings)
+        start = time.perf_counter()
+        for frame in frames:
+            videoRenderer.send_frame(frame)
+        videoRenderer.close()
+        return len(frames) / (time.perf_counter() - start)
+
+def run_scene(name, ticks, warmup_ticks, encode_frames, dirty_rects, quiet_ffmpeg):
+    """
+    Benchmark one synthetic scene. Meant to run in its own process, so peak RSS is the scene's.
+
+    Returns:
+        dict: The metrics of the scene.
+    """
+    if quiet_ffmpeg:
+        # FFmpeg inherits stderr: its progress output would bury the results
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 2)
+
+    import pygame
+    from sceneRenderer import draw_frame
+    from videoRenderer import copy_surface_pixels
+    from benchmarks.synthetic_scenes import create_scene
+
+    pygame.init()
+    screen = pygame.Surface((WIDTH, HEIGHT))
+    scene = create_scene(name)
+    settings = {"background_color": BACKGROUND_COLOR, "dirty_rects": dirty_rects}
+
+    update_seconds, draw_seconds, capture_seconds = [], [], []
+    frame = None  # Capture buffer, reused like VideoRenderer reuses its buffers
+    for tick in range(warmup_ticks + ticks):
+        start = time.perf_counter()
+        scene.update(tick)
+        updated = time.perf_counter()
+        draw_frame(scene, screen, settings, first_frame=tick == 0)
+        drawn = time.perf_counter()
+        frame = copy_surface_pixels(screen, frame)
+        captured = time.perf_counter()
+
+        if tick >= warmup_ticks:
+            update_seconds.append(updated - start)
+            draw_seconds.append(drawn - updated)
+            capture_seconds.append(captured - drawn)
+
+    results = {"ticks": ticks}
+    results.update(frame_stats("update", update_seconds))
+    results.update(frame_stats("draw", draw_seconds))
+    results.update(frame_stats("capture", capture_seconds))
+    results["peak_rss_mib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux, before keeping frames
+
+    # The next frames are kept and encoded on their own
+    frames = []
+    for tick in range(warmup_ticks + ticks, warmup_ticks + ticks + encode_frames):
+        scene.update(tick)
+        draw_frame(scene, screen, settings, first_frame=False)
+        frames.append(copy_surface_pixels(screen))
+    results["encode_fps"] = measure_encode(frames, screen)
+    pygame.quit()
+    return results
+
+def compare(results, baseline, threshold):
+    """
+    Return the regressions of results against a baseline.
+
+    Returns:
+        list[str]: One message per metric worse than the baseline by more than threshold (a fraction).
+    """
+    regressions = []
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            value, reference = metrics.get(metric), baseline[name].get(metric)
+            if value is None or not reference:
+                continue
+            if metric.endswith("_ms") and value - reference < MIN_REGRESSION_MS:
+                continue
+            change = (value - reference) / reference
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(f"{name} {metric}: {reference:.3f} -> {value:.3f} ({change:+.0%})")
+    return regressions
+
+def print_results(results):
+    """Print one line of metrics per scene."""
+    print(f"{'scene':<20} {'update p50/p99':>16} {'draw p50/p99':>16} {'capture p50/p99':>16} {'encode fps':>11} {'peak MiB':>9}")
+    for name, metrics in results.items():
+        encode_fps = metrics["encode_fps"]
+        print(f"{name:<20} "
+              f"{metrics['update_p50_ms']:7.2f}/{metrics['update_p99_ms']:<8.2f} "
+              f"{metrics['draw_p50_ms']:7.2f}/{metrics['draw_p99_ms']:<8.2f} "
+              f"{metrics['capture_p50_ms']:7.2f}/{metrics['capture_p99_ms']:<8.2f} "
+              f"{encode_fps if encode_fps is not None else float('nan'):11.1f} "
+              f"{metrics['peak_rss_mib']:9.1f}")
+
+def main():
+    from benchmarks.synthetic_scenes import SCENES
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenes", nargs="*", help=f"scenes to run (default: all of {', '.join(SCENES)})")
+    parser.add_argument("--ticks", type=int, default=300, help="measured ticks per scene")
+    parser.add_argument("--warmup-ticks", type=int, default=30, help="ticks run before measuring (caches, first frame)")
+    parser.add_argument("--encode-frames", type=int, default=30, help="captured frames encoded to measure encode throughput (0 to skip)")
+    parser.add_argument("--full-redraw", action="store_true", help="clear and draw the whole screen every frame instead of dirty rectangles")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON to compare with (and to write with --save-baseline)")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before a metric counts as a regression (0.10 = 10%%)")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="show the FFmpeg output")
+    args = parser.parse_args()
+    unknown = [name for name in args.scenes if name not in SCENES]
+    if unknown:
+        parser.error(f"unknown scenes: {', '.join(unknown)}")
+
+    results = {}
+    for name in args.scenes or SCENES:
+        # A fresh process per scene: no shared caches, and its own peak memory
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results[name] = executor.submit(
+                run_scene, name, args.ticks, args.warmup_ticks, args.encode_frames, not args.full_redraw, not args.verbose
+            ).result()
+
+    print_results(results)
+
+    report = {
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "settings": {"width": WIDTH, "height": HEIGHT, "ticks": args.ticks, "dirty_rects": not args.full_redraw},
+        "scenes": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}: run with --save-baseline to create one")
+        return
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline["settings"] != report["settings"]:
+        print(f"⚠️ Baseline settings differ: {baseline['settings']}")
+
+    regressions = compare(results, baseline["scenes"], args.threshold)
+    if regressions:
+        print(f"Regressions above {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"No regression above {args.threshold:.0%} against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#synthetic_scenes.py
+"""
+Parameterized scenes for the benchmarks: many instructions, long code listings being typed,
+and mixes of mostly static and fully dynamic objects. They never finish: the benchmark
+decides how many ticks to run.
+"""
+
+from scene.scene import Scene
+from objects.instruction import Instruction
+from objects.code_string import CodeString
+from benchmarks.bench_tokenizer import SYNTHETIC_CODE, load_lines
+from benchmarks.bench_instruction_grid import get_layout, INSTRUCTION_WIDTH, EXECUTION_SPEED
+
+TYPED_TEXT = " * (a > b)"  # Typed at the end of a line, then erased
+TYPING_LINE_STRIDE = 7  # Lines skipped between two typed lines
+CODE_POSITION = (100, 50)
+CODE_WIDTH = 1200
+
+class InstructionsScene(Scene):
+    """
+    num_instructions instructions; the first dynamic_fraction of them execute and move non-stop, the rest
+    never change and are static (drawn once into the static layer when this is the scene rendered).
+    """
+
+    def __init__(self, num_instructions, dynamic_fraction=1.0):
+        """
+        Args:
+            num_instructions (int): Number of instructions, laid out row by row.
+            dynamic_fraction (float): Fraction of the instructions that are animated.
+        """
+        super().__init__()
+        positionsX, positionsY = get_layout(num_instructions)
+        self.instructions = [Instruction(x, y, INSTRUCTION_WIDTH, EXECUTION_SPEED) for x, y in zip(positionsX, positionsY)]
+        self.dynamic = self.instructions[:round(num_instructions * dynamic_fraction)]
+        self.homeX = [instruction.posX for instruction in self.dynamic]
+        for instruction in self.instructions[len(self.dynamic):]:
+            instruction.set_static()
+
+    def update(self, tick):
+        for index, (instruction, homeX) in enumerate(zip(self.dynamic, self.homeX)):
+            if instruction.is_executed():
+                instruction.reset()  # Execute again: the instruction is never still
+            if (tick + index) % 4 == 0:
+                instruction.start_execution()
+            instruction.go_to(1, 1, homeX + (tick // 8 + index) % 4, instruction.posY, tick)  # Sway a few pixels
+        for instruction in self.instructions:
+            instruction.update(tick)
+
+    def get_children(self):
+        return self.instructions
+
+    def draw(self, screen):
+        for instruction in self.instructions:
+            instruction.draw(screen)
+
+    def finish(self):
+        return False
+
+class TypingScene(Scene):
+    """A num_lines listing where TYPED_TEXT is typed and erased one character per tick, moving from line to line."""
+
+    def __init__(self, num_lines, typing=True):
+        """
+        Args:
+            num_lines (int): Number of lines of the listing.
+            typing (bool): Type into the listing (False leaves it static).
+        """
+        super().__init__()
+        code_text = "\n".join(load_lines([], num_lines)) if num_lines else SYNTHETIC_CODE
+        self.code = CodeString(*CODE_POSITION, CODE_WIDTH, code_text=code_text, variables=["a", "b", "max_number", "values"], functions=["calculate_max"], custom_types=["vector"])
+        self.typing = typing
+        self.line_index = self.get_typed_line(1)  # Line 0 is not drawn
+        self.erasing = False
+
+    def get_typed_line(self, line_index):
+        """Return the first non-empty line from line_index on (wrapping around): highlighting needs characters."""
+        lines = self.code.lines
+        for offset in range(len(lines)):
+            index = (line_index + offset) % len(lines)
+            if index > 0 and lines[index]:
+                return index
+        return 1
+
+    def update(self, tick):
+        if self.typing:
+            self.code.highlight_line(self.line_index)
+            if self.erasing:
+                finished = self.code.type_and_erase_text(self.line_index, num_characters_to_erase=len(TYPED_TEXT))
+            else:
+                finished = self.code.type_and_erase_text(self.line_index, text=TYPED_TEXT)
+            if finished:
+                if self.erasing:
+                    self.line_index = self.get_typed_line(self.line_index + TYPING_LINE_STRIDE)
+                self.erasing = not self.erasing
+        self.code.update(tick)
+
+    def get_children(self):
+        return [self.code]
+
+    def draw(self, screen):
+        self.code.draw(screen)
+
+    def finish(self):
+        return False
+
+class MixedScene(Scene):
+    """Instructions under a code listing: either mostly static (few animated instructions, no typing) or fully dynamic."""
+
+    def __init__(self, num_instructions, num_lines, dynamic):
+        """
+        Args:
+            num_instructions (int): Number of instructions.
+            num_lines (int): Number of lines of the listing.
+            dynamic (bool): Animate every instruction and type into the listing,
+                            instead of animating 5% of the instructions only.
+        """
+        super().__init__()
+        self.instructions = InstructionsScene(num_instructions, 1.0 if dynamic else 0.05)
+        self.code = TypingScene(num_lines, typing=dynamic)
+
+    def update(self, tick):
+        self.instructions.update(tick)
+        self.code.update(tick)
+
+    def get_children(self):
+        return [self.instructions, self.code]
+
+    def draw(self, screen):
+        self.instructions.draw(screen)
+        self.code.draw(screen)
+
+    def finish(self):
+        return False
+
+# Benchmark cases: name -> (scene class, arguments)
+SCENES = {
+    "instructions_100": (InstructionsScene, (100,)),
+    "instructions_1000": (InstructionsScene, (1000,)),
+    "instructions_1000_static": (InstructionsScene, (1000, 0.05)),
+    "code_40_typing": (TypingScene, (40,)),
+    "code_200_typing": (TypingScene, (200,)),
+    "mixed_static": (MixedScene, (1000, 40, False)),
+    "mixed_dynamic": (MixedScene, (1000, 40, True)),
+}
+
+def create_scene(name):
+    """Return a new instance of the benchmark scene called name."""
+    scene_class, args = SCENES[name]
+    return scene_class(*args)
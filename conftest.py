@@ -0,0 +1,17 @@
+#conftest.py
+"""Shared setup of the tests: pygame without a display, run from the repository root (fonts are loaded by relative path)."""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+@pytest.fixture(autouse=True)
+def repository_root(monkeypatch):
+    """Run every test from the repository root, with pygame initialized."""
+    monkeypatch.chdir(ROOT)
+    pygame.init()
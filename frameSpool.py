@@ -0,0 +1,317 @@
+#frameSpool.py
+"""
+Raw frame spools: a render writes its frames to local disk as fast as it draws them, and an encoder
+turns them into a video at its own pace, in another process, later or on another machine.
+
+A spool is a directory:
+    spool.json         Frame size, pixel format, frame rate, and whether the render completed.
+    segment_NNNNNN.raw Stored frames, SEGMENT_FRAMES per file, tightly packed rows.
+    index.bin          One little-endian uint32 per frame of the video: the stored frame it shows.
+                       A repeated frame only adds an index entry.
+
+Frames are stored before their index entry is appended, so after a crash every indexed frame is complete.
+The encoder writes the video in parts it can skip when resumed, then joins them.
+
+Usage (from the repository root):
+    python frameSpool.py info SPOOL
+    python frameSpool.py encode SPOOL [SPOOL ...] -o OUTPUT [--codec h264] [--preset P] [--crf N] [--follow]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+
+import numpy as np
+from videoRenderer import FrameRenderer, VideoRenderer, ImageSequenceRenderer, CODECS
+from sceneRenderer import concat_outputs
+from utils.profiler import PROFILER
+
+INFO_FILE = "spool.json"
+INDEX_FILE = "index.bin"
+SEGMENT_FILE = "segment_{:06d}.raw"
+SEGMENT_FRAMES = 64  # Stored frames per segment file (~500 MiB of 1080p)
+INDEX_DTYPE = np.dtype("<u4")
+
+def write_info(path, info):
+    """Write the spool.json of a spool atomically."""
+    temporary_path = os.path.join(path, INFO_FILE + ".tmp")
+    with open(temporary_path, "w") as info_file:
+        json.dump(info, info_file, indent=2)
+    os.replace(temporary_path, os.path.join(path, INFO_FILE))
+
+class SpoolRenderer(FrameRenderer):
+    """Writes the frames into a spool directory instead of encoding them."""
+
+    def __init__(self, framerate, width, height, output_file, pix_fmt='rgb24', max_queue_bytes=FrameRenderer.MAX_QUEUE_BYTES, drop_frames=False, skip_duplicates=True):
+        """
+        Args:
+            framerate (int or str): Frames per second of the video the spool will be encoded into.
+            width (int): Frame width in pixels.
+            height (int): Frame height in pixels.
+            output_file (str): Directory of the spool (its previous content is replaced).
+            pix_fmt (str): FFmpeg pixel format of the frames sent (see surface_pix_fmt).
+            max_queue_bytes (int): Memory cap for the frames waiting to be written.
+            drop_frames (bool): Drop frames when the disk falls behind instead of blocking the producer.
+            skip_duplicates (bool): Repeat the previous frame when send_surface gets identical pixels.
+        """
+        super().__init__(output_file, max_queue_bytes, drop_frames, skip_duplicates)
+        channels = pix_fmt[:-2] if pix_fmt.endswith("24") else pix_fmt
+        self.info = {
+            "width": width,
+            "height": height,
+            "pix_fmt": pix_fmt,
+            "framerate": str(framerate),
+            "frame_bytes": width * height * len(channels),
+            "segment_frames": SEGMENT_FRAMES,
+            "complete": False,
+        }
+        self.stored_frames = 0
+        self.segment_file = None
+
+        if os.path.exists(output_file):
+            shutil.rmtree(output_file)
+        os.makedirs(output_file)
+        write_info(output_file, self.info)
+        self.index_file = open(os.path.join(output_file, INDEX_FILE), "wb", buffering=0)
+        self.start()
+
+    def write_frame(self, frame, index):
+        if self.stored_frames % SEGMENT_FRAMES == 0:
+            if self.segment_file is not None:
+                self.segment_file.close()
+            self.segment_file = open(os.path.join(self.output_file, SEGMENT_FILE.format(self.stored_frames // SEGMENT_FRAMES)), "wb", buffering=0)
+
+        with PROFILER.span("spool_write", "encode"):
+            self.segment_file.write(frame)
+            self.index_file.write(np.array([self.stored_frames], dtype=INDEX_DTYPE).tobytes())
+        self.stored_frames += 1
+
+    def write_repeated_frame(self, frame, index):
+        self.index_file.write(np.array([self.stored_frames - 1], dtype=INDEX_DTYPE).tobytes())
+
+    def finish(self):
+        """Close the files and mark the spool complete."""
+        if self.segment_file is not None:
+            self.segment_file.close()
+        self.index_file.close()
+        if self.error is None:
+            write_info(self.output_file, dict(self.info, complete=True, frames=self.frames_written, stored_frames=self.stored_frames))
+
+class FrameSpool:
+    """Reads the frames of a spool, possibly while it is still being written."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Directory of the spool.
+        """
+        self.path = path
+        self.segments = {}  # Segment number -> memory map of its file
+        self.refresh()
+
+    def refresh(self):
+        """Read the index again: frames written since the last call become available."""
+        with open(os.path.join(self.path, INFO_FILE)) as info_file:
+            self.info = json.load(info_file)
+
+        with open(os.path.join(self.path, INDEX_FILE), "rb") as index_file:
+            data = index_file.read()
+        self.index = np.frombuffer(data[:len(data) - len(data) % INDEX_DTYPE.itemsize], dtype=INDEX_DTYPE)
+
+    @property
+    def complete(self):
+        """True once the render finished writing the spool."""
+        return self.info["complete"]
+
+    def __len__(self):
+        """Number of frames available."""
+        return len(self.index)
+
+    def get_stored_frame(self, number):
+        """Return the stored frame a frame of the video shows."""
+        return int(self.index[number])
+
+    def get_frame(self, number):
+        """Return the pixels of frame number of the video, read from the memory-mapped segment."""
+        stored = self.get_stored_frame(number)
+        segment, slot = divmod(stored, self.info["segment_frames"])
+        frame_bytes = self.info["frame_bytes"]
+
+        pixels = self.segments.get(segment)
+        if pixels is None or len(pixels) < (slot + 1) * frame_bytes:  # New, or mapped before this frame was written
+            pixels = np.memmap(os.path.join(self.path, SEGMENT_FILE.format(segment)), dtype=np.uint8, mode="r")
+            self.segments[segment] = pixels
+        return memoryview(pixels[slot * frame_bytes:(slot + 1) * frame_bytes])
+
+class SpoolSequence:
+    """Several spools played one after the other as a single sequence of frames."""
+
+    def __init__(self, spool_paths):
+        self.spools = [FrameSpool(path) for path in spool_paths]
+        first = self.spools[0].info
+        for spool in self.spools[1:]:
+            if any(spool.info[key] != first[key] for key in ("width", "height", "pix_fmt", "framerate")):
+                raise ValueError(f"{spool.path} does not have the frame format of {self.spools[0].path}")
+        self.info = first
+
+    def refresh(self):
+        """Read the indexes again."""
+        for spool in self.spools:
+            if not spool.complete:
+                spool.refresh()
+
+    @property
+    def complete(self):
+        """True once every spool is complete."""
+        return all(spool.complete for spool in self.spools)
+
+    def get_available(self):
+        """Return the number of frames that can be read in order: up to the first spool that is not complete."""
+        available = 0
+        for spool in self.spools:
+            available += len(spool)
+            if not spool.complete:
+                break
+        return available
+
+    def locate(self, number):
+        """Return (spool, frame number in it) of a frame of the sequence."""
+        for spool in self.spools:
+            if number < len(spool):
+                return spool, number
+            number -= len(spool)
+        raise IndexError(number)
+
+    def is_repeat(self, number):
+        """True if a frame shows the same stored frame as the previous one."""
+        if number == 0:
+            return False
+        spool, local = self.locate(number)
+        if local == 0:
+            return False
+        return spool.get_stored_frame(local) == spool.get_stored_frame(local - 1)
+
+    def get_frame(self, number):
+        spool, local = self.locate(number)
+        return spool.get_frame(local)
+
+def create_part_renderer(info, output_file, settings, start_number):
+    """Return the sink encoding a part: a VideoRenderer, or an ImageSequenceRenderer for codec "png"."""
+    codec = settings.get("codec", "h264")
+    if codec == "png":
+        return ImageSequenceRenderer(info["width"], info["height"], output_file, pix_fmt=info["pix_fmt"],
+                                     compression=settings.get("png_compression", 1), start_number=start_number)
+    return VideoRenderer(info["framerate"], info["width"], info["height"], output_file, pix_fmt=info["pix_fmt"],
+                         skip_duplicates=False, preset=settings.get("preset", "ultrafast"), crf=settings.get("crf", 23), codec=codec)
+
+def encode_spools(spool_paths, output_file, settings, part_frames=600, follow=False, poll_seconds=0.5):
+    """
+    Encode spools, one after the other, into a single output. The output is written in parts of
+    part_frames frames kept in output_file.parts until they are joined: running the same encode again
+    after an interruption only encodes the missing parts. Other settings encode from scratch.
+
+    Args:
+        spool_paths (list[str]): Spool directories, in playback order.
+        output_file (str): Path of the video (or directory of the images).
+        settings (dict): Encoder settings: codec, preset, crf, png_compression.
+        part_frames (int): Frames per part.
+        follow (bool): Wait for spools that are still being rendered, encoding their frames as they arrive.
+        poll_seconds (float): Time between two checks for new frames when following.
+
+    Returns:
+        int: Number of frames encoded.
+    """
+    sequence = SpoolSequence(spool_paths)
+    codec = settings.get("codec", "h264")
+    extension = "" if codec == "png" else CODECS[codec][0]
+
+    parts_dir = output_file + ".parts"
+    encode_settings = {key: settings.get(key) for key in ("codec", "preset", "crf", "png_compression")}
+    encode_settings.update(spools=[os.path.abspath(path) for path in spool_paths], part_frames=part_frames)
+    settings_file = os.path.join(parts_dir, "settings.json")
+    if os.path.exists(settings_file):
+        with open(settings_file) as previous_file:
+            if json.load(previous_file) != encode_settings:
+                shutil.rmtree(parts_dir)  # Parts of another encode: start over
+    os.makedirs(parts_dir, exist_ok=True)
+    with open(settings_file, "w") as current_file:
+        json.dump(encode_settings, current_file)
+
+    part_files = []
+    start = 0
+    while True:
+        sequence.refresh()
+        available = sequence.get_available()
+        end = min(start + part_frames, available)
+        if end - start < part_frames and follow and not sequence.complete:
+            time.sleep(poll_seconds)  # Wait for a full part, or for the render to complete
+            continue
+        if end == start:
+            break
+
+        part_file = os.path.join(parts_dir, f"part_{len(part_files):05d}{extension}")
+        if not os.path.exists(part_file):  # Resumed encodes skip the finished parts
+            temporary_file = os.path.join(parts_dir, f"part_{len(part_files):05d}.tmp{extension}")
+            if os.path.isdir(temporary_file):
+                shutil.rmtree(temporary_file)
+            renderer = create_part_renderer(sequence.info, temporary_file, settings, start)
+            try:
+                for number in range(start, end):
+                    if number > start and sequence.is_repeat(number):
+                        renderer.repeat_frame()
+                    else:
+                        renderer.send_frame(sequence.get_frame(number))
+            finally:
+                renderer.close()
+            os.replace(temporary_file, part_file)  # Only complete parts get their final name
+
+        part_files.append(part_file)
+        start = end
+
+    if not sequence.complete:
+        print(f"⚠️ {output_file}: the spools are incomplete (interrupted render?), encoded the {start} frames available")
+
+    if codec == "png" and os.path.isdir(output_file):
+        shutil.rmtree(output_file)
+    if part_files:
+        concat_outputs(part_files, output_file, dict(settings, spool=False))  # The parts are encoded already
+    shutil.rmtree(parts_dir)
+    return start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    info_parser = commands.add_parser("info", help="show the format and frames of spools")
+    info_parser.add_argument("spools", nargs="+")
+
+    encode_parser = commands.add_parser("encode", help="encode spools into one video (resumes an interrupted encode)")
+    encode_parser.add_argument("spools", nargs="+")
+    encode_parser.add_argument("-o", "--output", required=True, help="video file (or image directory with --codec png)")
+    encode_parser.add_argument("--codec", default="h264", choices=list(CODECS) + ["png"])
+    encode_parser.add_argument("--preset", default="medium", help="x264 preset")
+    encode_parser.add_argument("--crf", type=int, default=18, help="x264 quality")
+    encode_parser.add_argument("--png-compression", type=int, default=6, help="zlib level of the images")
+    encode_parser.add_argument("--part-frames", type=int, default=600, help="frames per resumable part")
+    encode_parser.add_argument("--follow", action="store_true", help="wait for spools still being rendered")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        for path in args.spools:
+            spool = FrameSpool(path)
+            info = spool.info
+            stored = int(spool.index.max()) + 1 if len(spool) else 0
+            print(f"{path}: {info['width']}x{info['height']} {info['pix_fmt']} at {info['framerate']} fps, "
+                  f"{len(spool)} frames ({stored} stored), {'complete' if spool.complete else 'incomplete'}")
+        return
+
+    settings = {"codec": args.codec, "preset": args.preset, "crf": args.crf, "png_compression": args.png_compression}
+    frames = encode_spools(args.spools, args.output, settings, part_frames=args.part_frames, follow=args.follow)
+    print(f"{args.output}: {frames} frames encoded")
+
+if __name__ == "__main__":
+    main()
+    sys.exit()
@@ -1,76 +1,230 @@
+import os
 import pygame
 import sys
 from scene.scene_instructions import SceneInstructions
 from scene.scene_code import SceneCode
+from scene.scene_timeline import SceneTimeline
 from utils.colors import *
-from videoRenderer import VideoRenderer
-import numpy as np
+from sceneRenderer import render_scenes_parallel, concat_outputs, create_video_renderer, get_output_extension, get_render_extension
+from utils.viewport import set_render_scale
+from sceneBaker import render_scene_chunked
+import renderCache
+from utils.profiler import PROFILER
 
 RECORD_VIDEO = True
+OFFLINE_RENDER = True  # Render without a window and without framerate throttling (only used with RECORD_VIDEO)
+PARALLEL_RENDER = True  # Offline only: render each scene in its own process and join them into OUTPUT_FILE
+CHUNKED_RENDER = False  # With PARALLEL_RENDER: bake each scene, then split its frames across all cores
+RENDER_CACHE = True  # With PARALLEL_RENDER: reuse the render of every scene whose code and settings did not change
+CACHE_DIR = "videos/cache"
+DIRTY_RECT_RENDERING = True  # Repaint only the areas that changed since the previous frame
+MAX_SCENE_SECONDS = 60  # Offline safety limit: a scene that never finishes is cut after this time
+OUTPUT_CODEC = "h264"  # "h264" (delivery), "prores" or "ffv1" (intraframe, for editing), "png" (numbered images)
+OUTPUT_FILE = "videos/video"  # The extension of the codec is added (image sequences are directories)
+SPOOL_FRAMES = False  # Render raw frames to disk at full speed (frameSpool.py), then encode them
+ENCODE_SPOOLS = True  # With SPOOL_FRAMES: False leaves the spools for `python frameSpool.py encode`
+PROFILE = False  # Time update/draw of every object, capture and encoding; writes *.profile.json and *.trace.json (chrome://tracing)
+PROFILE_OUTPUT = "videos/run"  # Base path of the profile of run_scenes (parallel renders write one per scene video)
+
+# Preview seeking (only when not recording): Left/Right -1/+1 s, Down/Up -10/+10 s, Home scene start,
+# Space pause, click on the window to jump to that fraction of MAX_SCENE_SECONDS
+SNAPSHOT_INTERVAL = 60  # Ticks between timeline snapshots: lower seeks faster and uses more memory
+
+# Draft mode: quick previews of long scenes
+DRAFT_MODE = False
+DRAFT_SCALE = 0.5  # Render resolution as a fraction of WIDTH x HEIGHT (e.g. 0.25 or 0.5)
+DRAFT_FRAME_STRIDE = 2  # Draw and encode only every Nth tick (every tick is still updated)
+DRAFT_CRF = 35  # Low bitrate encode
 
 # Pygame settings
 WIDTH, HEIGHT = 1920, 1080
 FRAMERATE = 60
 BACKGROUND_COLOR = COLOR_BLACK
 
-# Initialize Pygame
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Branchless Programming")
-clock = pygame.time.Clock()
-
-# Initialize scenes
-scenes = [SceneCode(),SceneInstructions()]
-scene_i = 0
-tick = 0
-
-running = True
-
-# Create video renderer for the first scene
-
-if RECORD_VIDEO:
-    output_file = f"videos/{scenes[scene_i].__class__.__name__}.mp4"
-    videoRenderer = VideoRenderer(FRAMERATE, WIDTH, HEIGHT, output_file)
-
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    if scene_i < len(scenes):
-        scenes[scene_i].update(tick)
-
-    # Clear the screen
-    screen.fill(BACKGROUND_COLOR)
-
-    if scene_i < len(scenes):
-        scenes[scene_i].draw(screen)
-
-    if scenes[scene_i].finish():
-
-        if RECORD_VIDEO:
-            videoRenderer.close()  # Ensure FFmpeg finishes the video before switching scenes
-            if scene_i < len(scenes): 
-                output_file = f"videos/{scenes[scene_i].__class__.__name__}.mp4"
-                videoRenderer = VideoRenderer(FRAMERATE, WIDTH, HEIGHT, output_file)
-
-        scene_i += 1  # Move to next scene
-
-        if scene_i >= len(scenes):
-            running = False  # No more scenes, exit loop
-
-    # Update display
-    pygame.display.flip()
+OFFLINE = RECORD_VIDEO and OFFLINE_RENDER
+SEEKING = not RECORD_VIDEO
+
+# Render surface and encoder, from the draft settings
+RENDER_SCALE = DRAFT_SCALE if DRAFT_MODE else 1
+FRAME_STRIDE = DRAFT_FRAME_STRIDE if DRAFT_MODE else 1
+RENDER_WIDTH = int(WIDTH * RENDER_SCALE) // 2 * 2  # yuv420p needs even sizes
+RENDER_HEIGHT = int(HEIGHT * RENDER_SCALE) // 2 * 2
+CRF = DRAFT_CRF if DRAFT_MODE else 23
+
+# Scenes, in playback order
+SCENES = [SceneCode, SceneInstructions]
+
+def get_seek_tick(event, tick, scene_start_tick):
+    """Return the tick a preview keyboard or mouse event asks to go to, or None."""
+    if event.type == pygame.KEYDOWN:
+        seconds = {pygame.K_LEFT: -1, pygame.K_RIGHT: 1, pygame.K_DOWN: -10, pygame.K_UP: 10}.get(event.key)
+        if seconds is not None:
+            return tick + seconds * FRAMERATE
+        if event.key == pygame.K_HOME:
+            return scene_start_tick
+    elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+        return scene_start_tick + int(event.pos[0] / RENDER_WIDTH * MAX_SCENE_SECONDS * FRAMERATE)
+    return None
+
+def run_scenes():
+    """Play the scenes one after another in this process (preview window or single-process recording)."""
+    # Initialize Pygame
+    if OFFLINE:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"  # No display needed on build machines
+
+    pygame.init()
+    set_render_scale(RENDER_SCALE)  # Before the scenes load their fonts
+
+    if OFFLINE:
+        screen = pygame.Surface((RENDER_WIDTH, RENDER_HEIGHT))  # Off-screen render target
+    else:
+        screen = pygame.display.set_mode((RENDER_WIDTH, RENDER_HEIGHT))
+        pygame.display.set_caption("Branchless Programming")
+    clock = pygame.time.Clock()
+    settings = get_settings()
+
+    # Initialize scenes
+    scenes = [scene_class() for scene_class in SCENES]
+    if PROFILE:
+        PROFILER.enable()
+    scene_i = 0
+    tick = 0
+    scene_start_tick = 0
+    timeline = SceneTimeline(scenes[scene_i], scene_start_tick, SNAPSHOT_INTERVAL)
+
+    running = True
+    paused = False
+
+    # Create video renderer for the first scene
 
     if RECORD_VIDEO:
-        # Fix: Ensure frame format is correct before sending to FFmpeg (height, width, 3)
-        videoRenderer.send_frame(np.moveaxis(pygame.surfarray.pixels3d(screen), 0, 1).tobytes())
-
-    tick += 1
-    clock.tick(FRAMERATE) 
-
-if RECORD_VIDEO:
-    videoRenderer.close()  # Ensure last video is properly saved
-
-pygame.quit()
-sys.exit()
+        os.makedirs("videos", exist_ok=True)
+        output_file = f"videos/{scenes[scene_i].__class__.__name__}{get_render_extension(settings)}"
+        videoRenderer = create_video_renderer(output_file, screen, settings)
+
+    while running:
+        seek_tick = None
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif SEEKING and event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                paused = not paused
+            elif SEEKING:
+                seek_tick = get_seek_tick(event, tick, scene_start_tick) if seek_tick is None else seek_tick
+
+        if seek_tick is not None:
+            with PROFILER.span("seek", "timeline"):
+                tick = timeline.seek(seek_tick)  # Nearest snapshot, then update without drawing
+        elif paused:
+            clock.tick(FRAMERATE)
+            continue
+        elif scene_i < len(scenes):
+            timeline.update(tick)
+
+        # Every tick is updated, only every FRAME_STRIDE-th one is drawn
+        if (tick - scene_start_tick) % FRAME_STRIDE == 0 or seek_tick is not None:
+            if DIRTY_RECT_RENDERING:
+                # Repaint what changed; the first frame of a scene (or after seeking) repaints everything
+                dirty_rects = scenes[scene_i].redraw(screen, BACKGROUND_COLOR, full=tick == scene_start_tick or seek_tick is not None)
+            else:
+                # Static layer (or the cleared screen) and every dynamic object
+                scenes[scene_i].compose(screen, BACKGROUND_COLOR)
+                dirty_rects = [screen.get_rect()]
+
+            # Update display
+            if not OFFLINE:
+                pygame.display.update(dirty_rects)
+
+            if RECORD_VIDEO:
+                # Native pixel layout, FFmpeg converts it. Unchanged frames only repeat the previous one
+                videoRenderer.send_surface(screen, changed=len(dirty_rects) > 0 if DIRTY_RECT_RENDERING else None)
+
+        scene_timed_out = OFFLINE and tick + 1 - scene_start_tick >= MAX_SCENE_SECONDS * FRAMERATE
+
+        if scenes[scene_i].finish() or scene_timed_out:
+
+            scene_i += 1  # Move to next scene
+            scene_start_tick = tick + 1
+
+            if RECORD_VIDEO:
+                videoRenderer.close()  # Ensure FFmpeg finishes the video before switching scenes
+                if scene_i < len(scenes):
+                    output_file = f"videos/{scenes[scene_i].__class__.__name__}{get_render_extension(settings)}"
+                    videoRenderer = create_video_renderer(output_file, screen, settings)
+
+            if scene_i >= len(scenes):
+                running = False  # No more scenes, exit loop
+            else:
+                timeline = SceneTimeline(scenes[scene_i], scene_start_tick, SNAPSHOT_INTERVAL)
+
+        PROFILER.end_frame()
+        tick += 1
+
+        if not OFFLINE:
+            clock.tick(FRAMERATE)  # Offline renders go as fast as update/draw/encode allow
+
+    if RECORD_VIDEO and scene_i < len(scenes):
+        videoRenderer.close()  # Ensure last video is properly saved
+
+    pygame.quit()
+
+    if RECORD_VIDEO and SPOOL_FRAMES:
+        # Encoded once every scene is rendered, so the render went at full speed
+        for scene in scenes[:scene_i + 1]:
+            output_file = f"videos/{scene.__class__.__name__}"
+            if os.path.exists(output_file + ".spool"):
+                concat_outputs([output_file + ".spool"], output_file + get_output_extension(settings), settings)
+
+    if PROFILE:
+        os.makedirs(os.path.dirname(PROFILE_OUTPUT), exist_ok=True)
+        PROFILER.save(PROFILE_OUTPUT)
+
+def get_settings():
+    """Return the render settings passed to the renderers (see sceneRenderer.render_scene)."""
+    return {
+        "width": RENDER_WIDTH,
+        "height": RENDER_HEIGHT,
+        "framerate": FRAMERATE,
+        "background_color": BACKGROUND_COLOR,
+        "max_seconds": MAX_SCENE_SECONDS,
+        "dirty_rects": DIRTY_RECT_RENDERING,
+        "scale": RENDER_SCALE,
+        "frame_stride": FRAME_STRIDE,
+        "codec": OUTPUT_CODEC,
+        "preset": "ultrafast",
+        "spool": SPOOL_FRAMES,
+        "encode_spools": ENCODE_SPOOLS,
+        "crf": CRF,
+        "profile": PROFILE,
+    }
+
+def render_parallel():
+    """Render every scene offline in its own process and join them into OUTPUT_FILE."""
+    settings = get_settings()
+
+    cache_dir = CACHE_DIR if RENDER_CACHE else None
+
+    if CHUNKED_RENDER:
+        use_cache = RENDER_CACHE and not SPOOL_FRAMES
+        os.makedirs(CACHE_DIR if use_cache else "videos/segments", exist_ok=True)
+        segment_files = []
+        for index, scene_class in enumerate(SCENES):
+            if use_cache:
+                segment_file, hit = renderCache.lookup(scene_class, settings, CACHE_DIR)
+                if not hit:
+                    render_scene_chunked(scene_class, renderCache.get_partial_path(segment_file), settings)
+                    renderCache.store(renderCache.get_partial_path(segment_file), segment_file)
+            else:
+                segment_file = f"videos/segments/{index:02d}_{scene_class.__name__}{get_render_extension(settings)}"
+                render_scene_chunked(scene_class, segment_file, settings)
+            segment_files.append(segment_file)
+        concat_outputs(segment_files, OUTPUT_FILE + get_output_extension(settings), settings, keep_inputs=use_cache)
+    else:
+        render_scenes_parallel(SCENES, OUTPUT_FILE + get_output_extension(settings), settings, cache_dir=cache_dir)
+
+if __name__ == "__main__":  # Worker processes import this module too
+    if OFFLINE and PARALLEL_RENDER:
+        render_parallel()
+    else:
+        run_scenes()
+    sys.exit()
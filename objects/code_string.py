@@ -1,7 +1,80 @@
 import pygame
 from objects.object import Object
 import re
+import os
+from collections import OrderedDict
 from utils.colors import *
+from utils.surface_cache import render_text, render_tokens, solid_surface
+from utils.font_metrics import get_font_metrics
+from utils.rects import bounding_rect
+from utils.viewport import scaled, scaled_size, unscaled, get_render_scale
+
+class ListingLayer:
+    """The line numbers and text of the visible lines of a CodeString, drawn on a transparent surface."""
+
+    WIDTH_STEP = 128  # The surface is wider than the longest line by up to this, so typing rarely outgrows it
+
+    def __init__(self, key, originX, originY, textX, row_positions, row_y):
+        """
+        Args:
+            key (tuple): What the rows are laid out for (position, line pitch, number of lines, screen, font, lexer, scale).
+            originX (int): Screen x of the line numbers.
+            originY (int): Screen y of the first line.
+            textX (int): x of the text, relative to originX.
+            row_positions (list[float]): Layout y of each visible line (line 1 first).
+            row_y (list[int]): y of each visible line in the surface.
+        """
+        self.key = key
+        self.origin = (originX, originY)
+        self.textX = textX
+        self.row_positions = row_positions
+        self.row_y = row_y
+        self.surface = None  # None while the rows overlap: the lines are then drawn one by one
+        self.lines = [None] * len(row_y)  # Text drawn in each row
+        self.row_widths = [0] * len(row_y)  # Width of what is drawn in each row
+        self.blit_sequence = None  # screen.blits arguments drawing the rows, None when a row changed
+        self.highlighted_line = None  # Line drawn with the highlighted line number
+
+class CodeGutter(Object):
+    """
+    The line numbers of a CodeString, drawn apart from its text (see CodeString.create_gutter).
+    They only change with the number of lines and the highlighted line, so a scene can keep them
+    in its static layer (set_static).
+    """
+
+    def __init__(self, code):
+        """
+        Args:
+            code (CodeString): The code whose lines are numbered. The gutter is placed left of it.
+        """
+        super().__init__(-code.LINE_NUMBER_WIDTH, 0, code.LINE_NUMBER_WIDTH, 0)
+        self.set_parent(code)
+        self.code = code
+
+    def update(self, tick):
+        """The gutter follows the code: nothing to update."""
+        pass
+
+    def draw(self, screen):
+        """Draw the number of every line that starts on the screen, the highlighted one in white."""
+        code = self.code
+        posX, y_offset = self.get_world_pos()
+        for index in range(1, len(code.lines)):
+            if int(scaled(y_offset)) >= screen.get_height():
+                break
+            line_number_text = render_text(code.font, str(index), (code.LINE_NUMBER_COLOR if code.highlighted_line != index else COLOR_WHITE))
+            screen.blit(line_number_text, (scaled(posX), scaled(y_offset)))
+            y_offset += code.line_height + code.MARGIN_BETWEEN_LINES
+
+    def get_bounds(self):
+        """Return the area of the line numbers."""
+        code = self.code
+        posX, posY = self.get_world_pos()
+        return bounding_rect(posX, posY, self.sizeX, (len(code.lines) - 1) * (code.line_height + code.MARGIN_BETWEEN_LINES))
+
+    def get_draw_signature(self):
+        code = self.code
+        return super().get_draw_signature() + (len(code.lines), code.highlighted_line, code.line_height, code.font)
 
 class CodeString(Object):
     """Represents a piece of code visually in Pygame."""
@@ -9,6 +82,10 @@ class CodeString(Object):
     HIGHLIGHT_COLOR = (0, 100, 255, 100)
     LINE_NUMBER_COLOR = (150, 150, 150)
     MARGIN_BETWEEN_LINES = 5
+    TRACK_SIZE = Object.TRACK_SIZE + 2
+    SNAPSHOT_EXCLUDE = Object.SNAPSHOT_EXCLUDE + ("drawn_line_rects", "font", "metrics", "token_cache", "last_line_tokens", "listing_layer")
+    TOKEN_CACHE_SIZE = 4096  # Number of distinct lines whose tokens are kept
+    LOOKAHEAD_OPENERS = ('"', "'", "<", "/")  # Unmatched openers of strings, includes and comments
 
     def __init__(self, posX, posY, width, font_path="fonts/consola.ttf", font_size=20, code_text="", custom_types=[], variables=[], functions=[]):
         """
@@ -23,10 +100,11 @@ class CodeString(Object):
             code_text (str): Multiline string containing the code to render.
         """
         super().__init__(posX, posY, width, 100)
-        self.font = pygame.font.Font(font_path, font_size)
+        self.font = pygame.font.Font(font_path, scaled_size(font_size))  # Text is rendered at the render scale
+        self.metrics = get_font_metrics(self.font, font_path, scaled_size(font_size))  # Text widths without asking the font every frame
         self.line_height = font_size + 4  # Add spacing between lines
         self.highlighted_line = None
-        self.LINE_NUMBER_WIDTH = self.font.size("000")[0] + 10  # Adjust based on digits
+        self.LINE_NUMBER_WIDTH = unscaled(self.metrics.text_width("000")) + 10  # Adjust based on digits
 
         # Syntax colors
         self.syntax_colors = {
@@ -62,87 +140,332 @@ class CodeString(Object):
             "default_types": r"\b(int|float|double|char|void|bool|short|long|unsigned|signed|size_t|auto)\b",
         }
 
+        self.lines = []  # Text buffer: one string per line
+        self.line_versions = []  # Version of each line, changed every time the line is edited
+        self.next_version = 0
+        self.joined_text = None  # code_text, joined only when asked for
+
         self.code_text = code_text
         self.custom_types = custom_types
         self.variables = variables
         self.functions = functions
-        self.language_patterns["custom_types"] = r"\b(" + "|".join(map(re.escape, self.custom_types)) + r")\b" if self.custom_types else r"^\b$"
-        self.language_patterns["functions"] = r"\b(" + "|".join(map(re.escape, self.functions)) + r")\b" if self.functions else r"^\b$"
-        self.language_patterns["variable_names"] = r"\b(" + "|".join(map(re.escape, self.variables)) + r")\b" if self.variables else r"^\b$"
-        
+
+        self.drawn_line_rects = []  # Screen area of each line at the last collect_dirty_rects call
+        self.listing_layer = None  # ListingLayer: the rows drawn once, only the edited ones are drawn again
+        self.gutter = None  # CodeGutter drawing the line numbers instead of the code (create_gutter)
+
+        self.token_cache = OrderedDict()  # line text -> tokens
+        self.last_line_tokens = {}  # line index -> (line text, tokens) drawn last time
+        self.update_name_patterns()
+
+    @property
+    def code_text(self):
+        """The code as a single string, joined from the line buffer when it has changed."""
+        if self.joined_text is None:
+            self.joined_text = "\n".join(self.lines)
+        return self.joined_text
+
+    @code_text.setter
+    def code_text(self, code_text):
+        self.lines = code_text.split("\n")
+        self.line_versions = list(range(self.next_version, self.next_version + len(self.lines)))
+        self.next_version += len(self.lines)
+        self.joined_text = code_text
+
+    def set_line(self, line_index, text):
+        """Replace the text of one line (O(line length))."""
+        self.lines[line_index] = text
+        self.line_versions[line_index] = self.next_version
+        self.next_version += 1
+        self.joined_text = None
+
+    def insert_line(self, line_index, text=""):
+        """Insert a new line before line_index."""
+        self.lines.insert(line_index, text)
+        self.line_versions.insert(line_index, self.next_version)
+        self.next_version += 1
+        self.joined_text = None
+
     def update(self, tick):
         """Update logic for the code (e.g., animations if needed)."""
         pass
 
+    def create_gutter(self):
+        """
+        Return a CodeGutter drawing the line numbers from now on: the code only draws the highlight and
+        the text. The scene must draw the gutter (before the code) through its children.
+        """
+        self.gutter = CodeGutter(self)
+        return self.gutter
+
+    def get_track_state(self, strings):
+        """Return the draw state: position, size, code text (index in strings) and highlighted line (-1 for None)."""
+        text_index = strings.setdefault(self.code_text, len(strings))
+        highlighted_line = self.highlighted_line if self.highlighted_line is not None else -1
+        return super().get_track_state(strings) + [text_index, highlighted_line]
+
+    def set_track_state(self, values, strings):
+        """Restore the draw state saved by get_track_state."""
+        super().set_track_state(values, strings)
+        code_text = strings[int(values[4])]
+        if code_text != self.code_text:
+            self.code_text = code_text  # Keep line versions when the text did not change
+        self.highlighted_line = int(values[5]) if values[5] >= 0 else None
+
+    def restore_snapshot(self, snapshot, memo):
+        """Restore the fields saved by get_snapshot, dropping the cached tokens if the lexer changed."""
+        language_patterns = dict(self.language_patterns)
+        super().restore_snapshot(snapshot, memo)
+        if self.language_patterns != language_patterns:
+            self.token_cache.clear()
+            self.last_line_tokens.clear()
+
+    def get_line_rect(self, line_index, line):
+        """Return the screen area of a line: its number, highlight and text."""
+        row_height = max(self.line_height, unscaled(self.metrics.height))
+        posX, posY = self.get_world_pos()
+        lineY = posY + (line_index - 1) * (self.line_height + self.MARGIN_BETWEEN_LINES)
+        width = self.LINE_NUMBER_WIDTH + max(self.sizeX, unscaled(self.metrics.text_width(line)))
+        return bounding_rect(posX - self.LINE_NUMBER_WIDTH, lineY, width, row_height)
+
+    def collect_dirty_rects(self, rects):
+        """Add to rects the areas of the lines whose text or highlight changed (all of them if the code moved)."""
+        layout = self.get_world_pos() + (self.sizeX,)
+        if self.drawn_signature is None or self.drawn_signature[0] != layout:
+            rects.extend(rect for rect in self.drawn_line_rects if rect is not None)
+            self.drawn_line_rects = []
+            drawn_versions, drawn_highlight = [], None
+        else:
+            _, drawn_versions, drawn_highlight = self.drawn_signature
+
+        line_rects = self.drawn_line_rects
+        num_lines = len(self.lines)
+        for index in range(1, max(num_lines, len(drawn_versions))):  # Line 0 is never drawn
+            if (index < num_lines and index < len(drawn_versions)
+                    and self.line_versions[index] == drawn_versions[index]
+                    and (index == self.highlighted_line) == (index == drawn_highlight)):
+                continue
+
+            if index < len(line_rects) and line_rects[index] is not None:
+                rects.append(line_rects[index])
+            if index < num_lines:
+                rect = self.get_line_rect(index, self.lines[index])
+                rects.append(rect)
+                if index >= len(line_rects):
+                    line_rects.extend([None] * (index + 1 - len(line_rects)))
+                line_rects[index] = rect
+
+        del line_rects[max(num_lines, 1):]
+        self.drawn_signature = (layout, list(self.line_versions), self.highlighted_line)
+
     def draw_highlighted_line(self, screen, line, lineX, lineY):
-        line_width = len(line) * self.font.size(line[0])[0]
-        highlight_surface = pygame.Surface((line_width, self.line_height))
-        highlight_surface.set_alpha(self.HIGHLIGHT_COLOR[3])  # Set transparency
-        highlight_surface.fill(self.HIGHLIGHT_COLOR[:3])  # Fill with RGB color
-        screen.blit(highlight_surface, (lineX, lineY))
+        """Draw the translucent highlight over the columns of a line (the surface is shared by every frame)."""
+        metrics = self.metrics
+        line_width = metrics.column_x(len(line)) if metrics.monospace else metrics.text_width(line)
+        highlight_surface = solid_surface(line_width, int(scaled(self.line_height)), self.HIGHLIGHT_COLOR)
+        screen.blit(highlight_surface, (scaled(lineX), scaled(lineY)))
 
     def draw(self, screen):
-        """Draw the code block on the screen with syntax highlighting and line selection."""
-        lines = self.code_text.split("\n")
-        y_offset = self.posY
-        
-        for index, line in enumerate(lines):
+        """
+        Draw the code block on the screen with syntax highlighting and line selection: the highlight,
+        then the rows of the listing layer in one blits call. Only the rows whose text or highlight
+        changed since the previous frame are drawn into the layer again.
+        """
+        layer = self.update_listing_layer(screen)
+        if layer.surface is None:
+            self.draw_lines(screen)
+            return
+
+        if self.highlighted_line is not None and 1 <= self.highlighted_line <= len(layer.row_positions):
+            posX, _ = self.get_world_pos()
+            line = self.lines[self.highlighted_line]
+            self.draw_highlighted_line(screen=screen, line=line, lineX=posX, lineY=layer.row_positions[self.highlighted_line - 1])
+        if layer.blit_sequence is None:
+            # Only what each row holds: blitting the empty space around the lines would cost as much as the text
+            originX, originY = layer.origin
+            height = self.metrics.height
+            layer.blit_sequence = [(layer.surface, (originX, originY + y), (0, y, width, height)) for y, width in zip(layer.row_y, layer.row_widths)]
+        screen.blits(layer.blit_sequence, doreturn=False)
+
+    def draw_lines(self, screen):
+        """Draw the line numbers, the highlight and the text of every line directly on the screen."""
+        posX, y_offset = self.get_world_pos()
+
+        for index, line in enumerate(self.lines):
 
             if index == None or index == 0: 
                 continue
 
             # Draw line number
-            line_number_text = self.font.render(str(index), True, (self.LINE_NUMBER_COLOR if self.highlighted_line != index else COLOR_WHITE) )
-            screen.blit(line_number_text, (self.posX - self.LINE_NUMBER_WIDTH, y_offset))
-
-            x_offset = self.posX
+            if self.gutter is None:
+                line_number_text = render_text(self.font, str(index), (self.LINE_NUMBER_COLOR if self.highlighted_line != index else COLOR_WHITE))
+                screen.blit(line_number_text, (scaled(posX - self.LINE_NUMBER_WIDTH), scaled(y_offset)))
 
             if self.highlighted_line == index:
-                self.draw_highlighted_line(screen=screen, line=line, lineX=self.posX, lineY=y_offset)
-
-            tokens = self.tokenize_line(line)
-            for token, color in tokens:
-                rendered_text = self.font.render(token, True, color)
-                screen.blit(rendered_text, (x_offset, y_offset))
-                x_offset += rendered_text.get_width()
-            
+                self.draw_highlighted_line(screen=screen, line=line, lineX=posX, lineY=y_offset)
+
+            # Unchanged lines come back from the cache: only the line being typed is rendered again
+            rendered_line = render_tokens(self.font, self.get_line_tokens(index, line))
+            screen.blit(rendered_line, (scaled(posX), scaled(y_offset)))
+
             y_offset += self.line_height + self.MARGIN_BETWEEN_LINES      
-    
-    def tokenize_line(self, line):
 
-        """Tokenize a single line of code into (token, color) pairs."""
-        tokens = []
-        pos = 0
+    def update_listing_layer(self, screen):
+        """
+        Return the listing layer, laid out again if the code moved or the number of lines, the screen,
+        the font or the lexer changed, with the rows whose text or highlight changed drawn again.
+        """
+        posX, posY = self.get_world_pos()
+        pitch = self.line_height + self.MARGIN_BETWEEN_LINES
+        key = (posX, posY, pitch, len(self.lines), screen.get_height(), self.font, self.lexer, get_render_scale(), self.gutter is None)
+        layer = self.listing_layer
+        if layer is None or layer.key != key:
+            layer = self.listing_layer = self.create_listing_layer(key, screen.get_height())
+        if layer.surface is None:
+            return layer
+
+        visible_lines = self.lines[1:1 + len(layer.row_y)]
+        if visible_lines == layer.lines and layer.highlighted_line == self.highlighted_line:
+            return layer  # Nothing to draw again (the usual case)
+
+        rows = {row for row, line in enumerate(visible_lines) if line != layer.lines[row]}
+        if layer.highlighted_line != self.highlighted_line:
+            rows.update(index - 1 for index in (layer.highlighted_line, self.highlighted_line) if index is not None and 1 <= index <= len(layer.row_y))
+            layer.highlighted_line = self.highlighted_line
+        for row in sorted(rows):
+            if not self.draw_listing_row(layer, row):
+                layer = self.listing_layer = self.create_listing_layer(key, screen.get_height())  # The line outgrew the layer
+                break
+        return layer
+
+    def create_listing_layer(self, key, screen_height):
+        """
+        Lay out the lines that start on the screen and draw all of them into a new listing layer.
+        The layer gives the same pixels as drawing the lines one by one as long as no two rows and no
+        line number and its text overlap; otherwise its surface is left None.
+        """
+        posX, posY = self.get_world_pos()
+        originX, originY = int(scaled(posX - self.LINE_NUMBER_WIDTH)), int(scaled(posY))
+        textX = int(scaled(posX)) - originX
+
+        row_positions = []
+        y = posY
+        for index in range(1, len(self.lines)):
+            if int(scaled(y)) >= screen_height:
+                break
+            row_positions.append(y)
+            y += self.line_height + self.MARGIN_BETWEEN_LINES  # Summed like draw_lines, so rows land on the same pixels
+        row_y = [int(scaled(y)) - originY for y in row_positions]
+
+        layer = ListingLayer(key, originX, originY, textX, row_positions, row_y)
+        layer.highlighted_line = self.highlighted_line
+        rows_overlap = any(below - above < self.metrics.height for above, below in zip(row_y, row_y[1:]))
+        numbers_overlap = self.gutter is None and any(self.metrics.text_width(str(index)) > textX for index in range(1, len(row_y) + 1))
+        if rows_overlap or numbers_overlap:
+            return layer
+
+        text_width = max([render_tokens(self.font, self.get_line_tokens(row + 1, self.lines[row + 1])).get_width() for row in range(len(row_y))], default=0)
+        width = textX + (text_width // ListingLayer.WIDTH_STEP + 1) * ListingLayer.WIDTH_STEP
+        height = row_y[-1] + self.metrics.height if row_y else 1
+        layer.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        for row in range(len(row_y)):
+            self.draw_listing_row(layer, row)
+        return layer
+
+    def draw_listing_row(self, layer, row):
+        """
+        Draw the line number (unless the gutter draws it) and the text of a row into the listing layer, replacing what it held.
 
-        while pos < len(line):
-            match = None
-            color = self.syntax_colors["default"]
+        Returns:
+            bool: False if the text does not fit in the layer (nothing is drawn).
+        """
+        index = row + 1
+        line = self.lines[index]
+        rendered_line = render_tokens(self.font, self.get_line_tokens(index, line))
+        surface = layer.surface
+        if layer.textX + rendered_line.get_width() > surface.get_width():
+            return False
 
-            # Preserve whitespace (spaces and tabs)
-            if line[pos].isspace():
-                space_match = re.match(r"\s+", line[pos:])
-                if space_match:
-                    tokens.append((space_match.group(0), self.syntax_colors["default"]))
-                    pos += len(space_match.group(0))
-                continue
+        y = layer.row_y[row]
+        surface.fill((0, 0, 0, 0), (0, y, surface.get_width(), self.metrics.height))
+        # The row is transparent and its parts do not overlap: MAX copies their pixels (alpha included)
+        number_width = 0
+        if self.gutter is None:
+            line_number_text = render_text(self.font, str(index), (self.LINE_NUMBER_COLOR if self.highlighted_line != index else COLOR_WHITE))
+            surface.blit(line_number_text, (0, y), special_flags=pygame.BLEND_RGBA_MAX)
+            number_width = line_number_text.get_width()
+        surface.blit(rendered_line, (layer.textX, y), special_flags=pygame.BLEND_RGBA_MAX)
+        layer.lines[row] = line
+        layer.row_widths[row] = max(number_width, layer.textX + rendered_line.get_width())
+        layer.blit_sequence = None
+        return True
+    
+    def get_line_tokens(self, line_index, line):
+        """
+        Return the (token, color) pairs of a line as a tuple, lexing only what changed.
+        Lines already seen are not lexed again. When the line at line_index was edited
+        at its end (typing or erasing), only its tail is lexed again.
+
+        Args:
+            line_index (int): Index of the line in the code.
+            line (str): Current text of the line.
+        """
+        tokens = self.token_cache.get(line)
+        if tokens is not None:
+            self.token_cache.move_to_end(line)
+        else:
+            previous = self.last_line_tokens.get(line_index)
+            if previous is not None:
+                tokens = self.retokenize_tail(previous[0], previous[1], line)
+            else:
+                tokens = tuple(self.tokenize_line(line))
 
-            # Try matching all patterns
-            for category, pattern in self.language_patterns.items():
-                match = re.match(pattern, line[pos:])
-                if match:
-                    color = self.syntax_colors.get(category, self.syntax_colors["default"])
-                    tokens.append((match.group(0), color))
-                    pos += len(match.group(0))
-                    break  # Stop at first match
-                
-                    
-            if not match:
-                # Fallback for unmatched characters (e.g., operators, punctuation)
-                tokens.append((line[pos], self.syntax_colors["default"]))
-                pos += 1
+            self.token_cache[line] = tokens
+            if len(self.token_cache) > self.TOKEN_CACHE_SIZE:
+                self.token_cache.popitem(last=False)
 
+        self.last_line_tokens[line_index] = (line, tokens)
         return tokens
 
+    def retokenize_tail(self, old_line, old_tokens, line):
+        """
+        Tokenize line reusing the tokens of old_line before the point where the two lines differ.
+
+        Lexing restarts at the beginning of the word the edit touches (tokens such as
+        keywords, numbers or names can grow or shrink), or earlier if the kept part has
+        an unmatched quote, '<' or '/' that could now start a string, include or comment.
+
+        Returns:
+            tuple: The (token, color) pairs of line, equal to tokenize_line(line).
+        """
+        common = len(os.path.commonprefix([old_line, line]))
+
+        restart = common
+        while restart > 0 and line[restart - 1].isspace():
+            restart -= 1
+        while restart > 0 and not line[restart - 1].isspace():
+            restart -= 1
+
+        kept_tokens = []
+        pos = 0
+        default_color = self.syntax_colors["default"]
+        for token, color in old_tokens:
+            if pos + len(token) > restart:
+                break  # Token reaches the part being lexed again
+            if token in self.LOOKAHEAD_OPENERS and color == default_color:
+                break  # Unmatched opener: it may match once the tail changes
+            kept_tokens.append((token, color))
+            pos += len(token)
+
+        return tuple(kept_tokens) + tuple(self.tokenize_line(line[pos:]))
+
+    def tokenize_line(self, line):
+
+        """Tokenize a single line of code into (token, color) pairs."""
+        colors = self.lexer_colors
+        # Every position matches (fallback group), so the matches cover the whole line
+        return [(match.group(), colors[match.lastgroup]) for match in self.lexer.finditer(line)]
+
     def change_code(self, new_code_text, custom_types=None, variables=None, functions=None):
         """Update the displayed code dynamically."""
         self.code_text = new_code_text
@@ -151,9 +474,46 @@ class CodeString(Object):
         self.variables = variables if variables is not None else self.variables
         self.functions = functions if functions is not None else self.functions
 
-        self.language_patterns["custom_types"] = r"\b(" + "|".join(map(re.escape, self.custom_types)) + r")\b" if self.custom_types else r"^\b$"
-        self.language_patterns["functions"] = r"\b(" + "|".join(map(re.escape, self.functions)) + r")\b" if self.functions else r"^\b$"
-        self.language_patterns["variable_names"] = r"\b(" + "|".join(map(re.escape, self.variables)) + r")\b" if self.variables else r"^\b$"
+        self.update_name_patterns()
+
+    def update_name_patterns(self):
+        """Build the patterns of the custom types, functions and variables, dropping cached tokens if they changed."""
+        name_patterns = {
+            "custom_types": r"\b(" + "|".join(map(re.escape, self.custom_types)) + r")\b" if self.custom_types else r"^\b$",
+            "functions": r"\b(" + "|".join(map(re.escape, self.functions)) + r")\b" if self.functions else r"^\b$",
+            "variable_names": r"\b(" + "|".join(map(re.escape, self.variables)) + r")\b" if self.variables else r"^\b$",
+        }
+
+        if any(self.language_patterns.get(category) != pattern for category, pattern in name_patterns.items()):
+            self.language_patterns.update(name_patterns)
+            self.lexer = self.build_lexer()
+            self.token_cache.clear()
+            self.last_line_tokens.clear()
+
+    def build_lexer(self):
+        """
+        Compile language_patterns into a single regex: one named group per category, in priority order,
+        after a whitespace group and before a single character fallback.
+
+        Patterns are written to be matched at the start of the rest of the line, so a leading \\b
+        (true when the next character is a word character) becomes (?=\\w), and the never
+        matching ^\\b$ becomes (?!). Matching from a position of the whole line then gives
+        the same tokens as matching each category against line[pos:].
+        """
+        alternatives = [r"(?P<whitespace>\s+)"]
+        for category, pattern in self.language_patterns.items():
+            if pattern == r"^\b$":
+                pattern = r"(?!)"
+            elif pattern.startswith(r"\b"):
+                pattern = r"(?=\w)" + pattern[2:]
+            alternatives.append(f"(?P<{category}>{pattern})")
+        alternatives.append(r"(?P<fallback>(?s:.))")  # Operators, punctuation and anything else
+
+        self.lexer_colors = {category: self.syntax_colors.get(category, self.syntax_colors["default"]) for category in self.language_patterns}
+        self.lexer_colors["whitespace"] = self.syntax_colors["default"]
+        self.lexer_colors["fallback"] = self.syntax_colors["default"]
+
+        return re.compile("|".join(alternatives))
 
     def highlight_line(self, line_index):
         """Set the selected line index for highlighting. None index to not highlight anything"""
@@ -177,7 +537,7 @@ class CodeString(Object):
             self._characters_written = 0
             self._characters_erased = 0
 
-        lines = self.code_text.split("\n")  # Split code into lines
+        lines = self.lines
 
         # Prevent index errors
         if line_index >= len(lines) or line_index < 0:
@@ -187,9 +547,8 @@ class CodeString(Object):
         # Step 1: Erase characters one at a time
         if self._characters_erased < num_characters_to_erase:
             if len(lines[line_index]) > 0:  # Only erase if there are characters to remove
-                lines[line_index] = lines[line_index][:-1]
+                self.set_line(line_index, lines[line_index][:-1])
                 self._characters_erased += 1
-                self.code_text = "\n".join(lines)
             else:
                 self._characters_erased = num_characters_to_erase #no more characters to remove
 
@@ -197,9 +556,8 @@ class CodeString(Object):
 
         # Step 2: Type characters one at a time
         if self._characters_written < len(text):
-            lines[line_index] += text[self._characters_written]  # Append character
+            self.set_line(line_index, lines[line_index] + text[self._characters_written])  # Append character
             self._characters_written += 1
-            self.code_text = "\n".join(lines)
             return False  # Still typing, return early
 
         # Step 3: Reset counters when everything is done
@@ -224,7 +582,7 @@ class CodeString(Object):
         if not hasattr(self, "_characters_written"):
             self._characters_erased = 0
 
-        lines = self.code_text.split("\n")  # Split code into lines
+        lines = self.lines
 
         # Prevent index errors
         if line_index >= len(lines) or line_index < 0:
@@ -234,9 +592,8 @@ class CodeString(Object):
         # Step 1: Erase characters one at a time
         if self._characters_erased < num_characters_to_erase:
             if len(lines[line_index]) > 0:  # Only erase if there are characters to remove
-                lines[line_index] = lines[line_index][:-1]
+                self.set_line(line_index, lines[line_index][:-1])
                 self._characters_erased += 1
-                self.code_text = "\n".join(lines)
             else:
                 self._characters_erased = num_characters_to_erase #no more characters to remove
 
@@ -250,7 +607,7 @@ class CodeString(Object):
     def get_line_lenght(self, line_index):
         '''Return len (num of characters) of a line'''
 
-        lines = self.code_text.split("\n")  # Split code into lines
+        lines = self.lines
 
         # Prevent index errors
         if line_index >= len(lines) or line_index < 0:
@@ -260,9 +617,9 @@ class CodeString(Object):
         return len(lines[line_index])
     
     def remove_line(self, line_index):
-        '''Return len (num of characters) of a line'''
+        '''Remove a line from the code'''
         
-        lines = self.code_text.split("\n")  # Split code into lines
+        lines = self.lines
 
         # Prevent index errors
         if line_index >= len(lines) or line_index < 0:
@@ -270,4 +627,5 @@ class CodeString(Object):
             return False
         
         lines.pop(line_index)
-        self.code_text = "\n".join(lines)
\ No newline at end of file
+        self.line_versions.pop(line_index)
+        self.joined_text = None
\ No newline at end of file
@@ -14,7 +14,10 @@ class Instruction(Object):
         EXECUTED = auto()
         ERROR = auto()
 
+    __slots__ = ("state", "step_executing", "instruction_steps")
+
     NUM_STEPS = 5  # Number of steps in the instruction
+    TRACK_SIZE = Object.TRACK_SIZE + 2
 
     def __init__(self, posX, posY, width, execution_speed = 10):
         """
@@ -31,10 +34,12 @@ class Instruction(Object):
         self.step_executing = 0
         self.instruction_steps = []
 
+        # The steps are children: moving the instruction moves them without writing their positions
         step_width = self.get_step_width()
         for i in range(self.NUM_STEPS):
-            step_posX = posX + i * step_width
-            self.instruction_steps.append(Instruction_step(step_posX, posY, step_width, execution_speed))
+            step = Instruction_step(i * step_width, 0, step_width, execution_speed)
+            step.set_parent(self)
+            self.instruction_steps.append(step)
 
     def reset(self):
         """
@@ -45,38 +50,48 @@ class Instruction(Object):
         for i in range(self.NUM_STEPS):
              self.instruction_steps[i].reset()
 
+    def get_children(self):
+        """Return the instruction steps."""
+        return self.instruction_steps
+
+    def get_bounds(self):
+        """The instruction draws nothing itself: its steps report their own areas."""
+        return None
+
+    def get_track_state(self, strings):
+        """Return the draw state: position, size, state and step executing."""
+        return super().get_track_state(strings) + [self.state.value, self.step_executing]
+
+    def set_track_state(self, values, strings):
+        """Restore the draw state saved by get_track_state."""
+        super().set_track_state(values, strings)
+        self.state = self.State(int(values[4]))
+        self.step_executing = int(values[5])
+
     def align_position_of_childs(self):
         """
-        Update the position of all the child objects
+        Put the steps back side by side, relative to the instruction. Moving the instruction moves the
+        steps with it; the moves below also put back the steps an executed animation has shifted.
         """
-        step_width = int(self.sizeX / self.NUM_STEPS)
+        step_width = self.get_step_width()
         for i in range(self.NUM_STEPS):
-            step_posX = self.posX + i * step_width
-            self.instruction_steps[i].set_pos(step_posX,self.posY)
+            self.instruction_steps[i].set_pos(i * step_width, 0)
 
     def move(self, deltaX, deltaY):
         """Move the object by deltaX and deltaY."""
         super().move(deltaX, deltaY)
-
         self.align_position_of_childs()
 
-
-    def go_to(self, deltaX, deltaY, finalX, finalY):
-
-        result = super().go_to(deltaX, deltaY, finalX, finalY)
-
+    def go_to(self, deltaX, deltaY, finalX, finalY, tick):
+        result = super().go_to(deltaX, deltaY, finalX, finalY, tick)
         self.align_position_of_childs()
-        
         return result
 
-    def go_to_smooth(self, finalX, finalY, speed=5):
-
-        result = super().go_to_smooth(finalX, finalY, speed)
+    def go_to_smooth(self, finalX, finalY, tick, speed=5):
+        result = super().go_to_smooth(finalX, finalY, tick, speed)
         self.align_position_of_childs()
-        
         return result
 
-    
     def update(self, tick):
         """Update logic for the instruction."""
 
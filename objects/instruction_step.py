@@ -1,10 +1,14 @@
 #instruction_step.py
 
 import pygame
+import numpy as np
 from objects.object import Object
 from utils.colors import *
 from enum import Enum, auto
 from utils.rounded_rect import draw_rounded_rect
+from utils.rects import bounding_rect
+from utils.viewport import scaled_rect, scaled_size
+from utils.tween import Keyframes, durations_at_speed, centering_offsets
 
 class Instruction_step(Object):
     """An Instruction_Step is an square with a color (green, red or gray)"""
@@ -15,9 +19,23 @@ class Instruction_step(Object):
         EXECUTED = auto()
         ERROR = auto()
 
+    __slots__ = ("state", "executed_percentage", "executed_animation", "executed_animation_tick", "executing_speed")
+
+    # Fill color of each state, shared by all the steps (executing steps are drawn half and half)
+    STATE_COLORS = {
+        State.NOT_EXECUTED: COLOR_GRAY,
+        State.EXECUTED: COLOR_LIME_GREEN,
+        State.ERROR: COLOR_RED
+    }
+
     BORDER_COLOR = COLOR_DARK_BLUE
     BORDER_WIDTH = 5
     BORDER_RADIUS = 3
+    TRACK_SIZE = Object.TRACK_SIZE + 2
+
+    # Executed animation: sizes it goes through (times the original size) and size change per tick
+    EXECUTED_ANIMATION_SIZES = (1.5, 1, 1.3, 1)
+    EXECUTED_ANIMATION_SPEED = 3
 
     def __init__(self, posX, posY, width, execution_speed = 10):
         """
@@ -30,29 +48,18 @@ class Instruction_step(Object):
         """
         super().__init__(posX, posY, width, width)
 
-        self.state_colors = {
-            self.State.NOT_EXECUTED: COLOR_GRAY,
-            self.State.EXECUTED: COLOR_LIME_GREEN,
-            self.State.ERROR: COLOR_RED
-        }
-
         self.state = self.State.NOT_EXECUTED
         self.executed_percentage = 0
-        self.state_executed_animation = 0 
-        self.EXECUTING_SPEED = execution_speed
+        self.executed_animation = None  # (size, position offset) keyframes of the executed animation until it ends
+        self.executed_animation_tick = None  # Last tick the executed animation was applied at
+        self.executing_speed = execution_speed
 
     def reset(self):
         """
         Reset object to default state
         """
         self.state = self.State.NOT_EXECUTED
-        self.executed_percentage = 0
-
-
-
-
-        self.state_executed_animation = 0 
-
+        self.executed_percentage = 0  # A running executed animation stops until the step is executed again
 
     def update(self, tick):
         """
@@ -65,14 +72,12 @@ class Instruction_step(Object):
         if self.state == self.State.EXECUTING:
             if self.executed_percentage >= 100:
                 self.state = self.State.EXECUTED
-                self.state_executed_animation = 0 
+                self.start_executed_animation(tick)
             else:
-                self.executed_percentage += self.EXECUTING_SPEED
-        elif self.state == self.State.EXECUTED:
-            if self.state_executed_animation == 0:
-                if self.executed_animation() == True:
-                    self.state_executed_animation = 1
-                
+                self.executed_percentage += self.executing_speed
+        elif self.state == self.State.EXECUTED and self.executed_animation is not None:
+            self.apply_executed_animation(tick)
+
 
     def draw(self, screen):
         """
@@ -81,30 +86,32 @@ class Instruction_step(Object):
         Args:
             screen (pygame.screen): The screen to draw the square on.
         """
+        posX, posY = self.get_world_pos()
+
         # Draw the black border
-        rounded_rect = (self.posX - self.BORDER_WIDTH, self.posY - self.BORDER_WIDTH, self.sizeX + 2*self.BORDER_WIDTH, self.sizeY + 2*self.BORDER_WIDTH)
+        rounded_rect = scaled_rect(posX - self.BORDER_WIDTH, posY - self.BORDER_WIDTH, self.sizeX + 2*self.BORDER_WIDTH, self.sizeY + 2*self.BORDER_WIDTH)
 
-        draw_rounded_rect(screen, rounded_rect, self.BORDER_COLOR, self.BORDER_RADIUS)
+        draw_rounded_rect(screen, rounded_rect, self.BORDER_COLOR, scaled_size(self.BORDER_RADIUS))
 
         if self.state == self.State.NOT_EXECUTED:
             pygame.draw.rect(
                 screen,
-                self.state_colors.get(self.State.NOT_EXECUTED, COLOR_GRAY),
-                (self.posX, self.posY, self.sizeX, self.sizeY)
+                self.STATE_COLORS[self.State.NOT_EXECUTED],
+                scaled_rect(posX, posY, self.sizeX, self.sizeY)
             )
         elif self.state == self.State.EXECUTED:
 
             pygame.draw.rect(
                 screen,
-                self.state_colors.get(self.State.EXECUTED, COLOR_GRAY),
-                (self.posX, self.posY, self.sizeX, self.sizeY)
+                self.STATE_COLORS[self.State.EXECUTED],
+                scaled_rect(posX, posY, self.sizeX, self.sizeY)
             )
 
         elif self.state == self.State.ERROR:
             pygame.draw.rect(
                 screen,
-                self.state_colors.get(self.State.ERROR, COLOR_GRAY),
-                (self.posX, self.posY, self.sizeX, self.sizeY)
+                self.STATE_COLORS[self.State.ERROR],
+                scaled_rect(posX, posY, self.sizeX, self.sizeY)
             )
         elif self.state == self.State.EXECUTING:
             # Draw the inside color, first the not executed and then the executed color
@@ -112,15 +119,33 @@ class Instruction_step(Object):
             executed_width = self.sizeX * self.executed_percentage/100
             pygame.draw.rect(
                 screen,
-                self.state_colors.get(self.State.NOT_EXECUTED, COLOR_GRAY),
-               (self.posX + executed_width, self.posY, not_executed_width, self.sizeY)
+                self.STATE_COLORS[self.State.NOT_EXECUTED],
+               scaled_rect(posX + executed_width, posY, not_executed_width, self.sizeY)
             )
             pygame.draw.rect(
                 screen,
-                self.state_colors.get(self.State.EXECUTED, COLOR_GRAY),
-                (self.posX, self.posY, executed_width, self.sizeY)
+                self.STATE_COLORS[self.State.EXECUTED],
+                scaled_rect(posX, posY, executed_width, self.sizeY)
             )
 
+    def get_bounds(self):
+        """Return the area of the square including its border."""
+        posX, posY = self.get_world_pos()
+        return bounding_rect(posX - self.BORDER_WIDTH, posY - self.BORDER_WIDTH, self.sizeX + 2*self.BORDER_WIDTH, self.sizeY + 2*self.BORDER_WIDTH)
+
+    def get_draw_signature(self):
+        return super().get_draw_signature() + (self.state, self.executed_percentage)
+
+    def get_track_state(self, strings):
+        """Return the draw state: position, size, state and executed percentage."""
+        return super().get_track_state(strings) + [self.state.value, self.executed_percentage]
+
+    def set_track_state(self, values, strings):
+        """Restore the draw state saved by get_track_state."""
+        super().set_track_state(values, strings)
+        self.state = self.State(int(values[4]))
+        self.executed_percentage = float(values[5])
+
     def start_execution(self):
         """Start executing the step."""
         if self.state == self.State.NOT_EXECUTED:
@@ -136,57 +161,37 @@ class Instruction_step(Object):
         """Return True if the step is executed."""
         return self.state == self.State.EXECUTED    
     
-    def executed_animation(self):
+    def start_executed_animation(self, tick):
         """
-        First increment the size to 1.5 times the original size, then decrement back to the original size.
-        Repeats a second time with a target size of 1.3 times the original size.
+        Start the executed animation at tick: first increment the size to 1.5 times the size, then decrement
+        back to it, then the same with 1.3 times the size. The size steps by EXECUTED_ANIMATION_SPEED per tick
+        and the position by half of it, to stay about centered (like Object.change_size with maintain_center).
+        The position moves by the change of its offset since the last tick applied, so the instruction can
+        put its steps back in place meanwhile. An animation stopped by a reset or an error resumes where it stopped instead.
 
-        Returns:
-            bool: True if the object has completed the animation, False otherwise.
+        Args:
+            tick (int): The tick the step is executed at (the animation changes the size from the next tick).
         """
-
-        if not hasattr(self, "_executed_animation_stage"):
-            self._executed_animation_stage = 0
-            self._original_size = self.sizeX  
-
-        # Increment/Decrement logic based on the current stage
-        if self._executed_animation_stage == 0:
-            # Increment to 1.5x size
-            target_size = self._original_size * 1.5
-
-            if self.change_size(delta_size=3, target_width=target_size, target_height=target_size, maintain_center=True):
-                self._executed_animation_stage = 1
-
-        elif self._executed_animation_stage == 1:
-            # Decrement back to original size
-            target_size = self._original_size
-
-            if self.change_size(delta_size=3, target_width=target_size, target_height=target_size, maintain_center=True):
-                self._executed_animation_stage = 2
-
-        elif self._executed_animation_stage == 2:
-            # Increment to 1.3x size
-            target_size = self._original_size * 1.3
-
-            if self.change_size(delta_size=3, target_width=target_size, target_height=target_size, maintain_center=True):
-                self._executed_animation_stage = 3
-
-        elif self._executed_animation_stage == 3:
-            # Decrement back to original size
-            target_size = self._original_size
-
-            if self.change_size(delta_size=3, target_width=target_size, target_height=target_size, maintain_center=True):
-                self._executed_animation_stage = 4
-
-        elif self._executed_animation_stage == 4:
-            # Animation is complete, clean up attributes
-            del self._executed_animation_stage
-            del self._original_size
-            return True
-
-        # Animation is still running
-        return False
-
-
-
-
+        if self.executed_animation is not None:
+            for track in self.executed_animation:
+                track.delay(tick - self.executed_animation_tick)
+        else:
+            sizes = self.sizeX * np.array((1,) + self.EXECUTED_ANIMATION_SIZES)
+            durations = durations_at_speed(sizes, self.EXECUTED_ANIMATION_SPEED)
+            offsets = centering_offsets(sizes, durations, self.EXECUTED_ANIMATION_SPEED)
+            self.executed_animation = (
+                Keyframes(tick, sizes, durations, speed=self.EXECUTED_ANIMATION_SPEED),
+                Keyframes(tick, offsets, durations, speed=self.EXECUTED_ANIMATION_SPEED / 2),
+            )
+        self.executed_animation_tick = tick
+
+    def apply_executed_animation(self, tick):
+        """Set the size to the value of the executed animation at tick and move by its offset change, ending it the tick after its last change."""
+        size_track, offset_track = self.executed_animation
+        size = size_track.value_at(tick)
+        shift = offset_track.value_at(tick) - offset_track.value_at(self.executed_animation_tick)
+        self.set_size(size, size)
+        self.move(shift, shift)
+        self.executed_animation_tick = tick
+        if tick > size_track.end_tick:
+            self.executed_animation = None
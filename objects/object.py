@@ -1,16 +1,86 @@
 #object.py
 
 from abc import ABC, abstractmethod
+import copy
 import math
+from utils.rects import bounding_rect
+from utils.tween import Tween, Approach, Steps
+
+SLOT_NAMES = {}  # Class -> names of the __slots__ of the class and its bases
+
+def get_slot_names(cls):
+    """Return the names of the slots declared by cls and its bases (without __dict__ and __weakref__)."""
+    names = SLOT_NAMES.get(cls)
+    if names is None:
+        names = SLOT_NAMES[cls] = tuple(
+            name for klass in cls.__mro__ for name in klass.__dict__.get("__slots__", ())
+            if name not in ("__dict__", "__weakref__")
+        )
+    return names
 
 class Object(ABC):
-    """Abstract base class for all objects in the game."""
+    """
+    Abstract base class for all objects in the game.
+
+    posX and posY are relative to the parent object (set_parent), or to the screen for objects
+    without a parent. Moving an object only writes its own position, whatever the number of its
+    descendants: their screen positions are worked out when they are drawn (get_world_pos).
+
+    The fields live in __slots__ so scenes with many small objects stay compact. Subclasses that
+    declare no __slots__ (scenes, CodeString...) get a __dict__ and can add fields freely.
+    """
+
+    __slots__ = (
+        "posX", "posY", "sizeX", "sizeY", "parent", "static",
+        "drawn_signature", "drawn_bounds",
+        "motion", "size_motion",
+    )
+
+    TRACK_SIZE = 4  # Number of values written by get_track_state
+    SNAPSHOT_EXCLUDE = ("drawn_signature", "drawn_bounds")  # Fields describing the screen, not the animation
 
     def __init__(self, posX=0, posY=0, sizeX=1, sizeY=1):
         self.posX = posX
         self.posY = posY
         self.sizeX = sizeX
         self.sizeY = sizeY
+        self.parent = None
+        self.static = False  # Drawn once into the static layer of its scene (see set_static)
+
+        # What was on screen at the last collect_dirty_rects call
+        self.drawn_signature = None
+        self.drawn_bounds = None
+
+        # Animations of go_to / go_to_smooth and change_size: (arguments, tracks...), evaluated at the tick
+        self.motion = None
+        self.size_motion = None
+
+    def set_parent(self, parent):
+        """
+        Attach the object to parent (None detaches it): from then on posX and posY are an offset from the parent.
+        The parent still updates and draws the object through get_children.
+        """
+        self.parent = parent
+
+    def set_static(self, static=True):
+        """
+        Mark the object as static: its scene draws it (with its descendants) once into a cached layer
+        under the dynamic objects, instead of every frame. Only the children of a scene are layered.
+        The layer is drawn again when the draw signature of a static child changes (get_draw_signature).
+        """
+        self.static = static
+
+    def get_world_pos(self):
+        """
+        Return the position of the top-left corner on the screen as (x, y): the offsets of the object
+        and of its ancestors added up. Positions are only translations, so adding them up when
+        drawing is cheaper than keeping a cached copy up to date on every move.
+        """
+        parent = self.parent
+        if parent is None:
+            return self.posX, self.posY
+        parentX, parentY = parent.get_world_pos()
+        return parentX + self.posX, parentY + self.posY
 
     @abstractmethod
     def update(self, tick):
@@ -22,6 +92,104 @@ class Object(ABC):
         """Draw the object on the screen."""
         pass
 
+    def get_children(self):
+        """Return the child objects updated and drawn by this object."""
+        return []
+
+    def get_object_tree(self):
+        """Return the object and all its descendants, depth first."""
+        objects = [self]
+        for child in self.get_children():
+            objects.extend(child.get_object_tree())
+        return objects
+
+    def get_bounds(self):
+        """Return the screen area (pygame.Rect) drawn by the object itself, or None if it draws nothing."""
+        worldX, worldY = self.get_world_pos()
+        return bounding_rect(worldX, worldY, self.sizeX, self.sizeY)
+
+    def get_draw_signature(self):
+        """Return a value that changes whenever the drawing of the object changes."""
+        worldX, worldY = self.get_world_pos()
+        return (worldX, worldY, self.sizeX, self.sizeY)
+
+    def collect_dirty_rects(self, rects):
+        """
+        Add to rects the screen areas of this object and its children whose drawing changed
+        since the previous call: the area it was drawn in before and the area it is drawn in now.
+
+        Args:
+            rects (list[pygame.Rect]): List the dirty areas are appended to.
+        """
+        signature = self.get_draw_signature()
+        if signature != self.drawn_signature:
+            bounds = self.get_bounds()
+            if self.drawn_bounds is not None:
+                rects.append(self.drawn_bounds)
+            if bounds is not None:
+                rects.append(bounds)
+            self.drawn_signature = signature
+            self.drawn_bounds = bounds
+
+        for child in self.get_children():
+            child.collect_dirty_rects(rects)
+
+    def get_track_state(self, strings):
+        """
+        Return the state needed to draw the object as TRACK_SIZE numbers, used to bake state tracks.
+
+        Args:
+            strings (dict): String table of the track (text -> index). Text values are stored as their index.
+
+        Returns:
+            list: The draw state of the object.
+        """
+        return [self.posX, self.posY, self.sizeX, self.sizeY]
+
+    def set_track_state(self, values, strings):
+        """
+        Restore the draw state saved by get_track_state.
+
+        Args:
+            values (sequence): TRACK_SIZE numbers read from the track.
+            strings (list): String table of the track, indexed by the stored values.
+        """
+        self.posX, self.posY, self.sizeX, self.sizeY = (float(value) for value in values[:4])
+
+    def get_fields(self):
+        """Return the fields of the object that are set, as a dict: its slots and its __dict__ (if the class has one)."""
+        fields = {}
+        for name in get_slot_names(type(self)):
+            value = getattr(self, name, fields)  # fields stands for "not set"
+            if value is not fields:
+                fields[name] = value
+        fields.update(getattr(self, "__dict__", ()))
+        return fields
+
+    def get_snapshot(self, memo):
+        """
+        Return a copy of the fields of the object (not of its children), to come back to the current tick later.
+
+        Args:
+            memo (dict): copy.deepcopy memo mapping the objects of the scene to themselves,
+                         so references to other objects are kept instead of copied.
+        """
+        return {name: copy.deepcopy(value, memo) for name, value in self.get_fields().items() if name not in self.SNAPSHOT_EXCLUDE}
+
+    def restore_snapshot(self, snapshot, memo):
+        """
+        Restore the fields saved by get_snapshot. Fields added after the snapshot (such as
+        the progress of an action) are removed.
+
+        Args:
+            snapshot (dict): Fields returned by get_snapshot.
+            memo (dict): copy.deepcopy memo mapping the objects of the scene to themselves.
+        """
+        for name in [name for name in self.get_fields() if name not in snapshot and name not in self.SNAPSHOT_EXCLUDE]:
+            delattr(self, name)
+        for name, value in snapshot.items():
+            setattr(self, name, copy.deepcopy(value, memo))  # The snapshot stays untouched for later seeks
+
     def set_pos(self, posX, posY):
         """Set the position of the object."""
         self.posX = posX
@@ -37,148 +205,129 @@ class Object(ABC):
         self.posX += deltaX
         self.posY += deltaY
 
+    def set_size_centered(self, sizeX, sizeY):
+        """Set the size of the object keeping its center in place."""
+        self.posX -= (sizeX - self.sizeX) / 2
+        self.posY -= (sizeY - self.sizeY) / 2
+        self.sizeX = sizeX
+        self.sizeY = sizeY
+
     def scale(self, factorX, factorY):
         """Scale the object by a factor."""
         self.sizeX *= factorX
         self.sizeY *= factorY
 
-    def change_size(self, delta_size, target_width, target_height, maintain_center=False):
+    def start_animation(self, current, key, tick, create_tracks):
         """
-        Adjust the size incrementally toward the target width and height.
-        Stops adjusting when the size reaches the target size.
+        Return the tracks of an animation started by a call with the arguments key: current if it is the
+        same animation, else new tracks anchored so the call at tick makes the first step.
 
         Args:
-            delta_size (float): The absolute change in size per call.
+            current (tuple): The running animation, (key, tracks...), or None.
+            key (tuple): The arguments of the call.
+            tick (int): The current tick of the scene.
+            create_tracks (callable): create_tracks(start_tick) returns the tuple of tracks.
+        """
+        if current is not None and current[0] == key:
+            return current
+        return (key,) + create_tracks(tick - 1)
+
+    def change_size(self, delta_size, target_width, target_height, tick, maintain_center=False):
+        """
+        Change the size toward the target width and height by delta_size per tick, from the tick of the first call,
+        stopping on the target (the last step is clamped). The size at any tick is computed from that tick
+        (see Steps): calls can skip ticks.
+
+        Args:
+            delta_size (float): The absolute change in size per tick.
             target_width (float): The target width to stop at.
             target_height (float): The target height to stop at.
-            maintain_center (bool): Whether to adjust the position to keep the square centered.
+            tick (int): The current tick of the scene.
+            maintain_center (bool): Whether to move the position by half of delta_size per tick the size
+                                    changes (the clamped last step too), to keep the object about centered.
 
         Returns:
             bool: True if the object has reached the target size, False otherwise.
         """
-        # Ensure delta_size is positive
         delta_size = abs(delta_size)
+        key = (delta_size, target_width, target_height, maintain_center)
+        self.size_motion = self.start_animation(self.size_motion, key, tick, lambda start: self.create_size_tracks(start, delta_size, target_width, target_height, maintain_center))
+        _, width, height, motionX, motionY = self.size_motion
 
+        self.set_size(width.value_at(tick), height.value_at(tick))
         if maintain_center:
-            # Calculate half the change in size for width and height
-            shift_x = delta_size / 2 if self.sizeX != target_width else 0
-            shift_y = delta_size / 2 if self.sizeY != target_height else 0
-
-            # Adjust the position incrementally to keep the square centered
-            if self.sizeX < target_width:
-                self.posX -= shift_x
-            elif self.sizeX > target_width:
-                self.posX += shift_x
-
-            if self.sizeY < target_height:
-                self.posY -= shift_y
-            elif self.sizeY > target_height:
-                self.posY += shift_y
-
-        # Adjust width and height incrementally
-        if self.sizeX < target_width:
-            self.sizeX = min(self.sizeX + delta_size, target_width)
-        elif self.sizeX > target_width:
-            self.sizeX = max(self.sizeX - delta_size, target_width)
-
-        if self.sizeY < target_height:
-            self.sizeY = min(self.sizeY + delta_size, target_height)
-        elif self.sizeY > target_height:
-            self.sizeY = max(self.sizeY - delta_size, target_height)
-
-        # Check if the target size has been reached
-        return self.sizeX == target_width and self.sizeY == target_height
+            self.set_pos(motionX.value_at(tick), motionY.value_at(tick))
 
+        if width.is_finished(tick) and height.is_finished(tick):
+            self.size_motion = None
+            return True
+        return False
 
+    def create_size_tracks(self, start, delta_size, target_width, target_height, maintain_center):
+        """Return the (width, height, x, y) tracks of change_size started at start (no position tracks without maintain_center)."""
+        width = Steps(start, self.sizeX, target_width, delta_size)
+        height = Steps(start, self.sizeY, target_height, delta_size)
+        if not maintain_center:
+            return width, height, None, None
 
-    def go_to(self, deltaX, deltaY, finalX, finalY):
+        shiftX = delta_size / 2 * width.duration * ((target_width > self.sizeX) - (target_width < self.sizeX))
+        shiftY = delta_size / 2 * height.duration * ((target_height > self.sizeY) - (target_height < self.sizeY))
+        return width, height, Steps(start, self.posX, self.posX - shiftX, delta_size / 2), Steps(start, self.posY, self.posY - shiftY, delta_size / 2)
 
+    def go_to(self, deltaX, deltaY, finalX, finalY, tick):
         """
-        Move the object incrementally by deltaX and deltaY towards a final position.
-        Stops moving once the object reaches or exceeds the target coordinates.
+        Move the object towards a final position, by deltaX and deltaY plus 1/64 of the distance left per tick
+        (so it slows down on arrival), from the tick of the first call. The position at any tick is computed
+        from that tick (a pair of approaches): calls can skip ticks.
 
         Args:
-            deltaX (float): The absolute change in x-coordinate per call.
-            deltaY (float): The absolute change in y-coordinate per call.
+            deltaX (float): The absolute change in x-coordinate per tick (plus the catch-up).
+            deltaY (float): The absolute change in y-coordinate per tick (plus the catch-up).
             finalX (float): The target x-coordinate to stop at.
             finalY (float): The target y-coordinate to stop at.
+            tick (int): The current tick of the scene.
 
         Returns:
             bool: True if the object has reached the target position, False otherwise.
         """
-        # Ensure deltaX and deltaY are positive
-        deltaX = deltaX + abs(finalX-self.posX)/64
-        deltaY = deltaY + abs(finalY-self.posY)/64
-
-        # Update X position
-        if self.posX < finalX:
-            self.posX = min(self.posX + deltaX, finalX)
-        elif self.posX > finalX:
-            self.posX = max(self.posX - deltaX, finalX)
-
-        # Update Y position
-        if self.posY < finalY:
-            self.posY = min(self.posY + deltaY, finalY)
-        elif self.posY > finalY:
-            self.posY = max(self.posY - deltaY, finalY)
-
-        # Check if both X and Y have reached their targets
-        return self.posX == finalX and self.posY == finalY
-    
-    def go_to_smooth(self, finalX, finalY, speed=5):
+        key = ("go_to", deltaX, deltaY, finalX, finalY)
+        self.motion = self.start_animation(self.motion, key, tick, lambda start: (
+            Approach(start, self.posX, finalX, deltaX),
+            Approach(start, self.posY, finalY, deltaY),
+        ))
+        return self.apply_motion(tick)
+
+    def go_to_smooth(self, finalX, finalY, tick, speed=5):
         """
-        Move the object incrementally towards a final position with an ease-in-out effect.
+        Move the object towards a final position with an ease-in-out effect, from the tick of the first call.
         The movement accelerates at the start and decelerates as it approaches the final position.
+        It is a pair of cubic ease-in-out tweens evaluated in closed form, lasting as many ticks
+        as moving at speed would take.
 
         Args:
             finalX (float): The target x-coordinate to stop at.
             finalY (float): The target y-coordinate to stop at.
-            speed (float): The base speed factor controlling movement.
+            tick (int): The current tick of the scene.
+            speed (float): The average distance moved per tick.
 
         Returns:
             bool: True if the object has reached the target position, False otherwise.
         """
-
-        if not hasattr(self, "startX"):
-            self.startX = self.posX
-        if not hasattr(self, "startY"):
-            self.startY = self.posY
-
-        # Calculate total distances
-        total_distanceX = abs(finalX - self.startX)
-        total_distanceY = abs(finalY - self.startY)
-
-        # Calculate remaining distances
-        distanceX = abs(finalX - self.posX)
-        distanceY = abs(finalY - self.posY)
-
-        # Progress (0 to 1), ensuring no division by zero
-        progressX = 1 - (distanceX / total_distanceX) if total_distanceX != 0 else 1
-        progressY = 1 - (distanceY / total_distanceY) if total_distanceY != 0 else 1
-
-        # Easing function: cubic ease-in-out
-        def cubic_ease_in_out(t):
-            return 3 * t**2 - 2 * t**3  # Smooth acceleration and deceleration
-
-        easingX = cubic_ease_in_out(progressX)
-        easingY = cubic_ease_in_out(progressY)
-
-        # Dynamically adjust movement speed
-        stepX = (finalX - self.posX) * easingX * speed / (distanceX + 1e-5)
-        stepY = (finalY - self.posY) * easingY * speed / (distanceY + 1e-5)
-
-        # Update position
-        self.posX += stepX
-        self.posY += stepY
-
-        # Check if we are close enough to stop
-        at_target = abs(self.posX - finalX) < 0.1 and abs(self.posY - finalY) < 0.1
-
-        if at_target:
-            self.posX = finalX
-            self.posY = finalY
-            del self.startX
-            del self.startY
+        key = ("go_to_smooth", finalX, finalY, speed)
+        duration = lambda: max(1, math.ceil(math.hypot(finalX - self.posX, finalY - self.posY) / speed))
+        self.motion = self.start_animation(self.motion, key, tick, lambda start: (
+            Tween(start, duration(), self.posX, finalX, "cubic_in_out"),
+            Tween(start, duration(), self.posY, finalY, "cubic_in_out"),
+        ))
+        return self.apply_motion(tick)
+
+    def apply_motion(self, tick):
+        """Set the position to the value of the motion at tick. Return True (and forget the motion) once it has arrived."""
+        _, motionX, motionY = self.motion
+        self.posX = motionX.value_at(tick)
+        self.posY = motionY.value_at(tick)
+
+        if motionX.is_finished(tick) and motionY.is_finished(tick):
+            self.motion = None
             return True
-
-        return False
\ No newline at end of file
+        return False
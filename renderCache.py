@@ -0,0 +1,198 @@
+#renderCache.py
+"""
+On-disk cache of rendered scenes. A scene is cached under a key derived from everything its frames
+depend on: the source of its module and of every module of the repository it uses (objects, utils,
+renderers...), the fonts, and the render settings. Editing one scene only changes the key of that scene,
+so the next render only renders it again and stream-copies the others from the cache.
+
+Usage (from the repository root), to check that editing a module changes the keys of the scenes using it:
+    python renderCache.py --check [--module utils.colors] [SCENE ...]
+"""
+
+import os
+import ast
+import sys
+import json
+import glob
+import shutil
+import hashlib
+import argparse
+import tempfile
+import subprocess
+import importlib.util
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = "videos/cache"
+MAX_ENTRIES_PER_SCENE = 4  # Older renders of a scene are deleted (keeps e.g. draft and final renders)
+
+# Modules every render runs, some of them imported lazily inside functions
+RENDER_MODULES = ["sceneRenderer", "videoRenderer", "sceneBaker", "utils.viewport", "utils.profiler"]
+ASSET_PATTERNS = ["fonts/*"]
+CHECKED_SCENES = ["scene.scene_code.SceneCode", "scene.scene_instructions.SceneInstructions"]
+
+# Settings that change the frames or their encoding (not e.g. profiling)
+KEY_SETTINGS = ["width", "height", "framerate", "background_color", "max_seconds", "dirty_rects", "scale", "frame_stride", "codec", "preset", "crf", "png_compression"]
+
+def get_imported_names(path, package):
+    """
+    Return the names of the modules a source file imports anywhere (including inside functions). For
+    "from x import y", both x and x.y are returned: y may be a submodule or a name defined in x.
+    Names imported with "import *" or only for their constants are included, unlike reading them from
+    the module globals.
+
+    Args:
+        path (str): Path of the source file.
+        package (str): Package of the module, to resolve relative imports.
+    """
+    with open(path, "rb") as source_file:
+        tree = ast.parse(source_file.read(), path)
+
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = importlib.util.resolve_name("." * node.level + (node.module or ""), package) if node.level else node.module
+            names.append(module)
+            names.extend(f"{module}.{alias.name}" for alias in node.names if alias.name != "*")
+    return names
+
+def find_source(name):
+    """Return the path of the source file of a module without running it (None if it is not a module)."""
+    parent = name.rpartition(".")[0]
+    if parent and not is_package(parent):
+        return None  # "x.y" where x is a module: y is a name defined in it (finding it would run x)
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    return spec.origin if spec is not None and spec.has_location else None
+
+def is_package(name):
+    """Return True if name is a package (regular or namespace, like objects or utils)."""
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return False
+    return spec is not None and spec.submodule_search_locations is not None
+
+def get_repo_modules(module_names):
+    """
+    Return the source files of the given modules and of every module of the repository they import, recursively.
+
+    Returns:
+        dict: module name -> path of its source file.
+    """
+    sources = {}
+    pending = list(module_names)
+    while pending:
+        name = pending.pop()
+        if name in sources or name in ("__main__", "__mp_main__"):  # main.py holds settings, not drawing code
+            continue
+        path = find_source(name)
+        if path is None or not os.path.abspath(path).startswith(REPO_ROOT + os.sep):
+            continue  # Not a module of the repository (standard library, pygame, numpy, names defined in modules...)
+        sources[name] = path
+        pending.extend(dependency for dependency in get_imported_names(path, name.rpartition(".")[0]) if dependency not in sources)
+    return sources
+
+def get_scene_key(scene_class, settings):
+    """Return the cache key of a scene rendered with settings: a hash of its code, assets and settings."""
+    digest = hashlib.sha256()
+    digest.update(f"{scene_class.__module__}.{scene_class.__qualname__}".encode())
+
+    sources = get_repo_modules([scene_class.__module__] + RENDER_MODULES)
+    for name in sorted(sources):
+        with open(sources[name], "rb") as source_file:
+            digest.update(name.encode() + b"\0" + source_file.read())
+
+    for pattern in ASSET_PATTERNS:
+        for path in sorted(glob.glob(os.path.join(REPO_ROOT, pattern))):
+            with open(path, "rb") as asset_file:
+                digest.update(os.path.relpath(path, REPO_ROOT).encode() + b"\0" + asset_file.read())
+
+    digest.update(json.dumps({key: settings.get(key) for key in KEY_SETTINGS}, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+def get_cache_path(scene_class, settings, cache_dir=CACHE_DIR):
+    """Return the path of the cached render of a scene (it may not exist yet)."""
+    from sceneRenderer import get_output_extension
+
+    return os.path.join(cache_dir, f"{scene_class.__name__}-{get_scene_key(scene_class, settings)}{get_output_extension(settings)}")
+
+def lookup(scene_class, settings, cache_dir=CACHE_DIR):
+    """
+    Return the cache path of a scene and whether it holds a render (which is then marked as recently used).
+
+    Returns:
+        tuple: (path, hit).
+    """
+    path = get_cache_path(scene_class, settings, cache_dir)
+    if not os.path.exists(path):
+        return path, False
+    os.utime(path)
+    return path, True
+
+def get_partial_path(cache_path):
+    """Return where a render that will be stored at cache_path is written: it only gets cache_path once complete."""
+    root, extension = os.path.splitext(cache_path)
+    return f"{root}.partial{extension}"
+
+def store(partial_path, cache_path):
+    """Move a finished render into the cache and delete the least recently used renders of the same scene beyond MAX_ENTRIES_PER_SCENE."""
+    os.replace(partial_path, cache_path)
+
+    scene_name = os.path.basename(cache_path).rsplit("-", 1)[0]
+    entries = [
+        path for path in glob.glob(os.path.join(os.path.dirname(cache_path), f"{glob.escape(scene_name)}-*"))
+        if ".partial" not in path
+    ]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for path in entries[MAX_ENTRIES_PER_SCENE:]:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+def get_scene_keys_in(root, scene_paths):
+    """Return the cache keys of the scenes (module.Class paths) computed by the copy of the repository at root."""
+    script = (
+        "import importlib, sys, renderCache\n"
+        "for path in sys.argv[1:]:\n"
+        "    module, _, name = path.rpartition('.')\n"
+        "    print(renderCache.get_scene_key(getattr(importlib.import_module(module), name), {}))\n"
+    )
+    environment = dict(os.environ, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    result = subprocess.run([sys.executable, "-c", script] + scene_paths, cwd=root, env=environment, capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+def check_module_in_keys(module_name, scene_paths):
+    """
+    Append a constant to a module in a copy of the repository and return the scenes whose key did not change.
+    A scene using the module (even only for constants, or through "import *") must get a new key.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        root = os.path.join(directory, "repo")
+        shutil.copytree(REPO_ROOT, root, ignore=shutil.ignore_patterns(".git", "videos", "__pycache__"))
+        keys = get_scene_keys_in(root, scene_paths)
+        with open(os.path.join(root, *module_name.split(".")) + ".py", "a") as module_file:
+            module_file.write("\nRENDER_CACHE_CHECK = 1\n")
+        edited_keys = get_scene_keys_in(root, scene_paths)
+    return [path for path, key, edited_key in zip(scene_paths, keys, edited_keys) if key == edited_key]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenes", nargs="*", default=CHECKED_SCENES, help="scene classes as module.Class")
+    parser.add_argument("--check", action="store_true", required=True, help="check that editing --module changes the keys of the scenes")
+    parser.add_argument("--module", default="utils.colors", help="module edited by the check (constants only by default)")
+    args = parser.parse_args()
+
+    unchanged = check_module_in_keys(args.module, args.scenes)
+    for path in unchanged:
+        print(f"❌ {path}: editing {args.module} does not change its cache key")
+    if unchanged:
+        sys.exit(1)
+    print(f"Editing {args.module} changes the cache key of {', '.join(args.scenes)}")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,129 @@
 #scene.py
 
 from objects.object import Object
+from utils.rects import merge_rects
 
 class Scene(Object):
-    """Scene"""
+    """
+    Scene
+
+    Frames are composed from two layers: the static layer, the background with the static children
+    (set_static) drawn once and kept while their draw signatures stay the same, and the dynamic
+    children drawn on top of it every frame. With static children, draw must draw the children in get_children order
+    (the dynamic ones are then drawn by draw_dynamic instead).
+    """
+
+    MAX_DIRTY_RECTS = 8  # Above this, the dirty areas are repainted as a single rectangle
+    SNAPSHOT_EXCLUDE = Object.SNAPSHOT_EXCLUDE + ("static_layer", "static_layer_key")
 
     def __init__(self):
         super().__init__(0, 0, 0, 0)
+        self.static_layer = None  # Surface with the background and the static children
+        self.static_layer_key = None  # What the static layer was drawn for
+
+    def get_bounds(self):
+        """The scene draws nothing itself: its objects report their own areas."""
+        return None
+
+    def get_static_children(self):
+        """Return the children marked static."""
+        return [child for child in self.get_children() if child.static]
+
+    def invalidate_layers(self):
+        """Draw the static layer again for the next frame, even if no static child reports a change."""
+        self.static_layer = None
+
+    def get_static_layer(self, screen, background_color, static_children):
+        """
+        Return the static layer: a copy of screen with the background and the static children drawn on it.
+        It is drawn again only if it was invalidated or the screen, the background, the static children
+        or the draw signature (get_draw_signature) of one of them changed.
+
+        Returns:
+            tuple: (surface, whether it was drawn again).
+        """
+        key = (screen.get_size(), screen.get_bitsize(), tuple(background_color), tuple((id(child), child.get_draw_signature()) for child in static_children))
+        if self.static_layer is not None and self.static_layer_key == key:
+            return self.static_layer, False
+
+        layer = screen.copy()  # Same pixel format as the screen: blitting it is a plain copy
+        layer.set_clip(None)
+        layer.fill(background_color)
+        for child in static_children:
+            child.draw(layer)
+        self.static_layer = layer
+        self.static_layer_key = key
+        return layer, True
+
+    def restore_snapshot(self, snapshot, memo):
+        """Restore the fields saved by get_snapshot. The static children may come back changed: draw the layer again."""
+        super().restore_snapshot(snapshot, memo)
+        self.invalidate_layers()
+
+    def draw_dynamic(self, screen):
+        """Draw the children that are not static, in order."""
+        for child in self.get_children():
+            if not child.static:
+                child.draw(screen)
+
+    def compose(self, screen, background_color):
+        """
+        Draw the whole frame: the static layer in one blit and the dynamic children over it
+        (without static children, fill the background and draw the scene).
+        """
+        static_children = self.get_static_children()
+        if not static_children:
+            screen.fill(background_color)
+            self.draw(screen)
+            return
+
+        layer, _ = self.get_static_layer(screen, background_color, static_children)
+        screen.blit(layer, (0, 0))
+        self.draw_dynamic(screen)
+
+    def redraw(self, screen, background_color, full=False):
+        """
+        Repaint only the parts of the screen whose drawing changed since the previous call,
+        keeping the rest of the previous frame. The areas are restored from the static layer
+        and only the dynamic children are drawn again: the cost depends on what moves.
+
+        Args:
+            screen (pygame.Surface): Surface holding the previous frame of this scene.
+            background_color (tuple): Color the repainted areas are cleared with.
+            full (bool): Repaint the whole screen (first frame of the scene).
+
+        Returns:
+            list[pygame.Rect]: The repainted areas (empty if nothing changed).
+        """
+        rects = []
+        static_children = self.get_static_children()
+        if static_children:
+            layer, redrawn = self.get_static_layer(screen, background_color, static_children)
+            full = full or redrawn  # A static child changed: it may have moved anywhere
+            for child in self.get_children():
+                if not child.static:
+                    child.collect_dirty_rects(rects)
+        else:
+            self.collect_dirty_rects(rects)
+
+        screen_rect = screen.get_rect()
+        if full:
+            rects = [screen_rect]
+        else:
+            rects = [rect.clip(screen_rect) for rect in merge_rects(rects, self.MAX_DIRTY_RECTS)]
+            rects = [rect for rect in rects if rect.width > 0 and rect.height > 0]
+
+        for rect in rects:
+            screen.set_clip(rect)
+            if static_children:
+                screen.blit(layer, rect, rect)
+                self.draw_dynamic(screen)
+            else:
+                screen.fill(background_color, rect)
+                self.draw(screen)
+        screen.set_clip(None)
+
+        return rects
 
     def update(self, tick):
         pass
@@ -41,6 +41,8 @@ class SceneCode(Scene):
         sample_code = SAMPLE_CODE_1
         self.code = CodeString(100, 50, 700, code_text=sample_code, custom_types=[], variables=["a", "b", "max_number"], functions=["calculate_max"])
         self.code.highlight_line(24)
+        self.gutter = self.code.create_gutter()
+        self.gutter.set_static()  # The line numbers change only with the highlight and the number of lines
 
         self.state = self.State.INITIALIZE
 
@@ -95,7 +97,11 @@ class SceneCode(Scene):
 
         self.code.update(tick)
     
+    def get_children(self):
+        return [self.gutter, self.code]
+
     def draw(self, screen):
+        self.gutter.draw(screen)
         self.code.draw(screen)
 
     def finish(self):
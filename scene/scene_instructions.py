@@ -37,7 +37,7 @@ class SceneInstructions(Scene):
         """Update logic for the instruction."""
 
         if self.state == self.State.MOVE1:
-            if self.move1_action():
+            if self.move1_action(tick):
                 self.state = self.State.EXECUTE1
         elif self.state == self.State.EXECUTE1:
             if self.execute1_action():
@@ -46,7 +46,7 @@ class SceneInstructions(Scene):
             if self.jiggle_action():
                 self.state = self.State.MOVE2
         elif self.state == self.State.MOVE2:
-            if self.move2_action():
+            if self.move2_action(tick):
                 self.state = self.State.EXECUTE2
         elif self.state == self.State.EXECUTE2:
             if self.execute2_action():
@@ -56,15 +56,22 @@ class SceneInstructions(Scene):
             instruction.update(tick)
     
 
+    def get_children(self):
+        """Return the instructions of the scene."""
+        return self.instructions
+
     def draw(self, screen):
         """Draw the instruction on the screen."""
         for instruction in self.instructions:
             instruction.draw(screen) 
 
-    def move1_action(self):
+    def move1_action(self, tick):
         """
         Move the instructions one by one to their respective positions, forming a line.
 
+        Args:
+            tick (int): The current tick (the movements are computed from it).
+
         Returns:
             bool: True if all instructions have completed their animations, False otherwise.
         """
@@ -76,9 +83,9 @@ class SceneInstructions(Scene):
         if self._instructions_moved < self.NUM_INSTRUCTIONS:
             current_instruction = self.instructions[self._instructions_moved]
 
-            if current_instruction.go_to( self.MOVE_SPEED,self.MOVE_SPEED,finalX=200 + 250 * self._instructions_moved, finalY=200):
+            if current_instruction.go_to( self.MOVE_SPEED,self.MOVE_SPEED,finalX=200 + 250 * self._instructions_moved, finalY=200, tick=tick):
                 self._instructions_moved += 1
-            #if current_instruction.go_to_smooth( finalX=200 + 250 * self._instructions_moved, finalY=200, MOVE_SPEED):
+            #if current_instruction.go_to_smooth( finalX=200 + 250 * self._instructions_moved, finalY=200, tick=tick, speed=self.MOVE_SPEED):
              #   self._instructions_moved += 1
         else:
             # All instructions have been moved, cleanup
@@ -147,10 +154,13 @@ class SceneInstructions(Scene):
         return False
 
     
-    def move2_action(self):
+    def move2_action(self, tick):
         """
         Move the instructions one by one to their respective positions, forming an stairs.
 
+        Args:
+            tick (int): The current tick (the movements are computed from it).
+
         Returns:
             bool: True if all instructions have completed their animations, False otherwise.
         """
@@ -163,9 +173,9 @@ class SceneInstructions(Scene):
         if self._instructions_moved < self.NUM_INSTRUCTIONS:
             current_instruction = self.instructions[self._instructions_moved]
 
-            if current_instruction.go_to( self.MOVE_SPEED,self.MOVE_SPEED,finalX=200 + step_width * self._instructions_moved, finalY=200 + (step_width+10) * self._instructions_moved):
+            if current_instruction.go_to( self.MOVE_SPEED,self.MOVE_SPEED,finalX=200 + step_width * self._instructions_moved, finalY=200 + (step_width+10) * self._instructions_moved, tick=tick):
                 self._instructions_moved += 1
-            #if current_instruction.go_to_smooth( finalX=200 + 250 * self._instructions_moved, finalY=200, MOVE_SPEED):
+            #if current_instruction.go_to_smooth( finalX=200 + 250 * self._instructions_moved, finalY=200, tick=tick, speed=self.MOVE_SPEED):
              #   self._instructions_moved += 1
         else:
             # All instructions have been moved, cleanup
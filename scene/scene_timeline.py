@@ -0,0 +1,74 @@
+#scene_timeline.py
+
+class SceneTimeline:
+    """
+    Plays a scene tick by tick and keeps a snapshot of it every snapshot_interval ticks,
+    so it can seek to any tick by restoring the nearest snapshot and updating (without drawing)
+    only the ticks after it.
+
+    A lower snapshot_interval uses more memory and seeks faster.
+    """
+
+    def __init__(self, scene, start_tick=0, snapshot_interval=60):
+        """
+        Args:
+            scene (Scene): The scene to play.
+            start_tick (int): Tick of the first update of the scene.
+            snapshot_interval (int): Ticks between two snapshots.
+        """
+        self.scene = scene
+        self.start_tick = start_tick
+        self.snapshot_interval = snapshot_interval
+        self.snapshots = {}  # tick -> [(object, fields)], the state before update(tick)
+        self.last_tick = start_tick - 1  # Last tick the scene was updated for
+
+    def get_memo(self, objects):
+        """Return a copy.deepcopy memo that keeps the objects of the scene instead of copying them."""
+        return {id(obj): obj for obj in objects}
+
+    def take_snapshot(self, tick):
+        """Save the state of the scene and its objects before update(tick)."""
+        objects = self.scene.get_object_tree()
+        memo = self.get_memo(objects)
+        self.snapshots[tick] = [(obj, obj.get_snapshot(memo)) for obj in objects]
+
+    def restore_snapshot(self, tick):
+        """Bring the scene back to the snapshot taken before update(tick)."""
+        snapshot = self.snapshots[tick]
+        memo = self.get_memo(obj for obj, _ in snapshot)
+        for obj, fields in snapshot:
+            obj.restore_snapshot(fields, memo)
+        self.last_tick = tick - 1
+
+    def update(self, tick):
+        """Update the scene for tick, taking a snapshot first when tick falls on the interval."""
+        if (tick - self.start_tick) % self.snapshot_interval == 0 and tick not in self.snapshots:
+            self.take_snapshot(tick)
+        self.scene.update(tick)
+        self.last_tick = tick
+
+    def seek(self, tick):
+        """
+        Bring the scene to its state after update(tick), without drawing.
+
+        Args:
+            tick (int): The tick to go to (clamped to the start of the scene).
+
+        Returns:
+            int: The tick reached: tick, or an earlier one if the scene finishes before it.
+        """
+        tick = max(tick, self.start_tick)
+
+        if tick <= self.last_tick:
+            # Backwards: from the nearest snapshot at or before tick
+            self.restore_snapshot(max(snapshot_tick for snapshot_tick in self.snapshots if snapshot_tick <= tick))
+        elif self.last_tick >= self.start_tick and self.scene.finish():
+            return self.last_tick
+
+        # Forwards: update the ticks in between (taking the snapshots on the way)
+        while self.last_tick < tick:
+            self.update(self.last_tick + 1)
+            if self.scene.finish():
+                break
+
+        return self.last_tick
@@ -0,0 +1,145 @@
+#sceneBaker.py
+
+import os
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sceneRenderer import concat_outputs, create_video_renderer, draw_frame, get_render_extension
+
+def bake_scene(scene_class, track_file, settings):
+    """
+    Run the simulation of a scene once, without drawing, and record the draw state
+    of every object at every frame into a columnar track file.
+
+    The track is a .npy array of shape (frames, columns) that can be memory-mapped,
+    plus a .json side file with the string table (code texts) and the frame count.
+
+    Args:
+        scene_class (type): Scene subclass to instantiate (must take no arguments).
+        track_file (str): Path of the .npy track to write.
+        settings (dict): Render settings (framerate, max_seconds and frame_stride are used).
+
+    Returns:
+        int: Number of frames baked.
+    """
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+
+    import pygame
+
+    pygame.init()  # Fonts are created by the scene objects
+    scene = scene_class()
+    objects = scene.get_object_tree()  # The order of the track columns
+
+    strings = {}
+    rows = []
+    max_ticks = settings["max_seconds"] * settings["framerate"]
+    tick = 0
+    frame_stride = settings.get("frame_stride", 1)
+    while True:
+        scene.update(tick)
+        if tick % frame_stride == 0:  # Only the ticks that are drawn become frames
+            row = []
+            for obj in objects:
+                row.extend(obj.get_track_state(strings))
+            rows.append(row)
+        tick += 1
+
+        if scene.finish() or tick >= max_ticks:
+            break
+
+    pygame.quit()
+
+    track = np.lib.format.open_memmap(track_file, mode="w+", dtype=np.float64, shape=(len(rows), len(rows[0])))
+    track[:] = rows
+    track.flush()
+    del track
+
+    with open(track_file + ".json", "w") as info_file:
+        json.dump({"scene": scene_class.__name__, "frames": len(rows), "strings": list(strings)}, info_file)
+
+    return len(rows)
+
+def render_track_range(scene_class, track_file, start_frame, end_frame, output_file, settings):
+    """
+    Draw and encode frames [start_frame, end_frame) of a baked scene. Meant to run in a worker process.
+
+    Args:
+        scene_class (type): The scene class the track was baked from.
+        track_file (str): Path of the .npy track.
+        start_frame (int): First frame to render.
+        end_frame (int): Frame after the last one to render.
+        output_file (str): Path of the video segment to write.
+        settings (dict): Render settings: width, height, framerate, background_color, dirty_rects, scale, frame_stride, codec, preset, crf.
+    """
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+
+    import pygame
+    from utils.viewport import set_render_scale
+
+    pygame.init()
+    set_render_scale(settings.get("scale", 1))
+    screen = pygame.Surface((settings["width"], settings["height"]))
+    scene = scene_class()  # Only provides the objects: their state comes from the track
+    objects = scene.get_object_tree()  # The order of the track columns
+
+    track = np.load(track_file, mmap_mode="r")
+    with open(track_file + ".json") as info_file:
+        strings = json.load(info_file)["strings"]
+
+    if track.shape[1] != sum(obj.TRACK_SIZE for obj in objects):
+        raise ValueError(f"{track_file} does not match the objects of {scene_class.__name__}")
+
+    videoRenderer = create_video_renderer(output_file, screen, settings)
+    try:
+        for frame in range(start_frame, end_frame):
+            row = track[frame]
+            column = 0
+            for obj in objects:
+                obj.set_track_state(row[column:column + obj.TRACK_SIZE], strings)
+                column += obj.TRACK_SIZE
+
+            changed = draw_frame(scene, screen, settings, first_frame=frame == start_frame)
+            videoRenderer.send_surface(screen, changed)
+    finally:
+        videoRenderer.close()
+        pygame.quit()
+
+def render_scene_chunked(scene_class, output_file, settings, work_dir="videos/tracks", num_chunks=None):
+    """
+    Bake a scene, then draw and encode disjoint frame ranges of it in parallel processes
+    and join the chunks. Splits a single long scene across all cores.
+
+    Args:
+        scene_class (type): Scene subclass to render.
+        output_file (str): Path of the final video of the scene.
+        settings (dict): Render settings (see sceneRenderer.render_scene).
+        work_dir (str): Directory for the track and the chunk videos.
+        num_chunks (int): Number of frame ranges (default: the CPU count).
+
+    Returns:
+        int: Number of frames rendered.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    track_file = os.path.join(work_dir, f"{scene_class.__name__}.npy")
+
+    context = multiprocessing.get_context("spawn")
+
+    # Bake in a worker too, so this process never initializes pygame
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        num_frames = executor.submit(bake_scene, scene_class, track_file, settings).result()
+
+    num_chunks = max(1, min(num_chunks or os.cpu_count() or 1, num_frames))
+    bounds = [num_frames * i // num_chunks for i in range(num_chunks + 1)]
+    chunk_files = [os.path.join(work_dir, f"{scene_class.__name__}_{i:03d}{get_render_extension(settings)}") for i in range(num_chunks)]
+
+    with ProcessPoolExecutor(max_workers=num_chunks, mp_context=context) as executor:
+        futures = [
+            executor.submit(render_track_range, scene_class, track_file, bounds[i], bounds[i + 1], chunk_files[i], settings)
+            for i in range(num_chunks)
+        ]
+        for future in futures:
+            future.result()  # Re-raise any worker error
+
+    concat_outputs(chunk_files, output_file, settings)
+    return num_frames
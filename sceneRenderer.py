@@ -0,0 +1,242 @@
+#sceneRenderer.py
+
+import os
+import shutil
+import subprocess
+import tempfile
+import multiprocessing
+from fractions import Fraction
+from concurrent.futures import ProcessPoolExecutor
+
+def video_framerate(settings):
+    """Return the frame rate of the encoded video: the tick rate divided by the frame stride (e.g. "30" or "60/7")."""
+    return str(Fraction(settings["framerate"], settings.get("frame_stride", 1)))
+
+def get_output_extension(settings):
+    """Return the file extension of the output of a render (empty for image sequences, which are directories)."""
+    from videoRenderer import CODECS
+
+    codec = settings.get("codec", "h264")
+    return "" if codec == "png" else CODECS[codec][0]
+
+def get_render_extension(settings):
+    """Return the extension of what a render writes: ".spool" when it spools its frames, else the output extension."""
+    return ".spool" if settings.get("spool", False) else get_output_extension(settings)
+
+def create_video_renderer(output_file, screen, settings, start_number=0):
+    """
+    Start the frame sink of a render for frames of screen: a SpoolRenderer if the settings spool the frames,
+    a VideoRenderer with the encoder settings (codec, preset, crf), or an ImageSequenceRenderer if the codec is "png".
+
+    Args:
+        output_file (str): Path of the video, or directory of the images or of the spool.
+        screen (pygame.Surface): The surface that will be captured.
+        settings (dict): Render settings (see render_scene).
+        start_number (int): Number of the first image of a sequence.
+    """
+    from videoRenderer import VideoRenderer, ImageSequenceRenderer, surface_pix_fmt
+
+    if settings.get("spool", False):
+        from frameSpool import SpoolRenderer
+        return SpoolRenderer(video_framerate(settings), screen.get_width(), screen.get_height(), output_file, pix_fmt=surface_pix_fmt(screen))
+
+    if settings.get("codec", "h264") == "png":
+        return ImageSequenceRenderer(
+            screen.get_width(), screen.get_height(), output_file, pix_fmt=surface_pix_fmt(screen),
+            compression=settings.get("png_compression", 1), start_number=start_number
+        )
+
+    return VideoRenderer(
+        video_framerate(settings), screen.get_width(), screen.get_height(), output_file,
+        pix_fmt=surface_pix_fmt(screen), preset=settings.get("preset", "ultrafast"), crf=settings.get("crf", 23),
+        codec=settings.get("codec", "h264")
+    )
+
+def draw_frame(scene, screen, settings, first_frame):
+    """
+    Draw the current state of a scene onto screen, which holds the previous frame of the scene.
+
+    Returns:
+        bool: Whether the frame differs from the previous one (None if unknown: the scene was fully redrawn).
+    """
+    if settings.get("dirty_rects", False):
+        return len(scene.redraw(screen, settings["background_color"], full=first_frame)) > 0
+
+    scene.compose(screen, settings["background_color"])
+    return None
+
+def render_scene(scene_class, output_file, settings):
+    """
+    Render a whole scene headless, as fast as possible, into its own video file.
+    Meant to run in a worker process: it initializes its own pygame, surface and FFmpeg pipe.
+
+    Args:
+        scene_class (type): Scene subclass to instantiate (must take no arguments).
+        output_file (str): Path of the video to write.
+        settings (dict): Render settings: width, height (of the render surface), framerate (ticks per second),
+                         background_color, max_seconds, dirty_rects, and optionally scale (render scale),
+                         frame_stride (draw every Nth tick), codec, preset and crf (encoder), spool (write a
+                         frame spool instead, see frameSpool.py), profile (write
+                         output_file.profile.json and output_file.trace.json).
+
+    Returns:
+        int: Number of ticks simulated.
+    """
+    os.environ["SDL_VIDEODRIVER"] = "dummy"  # Workers never open a window
+
+    import pygame
+    from utils.viewport import set_render_scale
+    from utils.profiler import PROFILER
+
+    pygame.init()
+    set_render_scale(settings.get("scale", 1))
+    screen = pygame.Surface((settings["width"], settings["height"]))
+    scene = scene_class()
+    if settings.get("profile", False):
+        PROFILER.reset()  # Pool workers can render several scenes
+        PROFILER.enable()
+    videoRenderer = create_video_renderer(output_file, screen, settings)
+
+    frame_stride = settings.get("frame_stride", 1)
+    max_ticks = settings["max_seconds"] * settings["framerate"]
+    tick = 0
+    try:
+        while True:
+            scene.update(tick)
+            if tick % frame_stride == 0:  # Every tick is simulated, only every Nth one is drawn
+                changed = draw_frame(scene, screen, settings, first_frame=tick == 0)
+                videoRenderer.send_surface(screen, changed)
+            PROFILER.end_frame()
+            tick += 1
+
+            if scene.finish() or tick >= max_ticks:
+                break
+    finally:
+        videoRenderer.close()
+        pygame.quit()
+        if PROFILER.enabled:
+            PROFILER.save(output_file)
+            PROFILER.disable()
+
+    return tick
+
+def concat_videos(input_files, output_file):
+    """
+    Join videos encoded with the same settings into one file with the FFmpeg concat demuxer (no re-encoding).
+
+    Args:
+        input_files (list[str]): Videos to join, in order.
+        output_file (str): Path of the joined video.
+    """
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as list_file:
+        for input_file in input_files:
+            escaped_path = os.path.abspath(input_file).replace("'", "'\\''")
+            list_file.write(f"file '{escaped_path}'\n")
+
+    try:
+        subprocess.run([
+            'ffmpeg',
+            '-y',
+            '-loglevel', 'error',
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', list_file.name,
+            '-c', 'copy',
+            output_file
+        ], check=True)
+    finally:
+        os.remove(list_file.name)
+
+def concat_image_sequences(input_dirs, output_dir, keep_inputs=False):
+    """
+    Join image sequences into one by moving their images, renumbered in order, into output_dir.
+
+    Args:
+        input_dirs (list[str]): Directories of the sequences, in order.
+        output_dir (str): Directory of the joined sequence.
+        keep_inputs (bool): Copy the images instead of moving them (e.g. from the render cache).
+    """
+    from videoRenderer import ImageSequenceRenderer
+
+    os.makedirs(output_dir, exist_ok=True)
+    number = 0
+    for input_dir in input_dirs:
+        for file_name in sorted(os.listdir(input_dir)):
+            output_path = os.path.join(output_dir, ImageSequenceRenderer.FILE_NAME.format(number))
+            if keep_inputs:
+                shutil.copyfile(os.path.join(input_dir, file_name), output_path)
+            else:
+                os.replace(os.path.join(input_dir, file_name), output_path)
+            number += 1
+        if not keep_inputs:
+            os.rmdir(input_dir)
+
+def concat_outputs(input_files, output_file, settings, keep_inputs=False):
+    """
+    Join the outputs of several renders: videos with concat_videos, image sequences with concat_image_sequences.
+    Spools are encoded into output_file, unless the settings leave them for a later encode (encode_spools False).
+    keep_inputs keeps the images of the sequences (videos are always kept).
+    """
+    if settings.get("spool", False):
+        from frameSpool import encode_spools
+        if settings.get("encode_spools", True):
+            encode_spools(input_files, output_file, settings)
+        else:
+            print(f"Spools ready, encode them with: python frameSpool.py encode {' '.join(input_files)} -o {output_file}")
+    elif settings.get("codec", "h264") == "png":
+        concat_image_sequences(input_files, output_file, keep_inputs)
+    else:
+        concat_videos(input_files, output_file)
+
+def render_scenes_parallel(scene_classes, output_file, settings, segments_dir="videos/segments", max_workers=None, cache_dir=None):
+    """
+    Render every scene in its own process and concatenate the segments into one video.
+    The total time is roughly the time of the longest scene (given enough cores).
+
+    Args:
+        scene_classes (list[type]): Scene subclasses, in playback order.
+        output_file (str): Path of the final video (or directory of the images).
+        settings (dict): Render settings passed to render_scene.
+        segments_dir (str): Directory for the per-scene videos.
+        max_workers (int): Number of worker processes (default: one per scene, up to the CPU count).
+        cache_dir (str): Render cache (see renderCache.py): scenes whose code and settings did not change
+                         since they were rendered are copied from it instead of rendered. None renders every scene.
+
+    Returns:
+        list[str]: Paths of the per-scene videos.
+    """
+    import renderCache
+
+    use_cache = cache_dir is not None and not settings.get("spool", False)  # Raw spools are too big to keep
+    os.makedirs(cache_dir if use_cache else segments_dir, exist_ok=True)
+    if use_cache:
+        segment_files, hits = zip(*(renderCache.lookup(scene_class, settings, cache_dir) for scene_class in scene_classes))
+    else:
+        segment_files = [
+            os.path.join(segments_dir, f"{index:02d}_{scene_class.__name__}{get_render_extension(settings)}")
+            for index, scene_class in enumerate(scene_classes)
+        ]
+        hits = [False] * len(scene_classes)
+
+    # Only the scenes missing from the cache are rendered, into a partial file stored once it is complete
+    missing = [(scene_class, segment_file) for scene_class, segment_file, hit in zip(scene_classes, segment_files, hits) if not hit]
+    if use_cache:
+        print(f"Render cache: {len(scene_classes) - len(missing)} of {len(scene_classes)} scenes unchanged")
+
+    if missing:
+        if max_workers is None:
+            max_workers = min(len(missing), os.cpu_count() or 1)
+
+        # Spawn (not fork) so every worker starts with a clean pygame/SDL state
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [
+                executor.submit(render_scene, scene_class, renderCache.get_partial_path(segment_file) if use_cache else segment_file, settings)
+                for scene_class, segment_file in missing
+            ]
+            for future, (_, segment_file) in zip(futures, missing):
+                future.result()  # Re-raise any worker error
+                if use_cache:
+                    renderCache.store(renderCache.get_partial_path(segment_file), segment_file)
+
+    concat_outputs(list(segment_files), output_file, settings, keep_inputs=use_cache)
+    return list(segment_files)
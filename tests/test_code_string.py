@@ -0,0 +1,38 @@
+#test_code_string.py
+
+import pytest
+from objects.code_string import CodeString
+from benchmarks.bench_tokenizer import SYNTHETIC_CODE, legacy_tokenize_line
+
+TRICKY_LINES = [
+    "",
+    "    ",
+    'printf("a \\"quoted\\" %d", x); // done',
+    "#include <stdio.h> /* unterminated",
+    "char c = '<'; if (a < b && b > c) { return a/b; }",
+    "x = 1.5e3 + 0x1F - .5;",
+    "std::vector<int> max_numbers[10];",
+]
+
+@pytest.fixture
+def code():
+    return CodeString(0, 0, 100, variables=["a", "b", "max_number", "values"], functions=["calculate_max"], custom_types=["vector"])
+
+def test_compiled_lexer_matches_legacy_lexer(code):
+    for line in SYNTHETIC_CODE.split("\n") + TRICKY_LINES:
+        assert code.tokenize_line(line) == legacy_tokenize_line(code, line), line
+
+def test_retokenize_tail_matches_full_lexing(code):
+    for target in SYNTHETIC_CODE.split("\n") + TRICKY_LINES:
+        # Typed one character at a time, then erased, like type_and_erase_text
+        edits = [target[:length] for length in range(len(target) + 1)]
+        edits += edits[-2::-1]
+        for old_line, line in zip(edits, edits[1:]):
+            tokens = code.retokenize_tail(old_line, tuple(code.tokenize_line(old_line)), line)
+            assert tokens == tuple(code.tokenize_line(line)), (old_line, line)
+
+def test_line_tokens_follow_edits(code):
+    code.code_text = "int a = 1;\nint b = 2;"
+    for line in ["int a = 1", "int a = 1 + b", 'int a = "1 + b', "int ab = 1 + b;", ""]:
+        code.set_line(0, line)
+        assert code.get_line_tokens(0, line) == tuple(code.tokenize_line(line))
@@ -0,0 +1,76 @@
+#test_frame_spool.py
+
+import shutil
+import subprocess
+
+import pytest
+import frameSpool
+from frameSpool import SpoolRenderer, FrameSpool, SpoolSequence, encode_spools
+
+WIDTH, HEIGHT = 64, 32  # Big enough for the 16 slices of FFV1
+
+def make_frames(count, first_value=0):
+    """Return count distinct rgb24 frames."""
+    return [bytes([(first_value + number) % 256]) * (WIDTH * HEIGHT * 3) for number in range(count)]
+
+def write_spool(path, frames, repeats):
+    """Write frames into a spool, repeating the frame before every index in repeats. Return the frames of the video."""
+    renderer = SpoolRenderer(30, WIDTH, HEIGHT, str(path))
+    video = []
+    for frame in frames:
+        renderer.send_frame(frame)
+        video.append(frame)
+        while len(video) in repeats:
+            renderer.repeat_frame()
+            video.append(frame)
+    renderer.close()
+    return video
+
+@pytest.fixture
+def small_segments(monkeypatch):
+    monkeypatch.setattr(frameSpool, "SEGMENT_FRAMES", 3)  # Frames cross segment files
+
+def test_spool_round_trip(tmp_path, small_segments):
+    video = write_spool(tmp_path / "spool", make_frames(7), repeats={2, 3, 9})
+
+    spool = FrameSpool(str(tmp_path / "spool"))
+    assert spool.complete
+    assert len(spool) == len(video) == 10
+    assert spool.info["stored_frames"] == 7
+    assert [bytes(spool.get_frame(number)) for number in range(len(spool))] == video
+
+def test_sequence_of_spools(tmp_path, small_segments):
+    first = write_spool(tmp_path / "first", make_frames(4), repeats={1})
+    second = write_spool(tmp_path / "second", make_frames(3, first_value=100), repeats={3})
+
+    sequence = SpoolSequence([str(tmp_path / "first"), str(tmp_path / "second")])
+    video = first + second
+    assert sequence.get_available() == len(video)
+    assert [bytes(sequence.get_frame(number)) for number in range(len(video))] == video
+    assert [number for number in range(len(video)) if sequence.is_repeat(number)] == [1, 8]
+
+def test_incomplete_spool_ends_at_its_last_indexed_frame(tmp_path):
+    renderer = SpoolRenderer(30, WIDTH, HEIGHT, str(tmp_path / "spool"))
+    frames = make_frames(3)
+    for frame in frames:
+        renderer.send_frame(frame)
+    renderer.frame_queue.put(None)  # Stop the writer without finishing, like an interrupted render
+    renderer.join()
+    renderer.index_file.close()
+    renderer.segment_file.close()
+
+    spool = FrameSpool(str(tmp_path / "spool"))
+    assert not spool.complete
+    assert [bytes(spool.get_frame(number)) for number in range(len(spool))] == frames
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs FFmpeg")
+def test_encode_spools_losslessly(tmp_path, small_segments):
+    video = write_spool(tmp_path / "first", make_frames(5), repeats={2})
+    video += write_spool(tmp_path / "second", make_frames(4, first_value=50), repeats={4, 5})
+
+    output_file = str(tmp_path / "video.mkv")
+    spools = [str(tmp_path / "first"), str(tmp_path / "second")]
+    assert encode_spools(spools, output_file, {"codec": "ffv1"}, part_frames=4) == len(video)
+
+    decoded = subprocess.run(["ffmpeg", "-loglevel", "error", "-i", output_file, "-f", "rawvideo", "-pix_fmt", "rgb24", "-"], check=True, capture_output=True).stdout
+    assert decoded == b"".join(video)
@@ -0,0 +1,7 @@
+#test_instruction_grid.py
+
+from benchmarks.bench_instruction_grid import find_first_difference, RELAUNCH_TICK
+
+def test_grid_draws_like_instruction_objects():
+    # Executions, errors, moves, resets and the executed animations started again after RELAUNCH_TICK
+    assert find_first_difference(150, RELAUNCH_TICK + 60) is None
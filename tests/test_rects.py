@@ -0,0 +1,20 @@
+#test_rects.py
+
+import random
+import pygame
+from utils.rects import merge_rects
+
+def test_merged_rects_cover_the_input_without_overlapping():
+    generator = random.Random(0)
+    rects = [pygame.Rect(generator.randrange(500), generator.randrange(500), generator.randrange(1, 80), generator.randrange(1, 80)) for _ in range(60)]
+    merged = merge_rects(rects, max_rects=100)
+
+    for index, rect in enumerate(merged):
+        assert rect.collidelist(merged[index + 1:]) == -1
+    for rect in rects:
+        assert any(merged_rect.contains(rect) for merged_rect in merged)
+
+def test_too_many_rects_become_their_union():
+    rects = [pygame.Rect(x * 20, 0, 10, 10) for x in range(5)]
+    assert merge_rects(rects, max_rects=5) == rects
+    assert merge_rects(rects, max_rects=4) == [pygame.Rect(0, 0, 90, 10)]
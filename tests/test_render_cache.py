@@ -0,0 +1,23 @@
+#test_render_cache.py
+
+import pytest
+import renderCache
+from scene.scene_code import SceneCode
+
+SCENE_CODE, SCENE_INSTRUCTIONS = renderCache.CHECKED_SCENES
+
+@pytest.mark.parametrize("module_name, unchanged", [
+    ("utils.colors", []),  # Constants, imported with "import *"
+    ("scene.scene_instructions", [SCENE_CODE]),
+    ("objects.code_string", [SCENE_INSTRUCTIONS]),
+])
+def test_editing_a_module_changes_only_the_keys_of_the_scenes_using_it(module_name, unchanged):
+    assert renderCache.check_module_in_keys(module_name, renderCache.CHECKED_SCENES) == unchanged
+
+def test_key_follows_the_render_settings():
+    settings = {"width": 1920, "height": 1080, "framerate": 60, "codec": "h264", "crf": 23}
+    key = renderCache.get_scene_key(SceneCode, settings)
+    assert renderCache.get_scene_key(SceneCode, dict(settings)) == key
+    assert renderCache.get_scene_key(SceneCode, dict(settings, profile=True)) == key  # Not in the frames
+    for name, value in [("crf", 18), ("codec", "ffv1"), ("width", 1280), ("dirty_rects", True)]:
+        assert renderCache.get_scene_key(SceneCode, dict(settings, **{name: value})) != key, name
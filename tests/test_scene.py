@@ -0,0 +1,35 @@
+#test_scene.py
+
+import pygame
+import pytest
+from scene.scene_code import SceneCode
+from scene.scene_instructions import SceneInstructions
+
+BACKGROUND_COLOR = (0, 0, 0)
+
+@pytest.mark.parametrize("scene_class, ticks", [(SceneCode, 400), (SceneInstructions, 300)])
+def test_redraw_matches_drawing_every_frame(scene_class, ticks):
+    redrawn, drawn = scene_class(), scene_class()
+    redrawn_screen, drawn_screen = pygame.Surface((1920, 1080)), pygame.Surface((1920, 1080))
+    for tick in range(ticks):
+        redrawn.update(tick)
+        drawn.update(tick)
+        redrawn.redraw(redrawn_screen, BACKGROUND_COLOR, full=tick == 0)
+        drawn_screen.fill(BACKGROUND_COLOR)
+        drawn.draw(drawn_screen)
+        assert pygame.image.tobytes(redrawn_screen, "RGB") == pygame.image.tobytes(drawn_screen, "RGB"), tick
+
+def test_static_layer_follows_the_gutter():
+    composed, drawn = SceneCode(), SceneCode()
+    composed_screen, drawn_screen = pygame.Surface((1920, 1080)), pygame.Surface((1920, 1080))
+    layer, layers_drawn = None, 0
+    for tick in range(150):
+        composed.update(tick)
+        drawn.update(tick)
+        composed.compose(composed_screen, BACKGROUND_COLOR)
+        layers_drawn += composed.static_layer is not layer
+        layer = composed.static_layer
+        drawn_screen.fill(BACKGROUND_COLOR)
+        drawn.draw(drawn_screen)
+        assert pygame.image.tobytes(composed_screen, "RGB") == pygame.image.tobytes(drawn_screen, "RGB"), tick
+    assert 1 < layers_drawn < 10  # Drawn again when the highlighted line changes, not every frame
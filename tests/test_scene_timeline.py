@@ -0,0 +1,45 @@
+#test_scene_timeline.py
+
+import pygame
+import pytest
+from scene.scene_code import SceneCode
+from scene.scene_instructions import SceneInstructions
+from scene.scene_timeline import SceneTimeline
+
+BACKGROUND_COLOR = (0, 0, 0)
+PLAYED_TICKS = 400
+SEEK_TARGETS = [137, 20, 399, 0, 250, 61, 60, 59]
+
+def draw_frame(scene):
+    """Return the pixels of the scene, composed like a render (static layer and dynamic children)."""
+    screen = pygame.Surface((1920, 1080))
+    scene.compose(screen, BACKGROUND_COLOR)
+    return pygame.image.tobytes(screen, "RGB")
+
+def play_linearly(scene_class, ticks, drawn_ticks):
+    """Return the frames after the updates drawn_ticks of a scene played from tick 0, by tick."""
+    scene = scene_class()
+    frames = {}
+    for tick in range(ticks):
+        scene.update(tick)
+        if tick in drawn_ticks:
+            frames[tick] = draw_frame(scene)
+    return frames
+
+@pytest.mark.parametrize("scene_class", [SceneCode, SceneInstructions])
+def test_seeking_matches_linear_playback(scene_class):
+    continued_ticks = range(SEEK_TARGETS[-1] + 1, PLAYED_TICKS + 100)
+    frames = play_linearly(scene_class, PLAYED_TICKS + 100, set(SEEK_TARGETS) | set(continued_ticks[::10]))
+
+    scene = scene_class()
+    timeline = SceneTimeline(scene, snapshot_interval=60)
+    assert timeline.seek(PLAYED_TICKS - 1) == PLAYED_TICKS - 1  # Forwards from the start
+    for target in SEEK_TARGETS:
+        assert timeline.seek(target) == target
+        assert draw_frame(scene) == frames[target], target
+
+    # Playing on after a seek goes on like the linear playback
+    for tick in continued_ticks:
+        timeline.update(tick)
+        if tick in frames:
+            assert draw_frame(scene) == frames[tick], tick
@@ -0,0 +1,49 @@
+#test_tween.py
+
+import numpy as np
+import pytest
+from objects.instruction_step import Instruction_step
+from utils.tween import (EASINGS, Tween, Keyframes, Steps, Approach, evaluate, evaluate_keyframe_steps,
+                         evaluate_approach, durations_at_speed)
+
+TICKS = range(-3, 120)
+
+@pytest.mark.parametrize("easing", sorted(EASINGS))
+def test_tween_matches_vectorized_evaluation(easing):
+    tween = Tween(5, 37, 10.0, -250.5, easing)
+    for tick in TICKS:
+        vectorized = evaluate(tick, np.array([5]), np.array([37]), np.array([10.0]), np.array([-250.5]), easing)
+        assert tween.value_at(tick) == pytest.approx(vectorized[0], abs=1e-9), tick
+    assert tween.value_at(42) == -250.5
+
+def test_keyframe_steps_match_vectorized_evaluation():
+    values = np.array([40.0, 60.0, 40.0, 52.0, 40.0])
+    durations = durations_at_speed(values, 3)
+    track = Keyframes(2, values, durations, speed=3)
+    for tick in TICKS:
+        vectorized = evaluate_keyframe_steps(tick, np.array([2]), values[None], durations[None], 3)
+        assert track.value_at(tick) == vectorized[0], tick
+    assert track.is_finished(track.end_tick) and not track.is_finished(track.end_tick - 1)
+
+def test_approach_matches_vectorized_evaluation():
+    approach = Approach(0, 2000.0, 450.0, 30)
+    for tick in TICKS:
+        assert approach.value_at(tick) == evaluate_approach(tick, np.array([0]), np.array([2000.0]), np.array([450.0]), np.array([30]))[0], tick
+
+@pytest.mark.parametrize("from_value, to_value, speed", [(40, 60, 3), (60, 40, 3), (10, 10, 2), (0, 7.5, 2.5)])
+def test_steps_match_incremental_stepping(from_value, to_value, speed):
+    steps = Steps(0, from_value, to_value, speed)
+    value = from_value
+    for tick in range(1, 30):
+        # What the incremental code did every tick: step toward the target, stop on it
+        value = min(value + speed, to_value) if to_value >= from_value else max(value - speed, to_value)
+        assert steps.value_at(tick) == value, tick
+        assert steps.is_finished(tick) == (value == to_value), tick
+
+def test_change_size_can_skip_ticks():
+    every_tick, skipping = Instruction_step(100, 100, 40), Instruction_step(100, 100, 40)
+    for tick in range(20):
+        every_tick.change_size(3, 60, 60, tick, maintain_center=True)
+        if tick % 4 == 0:
+            skipping.change_size(3, 60, 60, tick, maintain_center=True)
+            assert (skipping.posX, skipping.posY, skipping.sizeX) == (every_tick.posX, every_tick.posY, every_tick.sizeX), tick
@@ -0,0 +1,121 @@
+#test_video_renderer.py
+
+import io
+import shutil
+import subprocess
+from fractions import Fraction
+from types import SimpleNamespace
+
+import pytest
+from videoRenderer import VideoRenderer, CODECS
+from sceneRenderer import concat_videos
+
+# Matroska element ids read by the tests
+DOC_TYPE, TIMESTAMP_SCALE, TRACK_ENTRY, CODEC_ID, DEFAULT_DURATION = 0x4282, 0x2AD7B1, 0xAE, 0x86, 0x23E383
+VIDEO, PIXEL_WIDTH, PIXEL_HEIGHT, COLOUR_SPACE = 0xE0, 0xB0, 0xBA, 0x2EB524
+CLUSTER_TIMESTAMP, SIMPLE_BLOCK = 0xE7, 0xA3
+
+def read_vint(data, pos, keep_marker=False):
+    """Read an EBML variable length integer at pos: return (value, position after it)."""
+    length = 9 - data[pos].bit_length()
+    value = int.from_bytes(data[pos:pos + length], "big")
+    if not keep_marker:
+        value &= (1 << (7 * length)) - 1
+        if value == (1 << (7 * length)) - 1:
+            value = None  # Unknown size: up to the end of the parent
+    return value, pos + length
+
+def parse_elements(data, start=0, end=None):
+    """Return the (id, data) of the elements between start and end."""
+    end = len(data) if end is None else end
+    elements = []
+    pos = start
+    while pos < end:
+        element_id, pos = read_vint(data, pos, keep_marker=True)
+        size, pos = read_vint(data, pos)
+        size = end - pos if size is None else size
+        elements.append((element_id, data[pos:pos + size]))
+        pos += size
+    return elements
+
+def children(data):
+    """Return the child elements of a master element as a dict (the last one of each id)."""
+    return dict(parse_elements(data))
+
+def create_stream_writer(framerate):
+    """Return a VideoRenderer that writes its Matroska stream into a BytesIO (no FFmpeg, no thread)."""
+    renderer = VideoRenderer.__new__(VideoRenderer)
+    renderer.framerate = Fraction(str(framerate))
+    renderer.last_written = renderer.last_repeated = None
+    renderer.ffmpeg = SimpleNamespace(stdin=io.BytesIO())
+    return renderer
+
+def test_stream_header():
+    renderer = create_stream_writer(30)
+    (header_id, header), (segment_id, segment) = parse_elements(renderer.get_stream_header(16, 8, "bgr0"))
+    assert (header_id, segment_id) == (VideoRenderer.EBML_HEADER, VideoRenderer.SEGMENT)
+    assert children(header)[DOC_TYPE] == b"matroska"
+
+    segment = children(segment)
+    assert int.from_bytes(children(segment[VideoRenderer.INFO])[TIMESTAMP_SCALE], "big") == 1  # Nanoseconds
+    track = children(children(segment[VideoRenderer.TRACKS])[TRACK_ENTRY])
+    assert track[CODEC_ID] == b"V_UNCOMPRESSED"
+    assert int.from_bytes(track[DEFAULT_DURATION], "big") == round(10**9 / 30)
+    video = children(track[VIDEO])
+    assert int.from_bytes(video[PIXEL_WIDTH], "big") == 16
+    assert int.from_bytes(video[PIXEL_HEIGHT], "big") == 8
+    assert video[COLOUR_SPACE] == b"BGR\0"
+
+def test_cluster_timestamps_skip_repeats():
+    renderer = create_stream_writer("60/4")
+    frames = [bytes([value]) * 12 for value in range(3)]
+    renderer.write_frame(frames[0], 0)
+    renderer.write_frame(frames[1], 1)
+    renderer.write_repeated_frame(frames[1], 2)
+    renderer.write_repeated_frame(frames[1], 3)
+    renderer.write_frame(frames[2], 4)
+
+    clusters = parse_elements(renderer.ffmpeg.stdin.getvalue())
+    assert [element_id for element_id, _ in clusters] == [VideoRenderer.CLUSTER] * 3
+    timestamps, pixels = [], []
+    for _, cluster in clusters:
+        cluster = children(cluster)
+        timestamps.append(int.from_bytes(cluster[CLUSTER_TIMESTAMP], "big"))
+        block = cluster[SIMPLE_BLOCK]
+        assert block[:4] == bytes([0x81, 0, 0, 0x80])  # Track 1, no relative timestamp, keyframe
+        pixels.append(block[4:])
+    assert timestamps == [0, round(10**9 / 15), round(4 * 10**9 / 15)]
+    assert pixels == frames
+
+def read_frame_timestamps(path):
+    """Return the timestamps of the frames of a video (in its stream time base), decoded by FFmpeg."""
+    output = subprocess.run(["ffmpeg", "-loglevel", "error", "-i", path, "-f", "framemd5", "-"], check=True, capture_output=True, text=True).stdout
+    return [int(line.split(",")[1]) for line in output.splitlines() if not line.startswith("#")]
+
+def render_video(path, codec, colors):
+    """Render frames of the given colors (None repeats the previous frame) with a VideoRenderer."""
+    renderer = VideoRenderer(30, 16, 16, str(path), pix_fmt="rgb24", codec=codec)
+    for color in colors:
+        if color is None:
+            renderer.repeat_frame()
+        else:
+            renderer.send_frame(bytes(color) * 16 * 16)
+    renderer.close()
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs FFmpeg")
+@pytest.mark.parametrize("codec", ["h264", "ffv1"])
+def test_repeated_frames_keep_a_constant_frame_rate(tmp_path, codec):
+    colors = [(255, 0, 0), None, None, (0, 255, 0), (0, 0, 255), None]
+    extension = CODECS[codec][0]
+    segments = [tmp_path / f"segment_{index}{extension}" for index in range(2)]
+    for segment in segments:
+        render_video(segment, codec, colors)
+        timestamps = read_frame_timestamps(str(segment))
+        assert len(timestamps) == len(colors)
+        assert len({later - earlier for earlier, later in zip(timestamps, timestamps[1:])}) == 1
+
+    joined = str(tmp_path / f"joined{extension}")
+    concat_videos([str(segment) for segment in segments], joined)
+    timestamps = read_frame_timestamps(joined)
+    assert len(timestamps) == 2 * len(colors)
+    assert len({later - earlier for earlier, later in zip(timestamps, timestamps[1:])}) == 1
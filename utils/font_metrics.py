@@ -0,0 +1,93 @@
+#font_metrics.py
+
+import os
+import string
+
+PROBE_CHARACTERS = string.digits + string.ascii_letters + string.punctuation + " "  # Compared to detect monospace fonts
+
+class FontMetrics:
+    """
+    Measurements of a font taken once, so laying out text does not ask the font again.
+    In a monospace font every character advances by the same width: column to pixel
+    conversions and text widths are then plain arithmetic.
+    """
+
+    def __init__(self, font):
+        """
+        Args:
+            font (pygame.font.Font): The font to measure.
+        """
+        self.font = font
+        self.height = font.get_height()
+        self.line_size = font.get_linesize()
+        self.glyph_extents = {character: self.measure_glyph(character) for character in PROBE_CHARACTERS}  # See get_glyph_extent
+
+        advances = {extent[2] for extent in self.glyph_extents.values() if extent is not None}
+        self.monospace = len(advances) == 1
+        self.advance = advances.pop() if self.monospace else font.size("0")[0]
+        self.uniform_characters = {character for character, extent in self.glyph_extents.items() if self.advances_uniformly(extent)}
+
+    def measure_glyph(self, character):
+        """Return the extent of a character (see get_glyph_extent), asking the font."""
+        metrics = self.font.metrics(character)[0]
+        if metrics is None:
+            return None
+        minx, maxx, _, _, advance = metrics
+        return (min(0, minx), max(maxx, advance), advance)
+
+    def advances_uniformly(self, extent):
+        """Return True if a glyph of this extent advances like every character of a monospace font."""
+        return self.monospace and extent is not None and extent[2] == self.advance
+
+    def get_glyph_extent(self, character):
+        """
+        Return the horizontal extent of a character: (left, right, advance). left is negative when the glyph
+        starts before its position, right is the furthest of its ink and its advance. None for missing glyphs.
+        """
+        if character not in self.glyph_extents:
+            extent = self.glyph_extents[character] = self.measure_glyph(character)
+            if self.advances_uniformly(extent):
+                self.uniform_characters.add(character)
+        return self.glyph_extents[character]
+
+    def is_uniform(self, text):
+        """Return True if every character of text advances by self.advance (always False for proportional fonts)."""
+        if not self.monospace:
+            return False
+        unknown = set(text).difference(self.uniform_characters)
+        for character in unknown:
+            self.get_glyph_extent(character)
+        return not unknown.difference(self.uniform_characters)
+
+    def column_x(self, column):
+        """Return the x offset (in pixels) of a column of a monospace line."""
+        return column * self.advance
+
+    def text_width(self, text):
+        """
+        Return the width of text as rendered, equal to font.size(text)[0]: in a monospace font, the
+        columns it spans plus the overhang of its first and last glyphs.
+        """
+        if not text:
+            return 0
+        if not self.is_uniform(text):
+            return self.font.size(text)[0]
+        return self.column_x(len(text) - 1) + self.glyph_extents[text[-1]][1] - self.glyph_extents[text[0]][0]
+
+FONT_METRICS = {}  # (font path, size, bold, italic) -> FontMetrics
+
+def get_font_metrics(font, font_path, size):
+    """
+    Return the metrics of a font, measured the first time a font of the same file, size and style is asked for.
+    Objects create their own Font instances: keying by instance would keep every one of them alive.
+
+    Args:
+        font (pygame.font.Font): The font, measured if no font of the same key was.
+        font_path (str): Path of the font file the font was created from.
+        size (int): Size the font was created with.
+    """
+    key = (os.path.abspath(font_path), size, font.get_bold(), font.get_italic())
+    metrics = FONT_METRICS.get(key)
+    if metrics is None:
+        metrics = FONT_METRICS[key] = FontMetrics(font)
+    return metrics
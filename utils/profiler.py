@@ -0,0 +1,246 @@
+#profiler.py
+
+import json
+import time
+import functools
+import threading
+from collections import defaultdict, deque
+
+import numpy as np
+
+PROFILED_METHODS = ("update", "draw")  # Methods of every Object subclass timed while profiling
+MAX_TRACE_EVENTS = 200000  # Raw events kept for the Chrome trace (the most recent ones), about 30 MB
+
+class NullSpan:
+    """Context manager that does nothing: what span() returns while profiling is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_SPAN = NullSpan()
+
+class Span:
+    """Context manager that records the time spent inside it as one event of the profiler."""
+
+    __slots__ = ("profiler", "name", "category", "start")
+
+    def __init__(self, profiler, name, category):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.add_event(self.name, self.category, self.start, time.perf_counter())
+        return False
+
+class Profiler:
+    """
+    Opt-in timing of a render: update/draw of every Object subclass and scene, and any span of code
+    (capture, queue wait, FFmpeg writes...), aggregated per frame and exportable as a Chrome trace.
+
+    Spans also run on the writer threads of the renderers. Only the events of the render thread (the one
+    that enabled the profiler and closes the frames) are aggregated per frame: the others are not in step
+    with the frames, so they are aggregated per call and reported separately.
+
+    The per-frame times are aggregated as the events come: only the last MAX_TRACE_EVENTS raw events
+    are kept, for the trace, so profiling a long render takes bounded memory.
+
+    While disabled nothing is wrapped: the objects run their own methods and span() returns NULL_SPAN,
+    so it can stay in production renders.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.events = deque(maxlen=MAX_TRACE_EVENTS)  # Last (name, category, thread id, start, end) in perf_counter seconds
+        self.calls = defaultdict(int)  # Number of calls of every event of the render thread
+        self.frames = []  # Seconds per event name of every finished frame
+        self.current_frame = defaultdict(float)
+        self.background_calls = defaultdict(list)  # Seconds of every call of the events of other threads
+        self.render_thread = threading.get_ident()
+        self.lock = threading.Lock()  # Events are added by the render and writer threads
+        self.wrapped = []  # (class, method name, original method) restored by disable()
+
+    def enable(self, classes=None):
+        """
+        Start profiling, timing the update and draw methods of every Object subclass.
+
+        Args:
+            classes (list[type]): Classes to time (default: every Object subclass defined so far).
+        """
+        if self.enabled:
+            return
+        if classes is None:
+            from objects.object import Object
+            classes = get_subclasses(Object)
+
+        for cls in classes:
+            category = "scene" if cls.__module__.startswith("scene.") else "object"
+            for method_name in PROFILED_METHODS:
+                method = cls.__dict__.get(method_name)
+                if method is None or getattr(method, "__isabstractmethod__", False):
+                    continue
+                setattr(cls, method_name, self.wrap(method, f"{cls.__name__}.{method_name}", category))
+                self.wrapped.append((cls, method_name, method))
+
+        self.origin = time.perf_counter()
+        self.render_thread = threading.get_ident()
+        self.enabled = True
+
+    def disable(self):
+        """Stop profiling and restore the original methods. The recorded events are kept."""
+        for cls, method_name, method in reversed(self.wrapped):
+            setattr(cls, method_name, method)
+        self.wrapped.clear()
+        self.enabled = False
+
+    def reset(self):
+        """Forget every recorded event and frame."""
+        with self.lock:
+            self.events.clear()
+            self.calls.clear()
+            self.frames.clear()
+            self.current_frame.clear()
+            self.background_calls.clear()
+
+    def wrap(self, method, name, category):
+        """Return method timed as an event called name."""
+        profiler = self
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                profiler.add_event(name, category, start, time.perf_counter())
+        return timed
+
+    def span(self, name, category="render"):
+        """Return a context manager timing its block as an event called name (NULL_SPAN if disabled)."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, category)
+
+    def add_event(self, name, category, start, end):
+        """Record an event that ran from start to end (perf_counter seconds), in the current frame if it ran on the render thread."""
+        thread_id = threading.get_ident()
+        with self.lock:
+            self.events.append((name, category, thread_id, start, end))
+            if thread_id == self.render_thread:
+                self.current_frame[name] += end - start
+                self.calls[name] += 1
+            else:
+                self.background_calls[name].append(end - start)
+
+    def end_frame(self):
+        """Close the current frame: the events recorded since the previous call belong to it."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.frames.append(dict(self.current_frame))
+            self.current_frame.clear()
+
+    def get_frame_times(self, name):
+        """Return the milliseconds spent in an event in every frame (0 in frames where it did not run)."""
+        return np.array([frame.get(name, 0) for frame in self.frames]) * 1000
+
+    def get_summary(self, bins=10):
+        """
+        Return per-frame statistics and a histogram of every event of the render thread.
+
+        Returns:
+            dict: name -> calls, total_ms, mean_ms, p50_ms, p95_ms, max_ms (per frame),
+                  and histogram (counts and bin edges in ms of the per-frame times).
+        """
+        with self.lock:
+            calls = dict(self.calls)
+        return {name: get_stats(self.get_frame_times(name), calls[name], bins) for name in sorted(calls)}
+
+    def get_background_summary(self, bins=10):
+        """
+        Return per-call statistics and a histogram of every event of the other threads (writer threads).
+
+        Returns:
+            dict: name -> calls, total_ms, mean_ms, p50_ms, p95_ms, max_ms (per call), and histogram.
+        """
+        with self.lock:
+            background_calls = {name: np.array(times) * 1000 for name, times in self.background_calls.items()}
+        return {name: get_stats(times, len(times), bins) for name, times in sorted(background_calls.items())}
+
+    def print_summary(self):
+        """Print the per-frame time of every event, slowest first."""
+        summary = self.get_summary()
+        print(f"Profile of {len(self.frames)} frames (ms per frame):")
+        print(f"  {'event':<40} {'mean':>8} {'p50':>8} {'p95':>8} {'max':>8} {'calls':>8}")
+        for name, stats in sorted(summary.items(), key=lambda item: -item[1]["total_ms"]):
+            print(f"  {name:<40} {stats['mean_ms']:8.3f} {stats['p50_ms']:8.3f} {stats['p95_ms']:8.3f} {stats['max_ms']:8.3f} {stats['calls']:8d}")
+
+        background_summary = self.get_background_summary()
+        if background_summary:
+            print("Other threads (ms per call):")
+            print(f"  {'event':<40} {'mean':>8} {'p50':>8} {'p95':>8} {'max':>8} {'calls':>8}")
+            for name, stats in sorted(background_summary.items(), key=lambda item: -item[1]["total_ms"]):
+                print(f"  {name:<40} {stats['mean_ms']:8.3f} {stats['p50_ms']:8.3f} {stats['p95_ms']:8.3f} {stats['max_ms']:8.3f} {stats['calls']:8d}")
+
+    def export_chrome_trace(self, path):
+        """Write the last MAX_TRACE_EVENTS events as a Chrome trace (open it in chrome://tracing or https://ui.perfetto.dev)."""
+        with self.lock:
+            events = list(self.events)
+        trace_events = [
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",  # Complete event: start and duration
+                "ts": (start - self.origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": 0,
+                "tid": thread_id,
+            }
+            for name, category, thread_id, start, end in events
+        ]
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, trace_file)
+
+    def export_json(self, path):
+        """Write the per-frame summary and histograms as JSON."""
+        with open(path, "w") as summary_file:
+            json.dump({"frames": len(self.frames), "events": self.get_summary(), "background_events": self.get_background_summary()}, summary_file, indent=2)
+
+    def save(self, base_path):
+        """Print the summary and write it to base_path.profile.json, with the trace in base_path.trace.json."""
+        self.print_summary()
+        self.export_json(f"{base_path}.profile.json")
+        self.export_chrome_trace(f"{base_path}.trace.json")
+
+def get_stats(times, calls, bins):
+    """Return the statistics and histogram of times (ms) reported for an event called calls times."""
+    if len(times) == 0:
+        times = np.zeros(1)
+    counts, edges = np.histogram(times, bins=bins)
+    return {
+        "calls": calls,
+        "total_ms": float(times.sum()),
+        "mean_ms": float(times.mean()),
+        "p50_ms": float(np.percentile(times, 50)),
+        "p95_ms": float(np.percentile(times, 95)),
+        "max_ms": float(times.max()),
+        "histogram": {"counts": counts.tolist(), "edges_ms": edges.tolist()},
+    }
+
+def get_subclasses(cls):
+    """Return every subclass of cls, recursively."""
+    subclasses = []
+    for subclass in cls.__subclasses__():
+        subclasses.append(subclass)
+        subclasses.extend(get_subclasses(subclass))
+    return list(dict.fromkeys(subclasses))  # Once each, even with multiple inheritance
+
+PROFILER = Profiler()  # Shared by the renderers and the main loop
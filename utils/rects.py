@@ -0,0 +1,42 @@
+#rects.py
+
+import math
+import pygame
+from utils.viewport import scaled_rect
+
+def bounding_rect(x, y, width, height, margin=1):
+    """
+    Return the integer pygame.Rect covering a float rectangle, grown by margin pixels on each side
+    so that rounding in the pygame.draw functions stays inside it.
+    The rectangle is given in layout coordinates and returned in render surface pixels (see utils.viewport).
+    """
+    x, y, width, height = scaled_rect(x, y, width, height)
+    left = math.floor(x) - margin
+    top = math.floor(y) - margin
+    right = math.ceil(x + width) + margin
+    bottom = math.ceil(y + height) + margin
+    return pygame.Rect(left, top, right - left, bottom - top)
+
+def merge_rects(rects, max_rects):
+    """
+    Merge overlapping rectangles. If more than max_rects remain, return their union.
+
+    Args:
+        rects (list[pygame.Rect]): Rectangles to merge.
+        max_rects (int): Maximum number of rectangles returned.
+
+    Returns:
+        list[pygame.Rect]: Non overlapping rectangles covering all of rects.
+    """
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        index = rect.collidelist(merged)
+        while index != -1:
+            rect.union_ip(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+
+    if len(merged) > max_rects:
+        return [merged[0].unionall(merged[1:])]
+    return merged
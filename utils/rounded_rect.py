@@ -1,12 +1,96 @@
 #rounded_rect.py
 
 import pygame
+import pygame.gfxdraw
+from utils.surface_cache import SurfaceCache
+
+# Rectángulos ya dibujados, por (ancho, alto, color, radio, antialias)
+ROUNDED_RECT_CACHE = SurfaceCache(16 * 1024 * 1024)
 
 # Función para dibujar un rectángulo con bordes redondeados
-def draw_rounded_rect(screen, rect, color, corner_radius):
+def draw_rounded_rect(screen, rect, color, corner_radius, antialias=False):
     """
     Dibuja un rectángulo con bordes redondeados.
-    
+
+    El rectángulo se dibuja una sola vez en una superficie que se guarda en caché y
+    después se copia con un único blit. La posición y el tamaño se redondean a píxeles
+    enteros, así que los tamaños que cambian en cada frame (animaciones) también se reutilizan.
+
+    Args:
+        screen: Superficie donde se dibujará (pantalla o superficie personalizada).
+        rect: Rectángulo (x, y, ancho, alto).
+        color: Color del rectángulo en formato RGB.
+        corner_radius: Radio de los bordes redondeados.
+        antialias: Suavizar los bordes de las esquinas.
+    """
+    x, y, width, height = rect
+    width, height = int(round(width)), int(round(height))
+    if width <= 0 or height <= 0:
+        return
+    if 2 * corner_radius > min(width, height):
+        # Las esquinas se salen del rectángulo: no cabe en una superficie de su tamaño
+        draw_rounded_rect_primitives(screen, rect, color, corner_radius)
+        return
+
+    screen.blit(get_rounded_rect_sprite(width, height, color, corner_radius, antialias), (int(x), int(y)))
+
+def get_rounded_rect_sprite(width, height, color, corner_radius, antialias=False):
+    """
+    Devuelve la superficie en caché con el rectángulo redondeado, creándola si no existe.
+
+    Args:
+        width: Ancho del rectángulo en píxeles (entero).
+        height: Alto del rectángulo en píxeles (entero).
+        color: Color del rectángulo en formato RGB.
+        corner_radius: Radio de los bordes redondeados.
+        antialias: Suavizar los bordes de las esquinas.
+    """
+    key = (width, height, tuple(color), int(corner_radius), antialias)
+    sprite = ROUNDED_RECT_CACHE.get(key)
+    if sprite is None:
+        sprite = render_rounded_rect(width, height, color, int(corner_radius), antialias)
+        ROUNDED_RECT_CACHE.put(key, sprite)
+    return sprite
+
+def render_rounded_rect(width, height, color, corner_radius, antialias=False):
+    """
+    Crea una superficie transparente con el rectángulo redondeado dibujado en (0, 0).
+
+    Args:
+        width: Ancho del rectángulo en píxeles.
+        height: Alto del rectángulo en píxeles.
+        color: Color del rectángulo en formato RGB.
+        corner_radius: Radio de los bordes redondeados.
+        antialias: Suavizar los bordes de las esquinas (usa transparencia por píxel).
+    """
+    if antialias:
+        sprite = pygame.Surface((width, height), pygame.SRCALPHA)
+        sprite.fill((0, 0, 0, 0))
+    else:
+        # Color clave distinto del color del rectángulo: el blit con color clave es más rápido que con alfa
+        colorkey = tuple(255 - channel for channel in color[:3])
+        sprite = pygame.Surface((width, height))
+        sprite.fill(colorkey)
+        sprite.set_colorkey(colorkey, pygame.RLEACCEL)
+
+    draw_rounded_rect_primitives(sprite, (0, 0, width, height), color, corner_radius)
+
+    if antialias and corner_radius > 0:
+        # Bordes suavizados de las esquinas
+        for centerX, centerY in (
+            (corner_radius, corner_radius),
+            (width - corner_radius, corner_radius),
+            (corner_radius, height - corner_radius),
+            (width - corner_radius, height - corner_radius),
+        ):
+            pygame.gfxdraw.aacircle(sprite, centerX, centerY, corner_radius, color)
+
+    return sprite
+
+def draw_rounded_rect_primitives(screen, rect, color, corner_radius):
+    """
+    Dibuja un rectángulo con bordes redondeados con las primitivas de pygame.draw (4 círculos y 5 rectángulos).
+
     Args:
         screen: Superficie donde se dibujará (pantalla o superficie personalizada).
         rect: Rectángulo (x, y, ancho, alto).
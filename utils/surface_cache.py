@@ -0,0 +1,109 @@
+#surface_cache.py
+
+import pygame
+from collections import OrderedDict
+from utils.profiler import PROFILER
+
+def surface_bytes(surface):
+    """Return the memory used by the pixels of a surface."""
+    return surface.get_pitch() * surface.get_height()
+
+class SurfaceCache:
+    """Least recently used cache of surfaces, bounded by the memory of the pixels it holds."""
+
+    def __init__(self, max_bytes):
+        """
+        Args:
+            max_bytes (int): Maximum pixel memory kept in the cache.
+        """
+        self.max_bytes = max_bytes
+        self.surfaces = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the surface cached for key (marking it as recently used), or None."""
+        surface = self.surfaces.get(key)
+        if surface is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.surfaces.move_to_end(key)
+        return surface
+
+    def put(self, key, surface):
+        """Cache a surface, evicting the least recently used ones to stay under max_bytes."""
+        if key in self.surfaces:
+            self.bytes -= surface_bytes(self.surfaces.pop(key))
+        self.surfaces[key] = surface
+        self.bytes += surface_bytes(surface)
+
+        while self.bytes > self.max_bytes and len(self.surfaces) > 1:
+            _, evicted = self.surfaces.popitem(last=False)
+            self.bytes -= surface_bytes(evicted)
+
+    def clear(self):
+        """Remove every cached surface."""
+        self.surfaces.clear()
+        self.bytes = 0
+
+TEXT_CACHE = SurfaceCache(32 * 1024 * 1024)  # Rendered tokens and line numbers
+LINE_CACHE = SurfaceCache(64 * 1024 * 1024)  # Whole lines composed from their tokens
+FILL_CACHE = SurfaceCache(16 * 1024 * 1024)  # Solid color rectangles and translucent overlays
+
+def render_text(font, text, color, antialias=True):
+    """
+    Return font.render(text, antialias, color), rendered only the first time it is asked for.
+    The returned surface is shared: draw it, do not modify it.
+    """
+    key = (font, text, color, antialias)
+    surface = TEXT_CACHE.get(key)
+    if surface is None:
+        with PROFILER.span("font.render", "text"):
+            surface = font.render(text, antialias, color)
+        TEXT_CACHE.put(key, surface)
+    return surface
+
+def render_tokens(font, tokens, antialias=True):
+    """
+    Return a transparent surface with a line of (text, color) tokens rendered side by side.
+    Blitting it gives the same pixels as blitting every token surface at its offset.
+
+    Args:
+        font (pygame.font.Font): Font of the tokens.
+        tokens (tuple): (text, color) pairs, hashable so the line can be cached.
+        antialias (bool): Render antialiased text.
+    """
+    key = (font, tokens, antialias)
+    surface = LINE_CACHE.get(key)
+    if surface is None:
+        token_surfaces = [render_text(font, text, color, antialias) for text, color in tokens]
+        width = sum(token_surface.get_width() for token_surface in token_surfaces)
+        surface = pygame.Surface((max(width, 1), font.get_height()), pygame.SRCALPHA)
+
+        x_offset = 0
+        for token_surface in token_surfaces:
+            # Tokens do not overlap: MAX copies their pixels (alpha included) onto the transparent line
+            surface.blit(token_surface, (x_offset, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            x_offset += token_surface.get_width()
+
+        LINE_CACHE.put(key, surface)
+    return surface
+
+def solid_surface(width, height, color):
+    """
+    Return a surface of the given size filled with color, created only the first time it is asked for.
+    An RGB color gives an opaque surface: blitting it paints the same pixels as pygame.draw.rect.
+    An RGBA color gives a translucent overlay (surface alpha), e.g. for highlights.
+    The returned surface is shared: do not modify it.
+    """
+    key = (width, height, color)
+    surface = FILL_CACHE.get(key)
+    if surface is None:
+        surface = pygame.Surface((width, height))
+        if len(color) == 4:
+            surface.set_alpha(color[3])
+        surface.fill(color[:3])
+        FILL_CACHE.put(key, surface)
+    return surface
@@ -0,0 +1,328 @@
+#tween.py
+
+import math
+import numpy as np
+
+EASING_LUT_SIZE = 1025  # Samples of each easing curve between progress 0 and 1
+
+# Easing functions: progress (0 to 1) -> eased progress (0 to 1)
+EASINGS = {
+    "linear": lambda t: t,
+    "ease_in_quad": lambda t: t**2,
+    "ease_out_quad": lambda t: 1 - (1 - t)**2,
+    "cubic_in_out": lambda t: 3 * t**2 - 2 * t**3,  # Smooth acceleration and deceleration
+}
+
+# Precomputed lookup tables, evaluated with linear interpolation (as lists too, for the scalar evaluations)
+EASING_LUTS = {name: easing(np.linspace(0, 1, EASING_LUT_SIZE)) for name, easing in EASINGS.items()}
+EASING_LUT_LISTS = {name: lut.tolist() for name, lut in EASING_LUTS.items()}
+
+def ease(easing, progress):
+    """
+    Return the eased progress, read from the lookup table of the easing.
+
+    Args:
+        easing (str): Name of the easing (a key of EASINGS).
+        progress (numpy.ndarray): Progress values, clamped to 0..1.
+    """
+    lut = EASING_LUTS[easing]
+    position = np.clip(progress, 0, 1) * (EASING_LUT_SIZE - 1)
+    index = np.minimum(position.astype(np.int64), EASING_LUT_SIZE - 2)
+    fraction = position - index
+    return lut[index] + (lut[index + 1] - lut[index]) * fraction
+
+def evaluate(tick, start_ticks, durations, from_values, to_values, easing="linear"):
+    """
+    Evaluate many tweens at a tick in closed form.
+
+    Args:
+        tick (int): The tick to evaluate at.
+        start_ticks (numpy.ndarray): Tick at which each tween starts (its value is from_value there).
+        durations (numpy.ndarray): Ticks each tween lasts (its value is to_value from start + duration on).
+        from_values (numpy.ndarray): Values at the start.
+        to_values (numpy.ndarray): Values at the end.
+        easing (str): Name of the easing of every tween.
+
+    Returns:
+        numpy.ndarray: The value of every tween at tick.
+    """
+    progress = (tick - np.asarray(start_ticks)) / np.maximum(durations, 1)
+    eased = ease(easing, progress)
+    return np.where(progress >= 1, to_values, from_values + (np.asarray(to_values) - from_values) * eased)
+
+def evaluate_keyframes(tick, start_ticks, values, durations, easing="linear"):
+    """
+    Evaluate many keyframe tracks at a tick in closed form. Every track goes from values[:, k]
+    to values[:, k + 1] in durations[:, k] ticks, one segment after the other.
+
+    Args:
+        tick (int): The tick to evaluate at.
+        start_ticks (numpy.ndarray): Tick at which each track starts, shape (tracks,).
+        values (numpy.ndarray): Keyframe values, shape (tracks, segments + 1).
+        durations (numpy.ndarray): Ticks of each segment (at least 1), shape (tracks, segments).
+        easing (str): Name of the easing of every segment.
+
+    Returns:
+        numpy.ndarray: The value of every track at tick.
+    """
+    elapsed = tick - np.asarray(start_ticks)
+    rows, segment, segment_start = find_segments(elapsed, durations)
+    return evaluate(elapsed, segment_start, durations[rows, segment], values[rows, segment], values[rows, segment + 1], easing)
+
+def find_segments(elapsed, durations):
+    """
+    Return the segment every keyframe track plays after elapsed ticks: the first one that has not
+    ended (the last one once the track is over), as (rows, segment, tick the segment started).
+    """
+    segment_ends = np.cumsum(durations, axis=1)
+    rows = np.arange(len(segment_ends))
+    segment = np.minimum((segment_ends <= elapsed[:, np.newaxis]).sum(axis=1), durations.shape[1] - 1)
+    return rows, segment, segment_ends[rows, segment] - durations[rows, segment]
+
+def evaluate_steps(tick, start_ticks, from_values, to_values, speeds):
+    """
+    Evaluate many steppings at a tick in closed form: every tick the value changes by its speed toward
+    its target and stops on it, min(from + speed * elapsed, to) (the last step is clamped).
+
+    Args:
+        tick (int): The tick to evaluate at.
+        start_ticks (numpy.ndarray): Tick at which each stepping starts (its value is from_value there).
+        from_values (numpy.ndarray): Values at the start.
+        to_values (numpy.ndarray): Values stepped to.
+        speeds (numpy.ndarray): Change per tick.
+
+    Returns:
+        numpy.ndarray: The value of every stepping at tick.
+    """
+    moved = np.maximum(tick - np.asarray(start_ticks), 0) * np.asarray(speeds)
+    return np.where(to_values >= from_values, np.minimum(from_values + moved, to_values), np.maximum(from_values - moved, to_values))
+
+def evaluate_keyframe_steps(tick, start_ticks, values, durations, speeds):
+    """
+    Evaluate many keyframe tracks whose segments step by speed per tick (see evaluate_steps) instead of
+    following an easing. Each segment lasts the ticks its stepping needs (see durations_at_speed).
+
+    Args:
+        tick (int): The tick to evaluate at.
+        start_ticks (numpy.ndarray): Tick at which each track starts, shape (tracks,).
+        values (numpy.ndarray): Keyframe values, shape (tracks, segments + 1).
+        durations (numpy.ndarray): Ticks of each segment (at least 1), shape (tracks, segments).
+        speeds (float or numpy.ndarray): Change per tick of every track.
+
+    Returns:
+        numpy.ndarray: The value of every track at tick.
+    """
+    elapsed = tick - np.asarray(start_ticks)
+    rows, segment, segment_start = find_segments(elapsed, durations)
+    return evaluate_steps(elapsed, segment_start, values[rows, segment], values[rows, segment + 1], speeds)
+
+APPROACH_DIVISOR = 64  # An approach moves by its speed plus 1/APPROACH_DIVISOR of the remaining distance every tick
+APPROACH_TICKS = 4096  # Beyond this many ticks the distance left is below float precision: the approach has arrived
+
+# Precomputed (1 - 1/APPROACH_DIVISOR)^ticks, shared by the vectorized and scalar evaluations so they agree to the bit
+APPROACH_DECAY = (1 - 1 / APPROACH_DIVISOR) ** np.arange(APPROACH_TICKS, dtype=np.float64)
+APPROACH_DECAY[-1] = 0.0
+APPROACH_DECAY_LIST = APPROACH_DECAY.tolist()
+
+def evaluate_approach(tick, start_ticks, from_values, to_values, speeds):
+    """
+    Evaluate many approaches at a tick in closed form. Every tick an approach moves by its speed plus
+    1/APPROACH_DIVISOR of the distance left, so it slows down on arrival: the distance left after n ticks
+    is (distance + APPROACH_DIVISOR * speed) * (1 - 1/APPROACH_DIVISOR)^n - APPROACH_DIVISOR * speed, until 0.
+
+    Args:
+        tick (int): The tick to evaluate at.
+        start_ticks (numpy.ndarray): Tick at which each approach starts (its value is from_value there).
+        from_values (numpy.ndarray): Values at the start.
+        to_values (numpy.ndarray): Values approached (reached and kept).
+        speeds (numpy.ndarray): Constant part of the change per tick.
+
+    Returns:
+        numpy.ndarray: The value of every approach at tick.
+    """
+    elapsed = np.clip(tick - np.asarray(start_ticks), 0, APPROACH_TICKS - 1)
+    to_values = np.asarray(to_values, dtype=np.float64)
+    distance = np.abs(to_values - from_values)
+    settled = APPROACH_DIVISOR * np.abs(speeds)  # Distance that would be left forever without the speed
+    remaining = np.clip((distance + settled) * APPROACH_DECAY[elapsed] - settled, 0, distance)
+    return to_values - np.sign(to_values - from_values) * remaining
+
+def durations_at_speed(values, speed):
+    """
+    Return the ticks each keyframe segment needs to step by speed per tick (values has keyframes on the
+    last axis). A segment that does not change still takes one tick.
+    """
+    return np.maximum(1, np.ceil(np.abs(np.diff(values, axis=-1)) / speed))
+
+def centering_offsets(sizes, durations, speed):
+    """
+    Return the keyframes of the offset of a position kept centered on sizes stepping by speed: it moves
+    by half the speed on every tick of a segment that changes the size (the clamped last step too).
+
+    Args:
+        sizes (numpy.ndarray): Size keyframes on the last axis.
+        durations (numpy.ndarray): Ticks of each segment, from durations_at_speed.
+        speed (float): Size change per tick.
+    """
+    moves = -np.sign(np.diff(sizes, axis=-1)) * (speed / 2) * durations
+    return np.concatenate([np.zeros(sizes.shape[:-1] + (1,)), np.cumsum(moves, axis=-1)], axis=-1)
+
+def ease_value(easing, progress):
+    """Return the eased progress of one value, same as ease without arrays."""
+    lut = EASING_LUT_LISTS[easing]
+    position = min(max(progress, 0), 1) * (EASING_LUT_SIZE - 1)
+    index = min(int(position), EASING_LUT_SIZE - 2)
+    fraction = position - index
+    return lut[index] + (lut[index + 1] - lut[index]) * fraction
+
+def tween_value(tick, start_tick, duration, from_value, to_value, easing):
+    """Return the value of one tween at tick, same as evaluate without arrays."""
+    progress = (tick - start_tick) / max(duration, 1)
+    if progress >= 1:
+        return float(to_value)
+    return from_value + (to_value - from_value) * ease_value(easing, progress)
+
+def step_value(elapsed, from_value, to_value, speed):
+    """Return one value stepped for elapsed ticks, same as evaluate_steps without arrays."""
+    moved = max(elapsed, 0) * speed
+    if to_value >= from_value:
+        return float(min(from_value + moved, to_value))
+    return float(max(from_value - moved, to_value))
+
+def get_end_tick(start_tick, durations):
+    """Return the tick from which a tween or keyframe track keeps its final value."""
+    return start_tick + sum(durations)
+
+class Tween:
+    """An animation of one value: (start tick, duration, easing, from, to), evaluated at any tick."""
+
+    def __init__(self, start_tick, duration, from_value, to_value, easing="linear"):
+        """
+        Args:
+            start_tick (int): Tick at which the value is from_value.
+            duration (int): Ticks until the value reaches to_value (at least 1).
+            from_value (float): Value at the start.
+            to_value (float): Value at the end.
+            easing (str): Name of the easing (a key of EASINGS).
+        """
+        self.start_tick = start_tick
+        self.duration = duration
+        self.from_value = from_value
+        self.to_value = to_value
+        self.easing = easing
+
+    def value_at(self, tick):
+        """Return the value of the tween at tick."""
+        return tween_value(tick, self.start_tick, self.duration, self.from_value, self.to_value, self.easing)
+
+    def is_finished(self, tick):
+        """Return True if the tween has reached its final value at tick."""
+        return tick >= get_end_tick(self.start_tick, [self.duration])
+
+class Keyframes:
+    """
+    An animation of one value through several keyframes, one segment after the other, evaluated at any tick.
+    Segments follow an easing, or step by a speed per tick and stop on their keyframe (see evaluate_steps).
+    """
+
+    def __init__(self, start_tick, values, durations, easing="linear", speed=None):
+        """
+        Args:
+            start_tick (int): Tick at which the value is values[0].
+            values (list[float]): Keyframe values.
+            durations (list[int]): Ticks from each keyframe to the next (one less than values, at least 1).
+            easing (str): Name of the easing of every segment.
+            speed (float): Change per tick of stepped segments (None to follow the easing).
+        """
+        self.start_tick = start_tick
+        self.values = np.asarray(values, dtype=np.float64).tolist()
+        self.durations = np.asarray(durations, dtype=np.float64).tolist()
+        self.segment_ends = np.cumsum(self.durations).tolist()
+        self.easing = easing
+        self.speed = speed
+        self.end_tick = get_end_tick(start_tick, self.durations)
+
+    @classmethod
+    def at_speed(cls, start_tick, values, speed):
+        """Return keyframes whose segments step by speed per tick, lasting as many ticks as that takes."""
+        return cls(start_tick, values, durations_at_speed(np.array(values, dtype=np.float64), speed), speed=speed)
+
+    def delay(self, ticks):
+        """Start the track ticks later: a track paused for some ticks resumes where it was."""
+        self.start_tick += ticks
+        self.end_tick += ticks
+
+    def value_at(self, tick):
+        """Return the value of the track at tick, same as evaluate_keyframes (or evaluate_keyframe_steps) without arrays."""
+        elapsed = tick - self.start_tick
+        segment = 0
+        while segment < len(self.durations) - 1 and self.segment_ends[segment] <= elapsed:
+            segment += 1
+        segment_start = self.segment_ends[segment] - self.durations[segment]
+        from_value, to_value = self.values[segment], self.values[segment + 1]
+
+        if self.speed is not None:
+            return step_value(elapsed - segment_start, from_value, to_value, self.speed)
+        return tween_value(elapsed, segment_start, self.durations[segment], from_value, to_value, self.easing)
+
+    def is_finished(self, tick):
+        """Return True if the track has reached its final value at tick."""
+        return tick >= self.end_tick
+
+class Steps:
+    """A value changing by speed per tick toward a target and stopping on it, evaluated at any tick (see evaluate_steps)."""
+
+    def __init__(self, start_tick, from_value, to_value, speed):
+        """
+        Args:
+            start_tick (int): Tick at which the value is from_value.
+            from_value (float): Value at the start.
+            to_value (float): Value stepped to.
+            speed (float): Change per tick.
+        """
+        self.start_tick = start_tick
+        self.from_value = from_value
+        self.to_value = to_value
+        self.speed = speed
+        self.duration = math.ceil(abs(to_value - from_value) / speed)  # The last step is clamped
+
+    def value_at(self, tick):
+        """Return the value at tick."""
+        return step_value(tick - self.start_tick, self.from_value, self.to_value, self.speed)
+
+    def is_finished(self, tick):
+        """Return True if the value has reached its target at tick."""
+        return tick >= self.start_tick + self.duration
+
+class Approach:
+    """
+    A value moving toward a target at speed plus a fraction of the distance left, evaluated at any tick.
+    Same values as evaluate_approach, computed without arrays (objects evaluate one value per call).
+    """
+
+    def __init__(self, start_tick, from_value, to_value, speed):
+        """
+        Args:
+            start_tick (int): Tick at which the value is from_value.
+            from_value (float): Value at the start.
+            to_value (float): Value approached.
+            speed (float): Constant part of the change per tick.
+        """
+        self.start_tick = start_tick
+        self.from_value = from_value
+        self.to_value = to_value
+        self.speed = speed
+
+    def value_at(self, tick):
+        """Return the value of the approach at tick."""
+        elapsed = min(max(tick - self.start_tick, 0), APPROACH_TICKS - 1)
+        difference = float(self.to_value) - self.from_value
+        distance = abs(difference)
+        settled = APPROACH_DIVISOR * abs(self.speed)
+        remaining = min(max((distance + settled) * APPROACH_DECAY_LIST[elapsed] - settled, 0.0), distance)
+        sign = (difference > 0) - (difference < 0)
+        return self.to_value - sign * remaining
+
+    def is_finished(self, tick):
+        """Return True if the value has reached its target at tick."""
+        return self.value_at(tick) == self.to_value
@@ -0,0 +1,41 @@
+#viewport.py
+
+# Scenes are laid out for the full resolution. A draft render draws them on a smaller surface:
+# every draw and get_bounds converts layout coordinates to surface pixels with this scale.
+RENDER_SCALE = 1.0
+
+def set_render_scale(scale):
+    """
+    Set the scale from layout coordinates to render surface pixels (e.g. 0.5 for a half resolution draft).
+    Must be set before the scene objects are created: fonts are loaded at the scaled size.
+    """
+    global RENDER_SCALE
+    RENDER_SCALE = scale
+
+def get_render_scale():
+    """Return the scale from layout coordinates to render surface pixels."""
+    return RENDER_SCALE
+
+def scaled(value):
+    """Convert a layout length or coordinate to render surface pixels."""
+    if RENDER_SCALE == 1:
+        return value
+    return value * RENDER_SCALE
+
+def scaled_rect(x, y, width, height):
+    """Convert a layout rectangle (x, y, width, height) to render surface pixels."""
+    if RENDER_SCALE == 1:
+        return (x, y, width, height)
+    return (x * RENDER_SCALE, y * RENDER_SCALE, width * RENDER_SCALE, height * RENDER_SCALE)
+
+def scaled_size(size):
+    """Convert a layout size that must stay a positive integer (font sizes, border radius) to render surface pixels."""
+    if RENDER_SCALE == 1:
+        return size
+    return max(1, round(size * RENDER_SCALE))
+
+def unscaled(value):
+    """Convert a length measured in render surface pixels (e.g. the width of rendered text) to layout units."""
+    if RENDER_SCALE == 1:
+        return value
+    return value / RENDER_SCALE
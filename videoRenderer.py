@@ -1,58 +1,589 @@
 #videoRenderer.py
 
-import subprocess
-import threading
+import os
+import sys
+import zlib
+import time
 import queue
+import shutil
+import struct
+import threading
+import subprocess
+import collections
+import multiprocessing
+from abc import ABC, abstractmethod
+from fractions import Fraction
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+from utils.profiler import PROFILER
+
+def surface_pix_fmt(surface):
+    """
+    Return the FFmpeg raw pixel format matching the memory layout of a pygame surface.
+
+    Args:
+        surface (pygame.Surface): 24 or 32 bits per pixel surface.
+
+    Returns:
+        str: FFmpeg -pix_fmt name (e.g. 'bgr0' for the usual XRGB8888 surfaces).
+    """
+    bytesize = surface.get_bytesize()
+    if bytesize not in (3, 4):
+        raise ValueError(f"Unsupported surface depth: {surface.get_bitsize()} bits per pixel")
+
+    shifts = surface.get_shifts()
+    has_alpha = surface.get_masks()[3] != 0
+
+    # Channel letter stored at each byte of a pixel, lowest address first
+    channels = ["0"] * bytesize
+    for letter, shift in zip("rgb", shifts[:3]):
+        channels[shift // 8] = letter
+    if has_alpha:
+        channels[shifts[3] // 8] = "a"
+    if sys.byteorder == "big":
+        channels.reverse()
+
+    pix_fmt = "".join(channels)
+    return pix_fmt + "24" if bytesize == 3 else pix_fmt
+
+def copy_surface_pixels(surface, frame=None):
+    """
+    Copy the pixels of a surface, tightly packed row after row, into a frame buffer.
+
+    Args:
+        surface (pygame.Surface): The surface to capture.
+        frame (bytearray): Buffer to reuse. A new one is allocated if it is None or of the wrong size.
+
+    Returns:
+        bytearray: The buffer holding the pixels.
+    """
+    width, height = surface.get_size()
+    row_size = width * surface.get_bytesize()
+    if frame is None or len(frame) != row_size * height:
+        frame = bytearray(row_size * height)
+
+    pitch = surface.get_pitch()
+    if pitch == row_size:
+        with memoryview(surface.get_view('0')) as pixels:
+            frame[:] = pixels
+    else:
+        # Rows are padded: drop the padding so FFmpeg receives tightly packed rows
+        with memoryview(surface.get_buffer()) as pixels:
+            rows = np.frombuffer(pixels, dtype=np.uint8, count=pitch * height).reshape(height, pitch)
+            np.frombuffer(frame, dtype=np.uint8).reshape(height, row_size)[:] = rows[:, :row_size]
+            del rows
+    return frame
+
+REPEAT_FRAME = "repeat"  # Queue marker: write the previous frame again
+
+def frame_size(frame):
+    """Return the number of bytes a queued item takes (0 for markers)."""
+    if isinstance(frame, memoryview):
+        return frame.nbytes
+    return len(frame) if isinstance(frame, (bytes, bytearray)) else 0
+
+class FrameQueue:
+    """FIFO of frames bounded by the total number of bytes it holds instead of a frame count."""
+
+    def __init__(self, max_bytes):
+        """
+        Args:
+            max_bytes (int): Maximum bytes of queued frames. A single frame larger
+                             than this is still accepted when the queue is empty.
+        """
+        self.max_bytes = max_bytes
+        self.frames = collections.deque()
+        self.bytes = 0
+        self.high_water_bytes = 0
+        self.high_water_frames = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def put(self, frame, timeout=None):
+        """
+        Add a frame, blocking while the queue is full.
+
+        Args:
+            frame (bytes-like): The frame to queue, or a zero-size marker (None ends the stream).
+            timeout (float): Seconds to wait for room, None to wait forever.
+
+        Returns:
+            bool: True if the frame was queued, False if the timeout expired.
+        """
+        size = frame_size(frame)
+        with self.condition:
+            has_room = lambda: self.closed or not self.frames or self.bytes + size <= self.max_bytes
+            if not self.condition.wait_for(has_room, timeout):
+                return False
+            if self.closed:
+                raise RuntimeError("Frame queue is closed: the writer stopped")
+
+            self.frames.append(frame)
+            self.bytes += size
+            self.high_water_bytes = max(self.high_water_bytes, self.bytes)
+            self.high_water_frames = max(self.high_water_frames, len(self.frames))
+            self.condition.notify_all()
+            return True
 
-class VideoRenderer(threading.Thread):
-    def __init__(self, framerate, width, height, output_file):
+    def get(self):
+        """Remove and return the oldest frame, blocking until one is available."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.frames)
+            frame = self.frames.popleft()
+            self.bytes -= frame_size(frame)
+            self.condition.notify_all()
+            return frame
+
+    def close(self):
+        """Reject further frames and wake up any blocked producer."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+class FrameRenderer(threading.Thread, ABC):
+    """
+    Sink of rendered frames: queues them and writes them in order on its own thread, so the render loop
+    only waits when the queue is full. Subclasses write the frames (write_frame) and complete the output (finish).
+    """
+
+    MAX_QUEUE_BYTES = 256 * 1024 * 1024  # ~30 raw 1080p frames
+
+    def __init__(self, output_file, max_queue_bytes=MAX_QUEUE_BYTES, drop_frames=False, skip_duplicates=True):
+        """
+        Args:
+            output_file (str): Path of the output.
+            max_queue_bytes (int): Memory cap for the frames waiting to be written.
+            drop_frames (bool): Drop frames when the writer falls behind instead of blocking the producer.
+                                The default is lossless: send_frame waits for room in the queue.
+            skip_duplicates (bool): Let send_surface compare each surface with the previous frame
+                                    and repeat that frame instead of copying identical pixels.
+        """
         super().__init__()
         self.output_file = output_file
-        self.frame_queue = queue.Queue(maxsize=120)  # ✅ Limit memory usage
+        self.frame_queue = FrameQueue(max_queue_bytes)  # ✅ Limit memory usage
+        self.free_buffers = queue.Queue()  # Frame buffers given back by the writer thread, reused by send_surface
+        self.drop_frames = drop_frames
+        self.skip_duplicates = skip_duplicates
+        self.last_sent = None  # Last frame queued by send_surface, kept alive by the writer while it may be repeated
         self.running = True
+        self.error = None
+
+        # Statistics
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.frames_repeated = 0
+        self.frames_written = 0
+        self.stall_time = 0.0  # Seconds the producer spent waiting for room in the queue
+        self.max_stall_time = 0.0
+        self.first_frame_time = None  # When the writer got the first frame
+        self.finish_time = None  # When the output was complete
+
+    @abstractmethod
+    def write_frame(self, frame, index):
+        """Write the frame number index of the output. An exception stops the renderer: close() raises it."""
+        pass
+
+    def write_repeated_frame(self, frame, index):
+        """Write the frame number index, which has the same pixels as the previous one."""
+        self.write_frame(frame, index)
+
+    def finish(self):
+        """Complete the output once every frame has been written."""
+        pass
+
+    def run(self):
+        """Thread loop: Writes the queued frames in order."""
+        last_frame = None
+        while True:
+            frame = self.frame_queue.get()  # ✅ Blocks until frame is available
+            if frame is None:
+                break  # End marker queued by close()
+            if self.first_frame_time is None:
+                self.first_frame_time = time.perf_counter()
+            repeated = frame is REPEAT_FRAME
+            if repeated:
+                frame = last_frame  # Raw frames have no timestamps: the duplicate is written from the buffer we still hold
+                if frame is None:
+                    continue
+            try:
+                if repeated:
+                    self.write_repeated_frame(frame, self.frames_written)
+                else:
+                    self.write_frame(frame, self.frames_written)
+            except Exception as error:
+                # The output failed: refuse further frames rather than blocking the producer forever
+                self.error = error
+                self.frame_queue.close()
+                break
+            self.frames_written += 1
+            if isinstance(last_frame, bytearray) and last_frame is not frame:
+                self.free_buffers.put(last_frame)  # Buffer came from send_surface, recycle it
+            last_frame = frame
+
+    def send_frame(self, frame):
+        """
+        Queue a frame to be written asynchronously.
+        Blocks while the queue is full, unless the renderer was created with drop_frames=True.
+
+        Returns:
+            bool: True if the frame was queued, False if it was dropped.
+        """
+        if not self.running:
+            return False
+
+        start = time.perf_counter()
+        try:
+            with PROFILER.span("queue_wait", "encode"):
+                queued = self.frame_queue.put(frame, timeout=0.1 if self.drop_frames else None)
+        except RuntimeError:
+            raise RuntimeError(f"Writing {self.output_file} failed: {self.error}")
+
+        if not queued:
+            self.frames_dropped += 1
+            print("⚠️ Frame dropped: the writer is too slow!")
+            return False
+
+        stall = time.perf_counter() - start
+        self.stall_time += stall
+        self.max_stall_time = max(self.max_stall_time, stall)
+        self.frames_sent += 1
+        return True
+
+    def repeat_frame(self):
+        """Queue a copy of the previous frame without capturing, copying or queuing its pixels again."""
+        if self.send_frame(REPEAT_FRAME):
+            self.frames_repeated += 1
+
+    def is_last_frame(self, surface):
+        """Return True if the pixels of surface are the same as the last frame queued by send_surface."""
+        if self.last_sent is None or surface.get_pitch() != surface.get_width() * surface.get_bytesize():
+            return False
+        with memoryview(surface.get_view('0')) as pixels:
+            if pixels.nbytes != len(self.last_sent):
+                return False
+            dtype = np.uint64 if pixels.nbytes % 8 == 0 else np.uint8
+            return np.array_equal(np.frombuffer(pixels, dtype=dtype), np.frombuffer(self.last_sent, dtype=dtype))
+
+    def send_surface(self, surface, changed=None):
+        """
+        Queue the pixels of a surface, copied once from its native buffer into a reusable frame buffer.
+        Unchanged frames are not copied: the previous frame is repeated instead.
+        The renderer must have been created with pix_fmt=surface_pix_fmt(surface).
+
+        Args:
+            surface (pygame.Surface): The surface to capture (e.g. the screen).
+            changed (bool): Whether the surface changed since the last call (e.g. dirty rectangles
+                            were repainted). None compares the pixels if skip_duplicates is set.
+        """
+        if self.last_sent is not None:
+            if changed is False or (changed is None and self.skip_duplicates and self.is_last_frame(surface)):
+                self.repeat_frame()
+                return
+
+        try:
+            frame = self.free_buffers.get_nowait()
+        except queue.Empty:
+            frame = None
+
+        with PROFILER.span("capture", "encode"):
+            frame = copy_surface_pixels(surface, frame)
+
+        if self.send_frame(frame):
+            self.last_sent = frame
+
+    def get_throughput(self):
+        """Return the frames per second written, from the first frame to the output being complete (None before)."""
+        if self.first_frame_time is None or self.finish_time is None:
+            return None
+        return self.frames_written / max(self.finish_time - self.first_frame_time, 1e-9)
+
+    def stats(self):
+        """Return the queue, backpressure and throughput statistics of this renderer."""
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "frames_repeated": self.frames_repeated,
+            "frames_written": self.frames_written,
+            "stall_time": self.stall_time,
+            "max_stall_time": self.max_stall_time,
+            "high_water_bytes": self.frame_queue.high_water_bytes,
+            "high_water_frames": self.frame_queue.high_water_frames,
+            "fps": self.get_throughput(),
+        }
+
+    def close(self):
+        """Stops the thread and completes the output. Raises RuntimeError if frames could not be written."""
+        if not self.running:
+            return
+        self.running = False
+        try:
+            self.frame_queue.put(None)
+        except RuntimeError:
+            pass  # The writer closed the queue when it failed and has stopped: no end marker needed
+        self.join()
+        self.finish()
+        self.finish_time = time.perf_counter()
+
+        stats = self.stats()
+        fps = f"{stats['fps']:.1f} fps" if stats["fps"] is not None else "no frames"
+        print(f"{self.output_file}: {stats['frames_sent']} frames ({stats['frames_repeated']} repeated), {stats['frames_dropped']} dropped, "
+              f"{stats['frames_written']} written at {fps}, "
+              f"stalled {stats['stall_time']:.2f}s (max {stats['max_stall_time'] * 1000:.1f}ms), "
+              f"queue peak {stats['high_water_frames']} frames / {stats['high_water_bytes'] / 2**20:.1f} MiB")
+
+        if self.error is not None:
+            raise RuntimeError(f"Writing {self.output_file} failed: {self.error}")
+
+def ebml_size(size):
+    """Return a size as an EBML variable length integer (the length marker bit followed by the value)."""
+    length = 1
+    while size >= (1 << (7 * length)) - 1:  # All ones is reserved for unknown sizes
+        length += 1
+    return ((1 << (7 * length)) | size).to_bytes(length, "big")
+
+def ebml_element(element_id, data=b""):
+    """Return an EBML element: its id, its size and data (bytes, an unsigned int or a string)."""
+    if isinstance(data, int):
+        data = data.to_bytes(max(1, (data.bit_length() + 7) // 8), "big")
+    elif isinstance(data, str):
+        data = data.encode()
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, "big") + ebml_size(len(data)) + data
+
+def matroska_fourcc(pix_fmt):
+    """Return the Matroska ColourSpace of raw frames in an FFmpeg pixel format (e.g. b"BGR\\0" for bgr0)."""
+    if pix_fmt.endswith("24"):
+        return pix_fmt[:-2].upper().encode() + bytes([24])
+    return pix_fmt.upper().replace("0", "\0").encode()
+
+# FFmpeg output options of every codec: (file extension, arguments given the preset and crf)
+CODECS = {
+    # Delivery: small files, slow to seek in an editor
+    "h264": (".mp4", lambda preset, crf: ['-c:v', 'libx264', '-preset', preset, '-crf', str(crf), '-pix_fmt', 'yuv420p']),
+    # Editing handoff: intraframe (every frame is a keyframe), fast to encode and to scrub
+    "prores": (".mov", lambda preset, crf: ['-c:v', 'prores_ks', '-profile:v', '3', '-vendor', 'apl0', '-pix_fmt', 'yuv422p10le']),
+    "ffv1": (".mkv", lambda preset, crf: ['-c:v', 'ffv1', '-level', '3', '-g', '1', '-slices', '16', '-slicecrc', '1']),  # Lossless RGB
+}
+
+class VideoRenderer(FrameRenderer):
+    """
+    Writes the frames into a video file through an FFmpeg pipe.
+
+    The pipe carries a Matroska stream of raw frames, each with its timestamp, so a repeated frame is
+    not sent again: the previous one lasts longer. FFmpeg repeats it back after the pipe (fps filter), so
+    every output has a constant frame rate: editors expect every frame, and segments joined without
+    re-encoding (concat_videos) keep their timing.
+    """
+
+    # Matroska element ids
+    EBML_HEADER, SEGMENT, INFO, TRACKS, CLUSTER = 0x1A45DFA3, 0x18538067, 0x1549A966, 0x1654AE6B, 0x1F43B675
+    UNKNOWN_SIZE = bytes.fromhex("01FFFFFFFFFFFFFF")  # Segment size of a live stream
+
+    def __init__(self, framerate, width, height, output_file, pix_fmt='rgb24', max_queue_bytes=FrameRenderer.MAX_QUEUE_BYTES, drop_frames=False, skip_duplicates=True, preset='ultrafast', crf=23, codec='h264'):
+        """
+        Start FFmpeg and the thread that feeds it.
+
+        Args:
+            framerate (int or str): Frames per second of the output video (a fraction like "60/4" is accepted).
+            width (int): Frame width in pixels.
+            height (int): Frame height in pixels.
+            output_file (str): Path of the video to write.
+            pix_fmt (str): FFmpeg pixel format of the frames sent (see surface_pix_fmt).
+            max_queue_bytes (int): Memory cap for the frames waiting to be written.
+            drop_frames (bool): Drop frames when FFmpeg falls behind instead of blocking the producer.
+            skip_duplicates (bool): Repeat the previous frame when send_surface gets identical pixels.
+            preset (str): x264 preset (speed of the encoder against compression).
+            crf (int): x264 quality (higher is smaller and worse, e.g. 35 for drafts).
+            codec (str): Key of CODECS: 'h264', or 'prores' / 'ffv1' for editing.
+        """
+        super().__init__(output_file, max_queue_bytes, drop_frames, skip_duplicates)
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec {codec!r}: expected one of {', '.join(CODECS)}")
+
+        self.framerate = Fraction(str(framerate))
+        self.last_written = None  # Index of the last frame sent to FFmpeg
+        self.last_repeated = None  # (frame, index) of the last repeat, sent at the end if the video ends with repeats
 
         # FFmpeg command
         ffmpeg_cmd = [
             'ffmpeg',
             '-y',
-            '-f', 'rawvideo',
-            '-pix_fmt', 'rgb24',
-            '-s', f'{width}x{height}',
-            '-r', str(framerate),
+            '-f', 'matroska',
             '-thread_queue_size', '512',  # ✅ Allow buffering
             '-i', 'pipe:0',
-            '-c:v', 'libx264',
-            '-preset', 'ultrafast',
-            '-crf', '23',
-            '-pix_fmt', 'yuv420p',
+            *CODECS[codec][1](preset, crf),
+            '-vf', f'fps={framerate}',  # Each output frame shows the frame on screen at its time
             self.output_file
         ]
 
         self.ffmpeg = subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE, bufsize=10**8)  
-        self.start()  
+        self.ffmpeg.stdin.write(self.get_stream_header(width, height, pix_fmt))
+        self.start()
 
-    def run(self):
-        """Thread loop: Sends frames to FFmpeg asynchronously."""
-        while self.running or not self.frame_queue.empty():
-            frame = self.frame_queue.get()  # ✅ Blocks until frame is available
+    def get_stream_header(self, width, height, pix_fmt):
+        """Return the start of the Matroska stream: one track of raw frames, timestamps in nanoseconds."""
+        header = ebml_element(self.EBML_HEADER, b"".join([
+            ebml_element(0x4286, 1),  # EBMLVersion
+            ebml_element(0x42F7, 1),  # EBMLReadVersion
+            ebml_element(0x42F2, 4),  # EBMLMaxIDLength
+            ebml_element(0x42F3, 8),  # EBMLMaxSizeLength
+            ebml_element(0x4282, "matroska"),  # DocType
+            ebml_element(0x4287, 4),  # DocTypeVersion
+            ebml_element(0x4285, 2),  # DocTypeReadVersion
+        ]))
+        info = ebml_element(self.INFO, ebml_element(0x2AD7B1, 1) + ebml_element(0x4D80, "videoRenderer") + ebml_element(0x5741, "videoRenderer"))  # TimestampScale: 1 ns
+        video = ebml_element(0xE0, ebml_element(0xB0, width) + ebml_element(0xBA, height) + ebml_element(0x2EB524, matroska_fourcc(pix_fmt)))
+        track = ebml_element(0xAE, b"".join([
+            ebml_element(0xD7, 1),  # TrackNumber
+            ebml_element(0x73C5, 1),  # TrackUID
+            ebml_element(0x83, 1),  # TrackType: video
+            ebml_element(0x86, "V_UNCOMPRESSED"),  # CodecID
+            ebml_element(0x23E383, self.get_timestamp(1)),  # DefaultDuration: one frame
+            video,
+        ]))
+        return header + self.SEGMENT.to_bytes(4, "big") + self.UNKNOWN_SIZE + info + ebml_element(self.TRACKS, track)
+
+    def get_timestamp(self, index):
+        """Return the time of the frame number index, in nanoseconds."""
+        return round(index * 10**9 / self.framerate)
+
+    def write_frame(self, frame, index):
+        """Send the frame in a cluster of its own, stamped with its time (the pixels are not copied)."""
+        timestamp = ebml_element(0xE7, self.get_timestamp(index))  # Cluster Timestamp
+        block_size = 4 + len(frame)  # Track number, relative timestamp and flags, then the pixels
+        block = (0xA3).to_bytes(1, "big") + ebml_size(block_size) + bytes([0x81, 0, 0, 0x80])  # SimpleBlock, track 1, keyframe
+        cluster = self.CLUSTER.to_bytes(4, "big") + ebml_size(len(timestamp) + len(block) + len(frame))
+        with PROFILER.span("ffmpeg_write", "encode"):
+            self.ffmpeg.stdin.write(cluster + timestamp + block)
             self.ffmpeg.stdin.write(frame)
-            self.frame_queue.task_done()
+        self.last_written = index
+        self.last_repeated = None
 
-    def send_frame(self, frame):
-        """Queue a frame to be written to the video file asynchronously."""
-        if self.running:
+    def write_repeated_frame(self, frame, index):
+        """Nothing goes through the pipe: the timestamp of the next frame sent makes the previous one last longer."""
+        self.last_repeated = (frame, index)
+
+    def finish(self):
+        """
+        Close the pipe and wait for FFmpeg to finish encoding. If the video ends with repeats, the last frame
+        is sent again at the last index first: the duration of the final frame does not survive the encoder.
+        """
+        if self.last_repeated is not None and self.error is None:
             try:
-                self.frame_queue.put(frame, timeout=0.1)  # ✅ Drop frames if overloaded
-            except queue.Full:
-                print("⚠️ Frame dropped: FFmpeg is too slow!")
+                self.write_frame(*self.last_repeated)
+            except OSError as error:
+                self.error = error
+        try:
+            self.ffmpeg.stdin.close()
+        except OSError:
+            pass
+        if self.ffmpeg.wait() != 0 and self.error is None:
+            self.error = OSError(f"FFmpeg exited with code {self.ffmpeg.returncode}")
 
-    def close(self):
-        """Stops the thread and ensures FFmpeg finishes encoding."""
-        self.running = False  
-        self.frame_queue.join()  
-        self.ffmpeg.stdin.close()
-        self.ffmpeg.wait()  
-
-    def __del__(self):
-        print(f"Warning: VideoRenderer object deleted without explicit close(). Call .close() before exiting.")
+def frame_to_rgb(frame, width, height, pix_fmt):
+    """Return the pixels of a raw frame (in a surface_pix_fmt layout) as a (height, width, 3) RGB array."""
+    channels = pix_fmt[:-2] if pix_fmt.endswith("24") else pix_fmt
+    pixels = np.frombuffer(frame, dtype=np.uint8).reshape(height, width, len(channels))
+    return pixels[:, :, [channels.index(letter) for letter in "rgb"]]
+
+def png_chunk(chunk_type, data):
+    """Return a PNG chunk: length, type, data and CRC."""
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+def write_png(path, frame, width, height, pix_fmt, compression):
+    """
+    Write a raw frame as an 8 bit RGB PNG. Runs in the worker processes of ImageSequenceRenderer.
+
+    Args:
+        path (str): Path of the image.
+        frame (bytes): Pixels in the pix_fmt layout, tightly packed rows.
+        width (int): Width of the frame.
+        height (int): Height of the frame.
+        pix_fmt (str): FFmpeg pixel format of the frame (see surface_pix_fmt).
+        compression (int): zlib level, 0 (fastest) to 9 (smallest).
+    """
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)  # Every row starts with filter type 0 (none)
+    rows[:, 1:] = frame_to_rgb(frame, width, height, pix_fmt).reshape(height, width * 3)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)  # 8 bit, truecolor, no interlace
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as image_file:
+        image_file.write(b"\x89PNG\r\n\x1a\n")
+        image_file.write(png_chunk(b"IHDR", header))
+        image_file.write(png_chunk(b"IDAT", zlib.compress(rows.tobytes(), compression)))
+        image_file.write(png_chunk(b"IEND", b""))
+    os.replace(temporary_path, path)  # A frame file is either complete or missing
+
+class ImageSequenceRenderer(FrameRenderer):
+    """
+    Writes every frame as a numbered PNG (output_file/000000.png, 000001.png...), compressed in a pool of
+    processes. Frame numbers are assigned in queue order, so the sequence keeps the order of send_frame.
+    """
+
+    FILE_NAME = "{:06d}.png"
+
+    def __init__(self, width, height, output_file, pix_fmt='rgb24', max_queue_bytes=FrameRenderer.MAX_QUEUE_BYTES, drop_frames=False, skip_duplicates=True, compression=1, start_number=0, max_workers=None):
+        """
+        Args:
+            width (int): Frame width in pixels.
+            height (int): Frame height in pixels.
+            output_file (str): Directory of the images (created if needed).
+            pix_fmt (str): FFmpeg pixel format of the frames sent (see surface_pix_fmt).
+            max_queue_bytes (int): Memory cap for the frames waiting to be written.
+            drop_frames (bool): Drop frames when the pool falls behind instead of blocking the producer.
+            skip_duplicates (bool): Repeat the previous frame when send_surface gets identical pixels.
+            compression (int): zlib level of the PNGs (1 is fast and still much smaller than raw).
+            start_number (int): Number of the first image.
+            max_workers (int): Compression processes (default: the CPU count).
+        """
+        super().__init__(output_file, max_queue_bytes, drop_frames, skip_duplicates)
+        self.width = width
+        self.height = height
+        self.pix_fmt = pix_fmt
+        self.compression = compression
+        self.start_number = start_number
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pending = collections.deque()  # (path, future) of the images being compressed, oldest first
+        self.repeats = []  # (source path, copy path) of repeated frames, copied once the source is written
+
+        os.makedirs(output_file, exist_ok=True)
+        self.pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        self.start()
+
+    def get_path(self, index):
+        """Return the path of the image of frame number index."""
+        return os.path.join(self.output_file, self.FILE_NAME.format(self.start_number + index))
+
+    def wait_oldest(self):
+        """Wait for the oldest pending image (raises OSError if it could not be written)."""
+        path, future = self.pending.popleft()
+        try:
+            future.result()
+        except Exception as error:
+            raise OSError(f"{path}: {error}") from error
+
+    def write_frame(self, frame, index):
+        # Bounded: a few frames per worker in flight, the rest wait in the frame queue
+        while len(self.pending) >= 2 * self.max_workers:
+            self.wait_oldest()
+        with PROFILER.span("png_submit", "encode"):
+            self.pending.append((self.get_path(index), self.pool.submit(write_png, self.get_path(index), bytes(frame), self.width, self.height, self.pix_fmt, self.compression)))
+
+    def write_repeated_frame(self, frame, index):
+        self.repeats.append((self.get_path(index - 1), self.get_path(index)))
+
+    def finish(self):
+        """Wait for every image, write the repeated ones and check that the sequence has no gap."""
+        try:
+            while self.pending:
+                self.wait_oldest()
+            for source, copy in self.repeats:  # In order: the source of a repeat can be a repeat itself
+                shutil.copyfile(source, copy)
+        except OSError as error:
+            self.error = self.error or error
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+        if self.error is None:
+            missing = [index for index in range(self.frames_written) if not os.path.exists(self.get_path(index))]
+            if missing:
+                self.error = OSError(f"{len(missing)} images missing, the first one is {self.get_path(missing[0])}")